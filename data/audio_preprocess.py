@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import bisect
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from colorama import init, Fore, Style
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+# Where preprocessed audio and its timestamp maps are written
+PREPROCESSED_DIR = 'preprocessed'
+
+# Speech needs far less than the 192 kbps stereo MP3s in downloaded/
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_BITRATE = '32k'
+
+# Silence trimming
+SILENCE_BELOW_DBFS = 16    # Silence threshold, in dB below the file's average loudness
+MAX_SILENCE_MS = 1000      # Internal pauses longer than this are shortened...
+KEEP_SILENCE_MS = 300      # ...to this much
+SILENCE_SEEK_MS = 10       # Resolution of the silence scan
+
+
+def find_kept_ranges(audio):
+    """
+    Ranges of the audio to keep: everything except leading and trailing
+    silence, with long internal pauses shortened to KEEP_SILENCE_MS.
+
+    Returns:
+        list: (start_ms, end_ms) ranges in order
+    """
+    silences = detect_silence(
+        audio, min_silence_len=MAX_SILENCE_MS,
+        silence_thresh=audio.dBFS - SILENCE_BELOW_DBFS, seek_step=SILENCE_SEEK_MS
+    )
+    ranges = []
+    position = 0
+    half_keep = KEEP_SILENCE_MS // 2
+    for start, end in silences:
+        if start == 0:
+            position = end  # Leading silence
+            continue
+        if end >= len(audio):
+            ranges.append((position, start))  # Trailing silence
+            position = len(audio)
+            break
+        ranges.append((position, start + half_keep))
+        position = end - half_keep
+    if position < len(audio):
+        ranges.append((position, len(audio)))
+    return [(start, end) for start, end in ranges if end > start] or [(0, len(audio))]
+
+
+def map_time(timestamp_map, seconds):
+    """
+    Map a time in the preprocessed audio back to the original file.
+
+    Args:
+        timestamp_map (list): [processed_start, original_start, duration] entries in seconds
+        seconds (float): Time in the preprocessed audio
+
+    Returns:
+        float: Time in the original audio
+    """
+    if not timestamp_map:
+        return seconds
+    index = max(0, bisect.bisect_right([entry[0] for entry in timestamp_map], seconds) - 1)
+    processed_start, original_start, duration = timestamp_map[index]
+    return original_start + min(max(seconds - processed_start, 0), duration)
+
+
+def map_utterances(utterances, timestamp_map):
+    """
+    Rewrite the start/end of Deepgram utterances to original file times, in place.
+    """
+    for utterance in utterances:
+        for key in ('start', 'end'):
+            if key in utterance:
+                utterance[key] = round(map_time(timestamp_map, utterance[key]), 3)
+    return utterances
+
+
+def preprocess_audio(input_path, output_dir=PREPROCESSED_DIR):
+    """
+    Downmix to mono, resample to SPEECH_SAMPLE_RATE, trim silence and encode
+    as low-bitrate Opus.
+
+    The timestamp map and the savings are saved next to the output, so a
+    file that was already preprocessed is not decoded again.
+
+    Args:
+        input_path (str): Audio file from downloaded/
+        output_dir (str): Directory for the preprocessed file
+
+    Returns:
+        dict: path, timestamp_map, original/processed bytes and seconds
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    output_path = os.path.join(output_dir, name + '.ogg')
+    map_path = os.path.join(output_dir, name + '.map.json')
+    if (os.path.exists(output_path) and os.path.exists(map_path)
+            and os.path.getmtime(map_path) >= os.path.getmtime(input_path)):
+        with open(map_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    audio = AudioSegment.from_file(input_path)
+    original_seconds = len(audio) / 1000
+    audio = audio.set_channels(1).set_frame_rate(SPEECH_SAMPLE_RATE)
+
+    timestamp_map = []
+    processed = AudioSegment.empty()
+    for start, end in find_kept_ranges(audio):
+        timestamp_map.append([len(processed) / 1000, start / 1000, (end - start) / 1000])
+        processed += audio[start:end]
+    processed.export(output_path, format='ogg', codec='libopus', bitrate=SPEECH_BITRATE)
+
+    result = {
+        'path': output_path,
+        'timestamp_map': timestamp_map,
+        'original_bytes': os.path.getsize(input_path),
+        'processed_bytes': os.path.getsize(output_path),
+        'original_seconds': original_seconds,
+        'processed_seconds': len(processed) / 1000,
+    }
+    with open(map_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    return result
+
+
+def preprocess_job(input_path):
+    """
+    Preprocess one file in a worker process and measure it.
+
+    Returns:
+        dict: The preprocess_audio result plus input path, seconds and error (if any)
+    """
+    start_time = time.perf_counter()
+    try:
+        result = preprocess_audio(input_path)
+        result['error'] = None
+    except Exception as e:
+        result = {'path': None, 'timestamp_map': None, 'error': str(e)}
+    result['input_path'] = input_path
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+
+def preprocess_parallel(input_paths, workers):
+    """
+    Run preprocess_job for every file on a pool of worker processes.
+
+    Yields:
+        dict: preprocess_job results, as each file finishes
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(preprocess_job, path) for path in input_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def print_savings(result):
+    """
+    Print the bytes and billed seconds saved on one file.
+    """
+    if result['error']:
+        print(f"{Fore.RED}[ERROR] Preprocessing {result['input_path']} failed: {result['error']}{Style.RESET_ALL}")
+        return
+    saved_bytes = result['original_bytes'] - result['processed_bytes']
+    saved_seconds = result['original_seconds'] - result['processed_seconds']
+    print(f"{Fore.GREEN}[INFO] {os.path.basename(result['input_path'])}: "
+          f"{result['original_bytes'] / 1024 / 1024:.1f} -> {result['processed_bytes'] / 1024 / 1024:.1f} MB "
+          f"({saved_bytes / max(result['original_bytes'], 1):.0%} smaller), "
+          f"{result['original_seconds'] / 60:.1f} -> {result['processed_seconds'] / 60:.1f} min "
+          f"({saved_seconds:.0f}s of silence trimmed) in {result['seconds']:.1f}s{Style.RESET_ALL}")
+
+
+def print_totals(results):
+    """
+    Print the savings over every successfully preprocessed file.
+    """
+    done = [result for result in results if not result['error']]
+    if not done:
+        return
+    original_bytes = sum(result['original_bytes'] for result in done)
+    processed_bytes = sum(result['processed_bytes'] for result in done)
+    original_seconds = sum(result['original_seconds'] for result in done)
+    processed_seconds = sum(result['processed_seconds'] for result in done)
+    print(f"{Fore.GREEN}[INFO] Preprocessed {len(done)} files: {(original_bytes - processed_bytes) / 1024 / 1024:.1f} MB "
+          f"({1 - processed_bytes / max(original_bytes, 1):.0%}) fewer bytes to upload, "
+          f"{(original_seconds - processed_seconds) / 60:.1f} fewer billed minutes "
+          f"({1 - processed_seconds / max(original_seconds, 1):.0%}){Style.RESET_ALL}")
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Downmix, resample and trim silence from downloaded audio before transcription')
+    parser.add_argument('paths', nargs='*', help='Audio files (default: every file in downloaded/)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Number of worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    paths = args.paths or [
+        os.path.join('downloaded', name) for name in sorted(os.listdir('downloaded'))
+        if not name.startswith('.')
+    ]
+    results = []
+    for result in preprocess_parallel(paths, args.workers):
+        print_savings(result)
+        results.append(result)
+    print_totals(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from colorama import init, Fore, Style
+from fake_services import FakeServiceConfig, FakeOpenAI, FakeDeepgram, FakeYCPages
+
+# Initialize colorama
+init()
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# run-pipeline.py knows how to import the hyphenated stage scripts
+_spec = importlib.util.spec_from_file_location('run_pipeline', os.path.join(DATA_DIR, 'run-pipeline.py'))
+run_pipeline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run_pipeline)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def timed(function, latencies):
+    """
+    Wrap an async stage function so each call's duration is recorded.
+    """
+    async def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start_time)
+    return wrapper
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    # The stage scripts print a line per step; keep the benchmark output readable
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def report(stage, items, succeeded, elapsed, latencies, service):
+    """
+    Print items/sec, latency percentiles and retries for one stage.
+
+    Retries are counted on the fake server: every request it did not answer
+    successfully had to be retried (or made its item fail).
+    """
+    stats = service.stats
+    retries = stats['requests'] - stats['ok']
+    color = Fore.GREEN if succeeded == items else Fore.YELLOW
+    print(f"{color}[INFO] {stage:<10} {succeeded}/{items} items in {elapsed:.2f}s = {succeeded / elapsed:.1f} items/s, "
+          f"p50 {percentile(latencies, 0.5) * 1000:.0f} ms, p99 {percentile(latencies, 0.99) * 1000:.0f} ms, "
+          f"{stats['requests']} requests, {retries} retries "
+          f"({stats['throttled']} throttled, {stats['errors']} errors){Style.RESET_ALL}")
+
+
+def benchmark_scrape(items, config, workers, verbose):
+    gyv = run_pipeline.load_script('get_yc_video')
+    with FakeYCPages([item['page_url'] for item in items], config=config) as service:
+        urls = [service.url + item['page_url'] for item in items]
+        session = gyv.create_http_session(workers)
+        latencies = []
+
+        def fetch(url):
+            start_time = time.perf_counter()
+            link = gyv.fetch_youtube_link_static(session, url)
+            latencies.append(time.perf_counter() - start_time)
+            return link
+
+        start_time = time.perf_counter()
+        with quiet(not verbose), ThreadPoolExecutor(max_workers=workers) as executor:
+            links = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - start_time
+        session.close()
+        report('scrape', len(items), sum(1 for link in links if link), elapsed, latencies, service)
+
+
+def benchmark_transcribe(items, config, concurrency, verbose):
+    transcription = run_pipeline.load_script('get_yc_video_transcription')
+    rng = random.Random(0)
+    with FakeDeepgram(config=config) as service, tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        os.makedirs('downloaded')
+        data = []
+        for i, item in enumerate(items):
+            path = os.path.join('downloaded', f"benchmark-{i}.mp3")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(rng.randint(64, 512) * 1024))
+            data.append({'name_video': item.get('name_video'), 'page_url': item['page_url'], 'mp3_file': path})
+        with open('video-data-missing.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        transcription.deepgram = transcription.create_deepgram_client(service.url + '/v1')
+        latencies = []
+        process_item = transcription.process_item
+        transcription.process_item = timed(process_item, latencies)
+        start_time = time.perf_counter()
+        try:
+            with quiet(not verbose):
+                asyncio.run(transcription.process_data_async(initial_concurrency=concurrency))
+        finally:
+            transcription.process_item = process_item
+        elapsed = time.perf_counter() - start_time
+        with open('video-data-missing-gotten.json', 'r', encoding='utf-8') as f:
+            succeeded = sum(1 for item in json.load(f) if item.get('mp3_content'))
+        report('transcribe', len(items), succeeded, elapsed, latencies, service)
+
+
+def benchmark_translate(items, blog_items, config, language, concurrency, verbose):
+    translation = run_pipeline.load_script('translate_data')
+    with FakeOpenAI(config=config) as service, tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        with open('video-data-updated.json', 'w', encoding='utf-8') as f:
+            json.dump(items, f)
+        with open('blog-data.json', 'w', encoding='utf-8') as f:
+            json.dump(blog_items, f)
+
+        engine = translation.engine
+        translation.engine = translation.TranslationEngine(
+            api_key='fake', base_url=service.url + '/v1', max_concurrency=concurrency,
+            requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9
+        )
+        latencies = []
+        functions = (translation.translate_video_data, translation.translate_blog_data)
+        translation.translate_video_data = timed(functions[0], latencies)
+        translation.translate_blog_data = timed(functions[1], latencies)
+        start_time = time.perf_counter()
+        try:
+            with quiet(not verbose):
+                asyncio.run(translation.process_data_async([language]))
+        finally:
+            translation.engine = engine
+            translation.translate_video_data, translation.translate_blog_data = functions
+        elapsed = time.perf_counter() - start_time
+        succeeded = 0
+        for name, label in (('video-data.json', 'video'), ('blog-data.json', 'blog')):
+            path = os.path.join('translation', language.lower(), name)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    # Items are written even when a field failed; those carry an error placeholder
+                    succeeded += sum(
+                        not any(translation.has_translation_error(value)
+                                for value in translation.get_translated_fields(item, label).values())
+                        for item in json.load(f)
+                    )
+        report('translate', len(items) + len(blog_items), succeeded, elapsed, latencies, service)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrape, transcription and translation stages against local fake services')
+    parser.add_argument('--data', type=str, default='video-data-updated.json',
+                        help='Video items used as input (default: video-data-updated.json)')
+    parser.add_argument('--blog-data', type=str, default='blog-data.json',
+                        help='Blog items used as translation input (default: blog-data.json)')
+    parser.add_argument('--items', type=int, default=50, help='Items per stage (default: 50)')
+    parser.add_argument('--stages', type=str, default='scrape,transcribe,translate',
+                        help='Comma-separated stages to run (default: scrape,transcribe,translate)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake server base latency in seconds (default: 0.05)')
+    parser.add_argument('--seconds-per-kb', type=float, default=0.0,
+                        help='Extra fake latency per KB of request or response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 500 responses (default: 0)')
+    parser.add_argument('--rps', type=float, help='Fake rate limit in requests per second (HTTP 429 above it)')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Concurrency of each stage (default: 16)')
+    parser.add_argument('--language', type=str, default='Turkish', help='Translation target language (default: Turkish)')
+    parser.add_argument('--verbose', action='store_true', help="Show the stage scripts' own output")
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        items = json.load(f)[:args.items]
+    blog_items = []
+    if os.path.exists(args.blog_data):
+        with open(args.blog_data, 'r', encoding='utf-8') as f:
+            blog_items = json.load(f)[:args.items]
+
+    def config():
+        # A fresh config (and random stream) per stage
+        return FakeServiceConfig(latency=args.latency, seconds_per_kb=args.seconds_per_kb,
+                                 error_rate=args.error_rate, requests_per_second=args.rps)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    print(f"{Fore.CYAN}[INFO] Benchmarking {', '.join(stages)} on {len(items)} items: latency {args.latency}s, "
+          f"error rate {args.error_rate:.0%}, rate limit {args.rps or 'none'} req/s{Style.RESET_ALL}")
+    for stage in stages:
+        if stage == 'scrape':
+            benchmark_scrape(items, config(), args.concurrency, args.verbose)
+        elif stage == 'transcribe':
+            benchmark_transcribe(items, config(), args.concurrency, args.verbose)
+        elif stage == 'translate':
+            benchmark_translate(items, blog_items, config(), args.language, args.concurrency, args.verbose)
+        else:
+            print(f"{Fore.RED}[ERROR] Unknown stage: {stage}{Style.RESET_ALL}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+import os
+import re
+import json
+import time
+import argparse
+from colorama import init, Fore, Style
+from dataset_store import DatasetStore
+
+# Spellings of a category that differ by more than case and whitespace
+# (case-insensitive, whitespace collapsed) -> canonical label. Labels that only
+# differ in case or whitespace ("Management " / "management") are grouped
+# under their most common spelling without an entry here.
+ALIASES = {
+    'startup school': 'Startup School',
+}
+
+# Item kinds, in the order their IDs are numbered (the order of search_index.load_documents)
+KINDS = ('video', 'blog')
+
+WHITESPACE = re.compile(r'\s+')
+QUERY_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def clean_label(label):
+    return WHITESPACE.sub(' ', label).strip()
+
+
+def category_key(label):
+    """
+    Key shared by every spelling of a category: whitespace collapsed, case
+    folded and aliases resolved.
+    """
+    key = clean_label(label).casefold()
+    return ALIASES[key].casefold() if key in ALIASES else key
+
+
+class CategoryIndex:
+    """
+    Per-category bitsets over item IDs.
+
+    Item IDs number the videos and then the blog posts in dataset order (the
+    document numbers of search_index and the card positions of
+    client_export). A bitset is a Python int with bit i set when item i has
+    the category, so AND/OR/NOT filters are integer operations and a count
+    is a popcount.
+    """
+
+    def __init__(self, item_count, categories, kinds):
+        self.item_count = item_count
+        self.all = (1 << item_count) - 1
+        self.categories = categories  # canonical label -> bitset
+        self.kinds = kinds            # kind -> bitset
+        self.keys = {category_key(label): label for label in categories}  # one label per key
+
+    @classmethod
+    def build(cls, items):
+        """
+        Labels with the same category_key become one category, spelled as
+        its ALIASES entry or else as the most common spelling in items.
+
+        Args:
+            items: (kind, related_categories) of every item, in ID order
+
+        Returns:
+            CategoryIndex
+        """
+        items = list(items)
+        spellings = {}  # key -> spelling -> count
+        for _, labels in items:
+            for label in labels or []:
+                if label.strip():
+                    counts = spellings.setdefault(category_key(label), {})
+                    counts[clean_label(label)] = counts.get(clean_label(label), 0) + 1
+        canonical = {alias.casefold(): alias for alias in ALIASES.values()}
+        # max() keeps the first spelling seen among equally common ones
+        labels_by_key = {key: canonical.get(key) or max(counts, key=counts.get) for key, counts in spellings.items()}
+
+        categories = {}
+        kinds = {kind: 0 for kind in KINDS}
+        for item_id, (kind, labels) in enumerate(items):
+            bit = 1 << item_id
+            kinds[kind] = kinds.get(kind, 0) | bit
+            for label in labels or []:
+                if label.strip():
+                    category = labels_by_key[category_key(label)]
+                    categories[category] = categories.get(category, 0) | bit
+        return cls(len(items), dict(sorted(categories.items())), kinds)
+
+    @classmethod
+    def from_documents(cls, documents):
+        """
+        Build from search_index.load_documents output (or any dicts with kind and related_categories).
+        """
+        return cls.build((document['kind'], document['related_categories']) for document in documents)
+
+    def to_dict(self):
+        return {
+            'version': 1,
+            'item_count': self.item_count,
+            'kinds': {kind: format(bits, 'x') for kind, bits in self.kinds.items()},
+            'categories': {label: format(bits, 'x') for label, bits in self.categories.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['item_count'],
+                   {label: int(bits, 16) for label, bits in data['categories'].items()},
+                   {kind: int(bits, 16) for kind, bits in data['kinds'].items()})
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def canonical_categories(self, labels):
+        """
+        Returns:
+            list: The canonical spellings of an item's related_categories, without duplicates
+        """
+        return list(dict.fromkeys(self.keys.get(category_key(label), clean_label(label))
+                                  for label in labels or [] if label.strip()))
+
+    def bits(self, label):
+        """
+        Returns:
+            int: Bitset of the items with this category (any spelling or alias of it)
+        """
+        key = category_key(label)
+        if key not in self.keys:
+            raise ValueError(f"Unknown category: {label}")
+        return self.categories[self.keys[key]]
+
+    def select(self, all_of=(), any_of=(), none_of=(), kind=None):
+        """
+        Items that have every category of all_of, at least one of any_of
+        (when given) and none of none_of.
+
+        Returns:
+            int: Bitset of the matching items
+        """
+        bits = self.kinds[kind] if kind else self.all
+        for label in all_of:
+            bits &= self.bits(label)
+        if any_of:
+            union = 0
+            for label in any_of:
+                union |= self.bits(label)
+            bits &= union
+        for label in none_of:
+            bits &= ~self.bits(label)
+        return bits
+
+    def query(self, expression, kind=None):
+        """
+        Evaluate a filter such as `Fundraising AND (Investors OR "Pitch Deck") AND NOT YC`.
+
+        NOT binds tighter than AND, AND tighter than OR. Labels may be quoted
+        or written bare (consecutive words form one label).
+
+        Returns:
+            int: Bitset of the matching items
+        """
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = QUERY_TOKEN.match(expression, position)
+            if not match:
+                raise ValueError(f"Unbalanced quote in category filter: {expression}")
+            position = match.end()
+            opening, closing, quoted, word = match.groups()
+            if opening or closing:
+                tokens.append(opening or closing)
+            elif quoted is not None or word not in OPERATORS:
+                label = quoted if quoted is not None else word
+                # Bare words of one label are joined back together
+                if tokens and isinstance(tokens[-1], tuple) and quoted is None and tokens[-1][1]:
+                    tokens[-1] = (tokens[-1][0] + ' ' + label, True)
+                else:
+                    tokens.append((label, quoted is None))
+            else:
+                tokens.append(word)
+
+        def parse_or(i):
+            bits, i = parse_and(i)
+            while i < len(tokens) and tokens[i] == 'OR':
+                right, i = parse_and(i + 1)
+                bits |= right
+            return bits, i
+
+        def parse_and(i):
+            bits, i = parse_not(i)
+            while i < len(tokens) and tokens[i] == 'AND':
+                right, i = parse_not(i + 1)
+                bits &= right
+            return bits, i
+
+        def parse_not(i):
+            if i < len(tokens) and tokens[i] == 'NOT':
+                bits, i = parse_not(i + 1)
+                return self.all & ~bits, i
+            if i < len(tokens) and tokens[i] == '(':
+                bits, i = parse_or(i + 1)
+                if i >= len(tokens) or tokens[i] != ')':
+                    raise ValueError(f"Missing ) in category filter: {expression}")
+                return bits, i + 1
+            if i < len(tokens) and isinstance(tokens[i], tuple):
+                return self.bits(tokens[i][0]), i + 1
+            raise ValueError(f"Expected a category in filter: {expression}")
+
+        bits, i = parse_or(0)
+        if i != len(tokens):
+            raise ValueError(f"Unexpected {tokens[i] if isinstance(tokens[i], str) else tokens[i][0]!r} "
+                             f"in category filter: {expression}")
+        return bits & self.kinds[kind] if kind else bits
+
+    def counts(self, bits):
+        """
+        Returns:
+            dict: Number of matching items in total and per kind
+        """
+        counts = {'total': bits.bit_count()}
+        for kind, kind_bits in self.kinds.items():
+            counts[kind] = (bits & kind_bits).bit_count()
+        return counts
+
+    def facets(self, bits):
+        """
+        Returns:
+            dict: label -> number of the matching items that have it, for the labels that occur
+        """
+        facets = {}
+        for label, label_bits in self.categories.items():
+            count = (bits & label_bits).bit_count()
+            if count:
+                facets[label] = count
+        return facets
+
+    def ids(self, bits):
+        """
+        Returns:
+            list: IDs of the matching items, ascending
+        """
+        ids = []
+        while bits:
+            low = bits & -bits
+            ids.append(low.bit_length() - 1)
+            bits ^= low
+        return ids
+
+
+def load_items(video_path='video-data-updated.json', blog_path='blog-data.json', store=None):
+    """
+    Returns:
+        list: (kind, item) of every video and then every blog item, in ID order
+    """
+    items = []
+    for kind, path in zip(KINDS, (video_path, blog_path)):
+        if store:
+            items.extend((kind, item) for item in store.iter_items(kind))
+        elif os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                items.extend((kind, item) for item in json.load(f))
+    return items
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='List categories or count the items matching a category filter')
+    parser.add_argument('filter', nargs='?',
+                        help='Filter such as \'Fundraising AND (Investors OR "Pitch Deck") AND NOT YC\'; lists the categories if omitted')
+    parser.add_argument('--kind', choices=KINDS, help='Only count this kind of item')
+    parser.add_argument('--video-data', type=str, default='video-data-updated.json',
+                        help='Video items (default: video-data-updated.json)')
+    parser.add_argument('--blog-data', type=str, default='blog-data.json',
+                        help='Blog items (default: blog-data.json)')
+    parser.add_argument('--db', type=str, help='Read both datasets from this SQLite dataset store')
+    parser.add_argument('--show', action='store_true', help='Print the matching items')
+    args = parser.parse_args()
+
+    store = DatasetStore(args.db) if args.db else None
+    items = load_items(args.video_data, args.blog_data, store)
+    if store:
+        store.close()
+    index = CategoryIndex.build((kind, item.get('related_categories')) for kind, item in items)
+
+    if not args.filter:
+        raw = {label for _, item in items for label in item.get('related_categories') or []}
+        print(f"{Fore.GREEN}[INFO] {len(index.categories)} categories ({len(raw)} raw labels) over "
+              f"{index.item_count} items{Style.RESET_ALL}")
+        for label, count in index.facets(index.all).items():
+            print(f"  {count:4d}  {label}")
+        return
+
+    try:
+        start_time = time.perf_counter()
+        bits = index.query(args.filter, args.kind)
+        counts = index.counts(bits)
+        elapsed = time.perf_counter() - start_time
+    except ValueError as e:
+        print(f"{Fore.RED}[ERROR] {e}{Style.RESET_ALL}")
+        return
+    print(f"{Fore.GREEN}[INFO] {counts['total']} items ({counts['video']} videos, {counts['blog']} blog posts) "
+          f"in {elapsed * 1e6:.0f} µs{Style.RESET_ALL}")
+    if args.show:
+        for item_id in index.ids(bits):
+            kind, item = items[item_id]
+            print(f"  [{kind}] {item.get('name_' + kind)} ({item['page_url']})")
+
+
+if __name__ == '__main__':
+    main()
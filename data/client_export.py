@@ -0,0 +1,229 @@
+import os
+import gzip
+import base64
+import json
+import time
+import hashlib
+import argparse
+from colorama import init, Fore, Style
+from dataset_store import DatasetStore, _atomic_write_path
+from categories import CategoryIndex
+
+try:
+    import brotli
+except ImportError:  # Only the gzip copies are written without it
+    brotli = None
+
+# Where export writes the client data (served as static files)
+DEFAULT_OUTPUT_DIR = 'client-data'
+
+# Hex digits of the content hash in file names
+HASH_LENGTH = 16
+
+# Fields of each kind shown on the library cards; everything else goes to the item shard
+CARD_FIELDS = {
+    'video': ['name_video', 'description_video', 'related_categories', 'page_url', 'youtube_url'],
+    'blog': ['name_blog', 'description_blog', 'authors', 'related_categories', 'page_url'],
+}
+
+# Local-only fields never shipped to the client
+PRIVATE_FIELDS = {'mp3_file'}
+
+
+def encode_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_asset(output_dir, subdir, data):
+    """
+    Write data as <subdir>/<content hash>.json plus .json.gz and .json.br.
+
+    A file that already exists has the same content, so it is left alone and
+    keeps its modification time.
+
+    Returns:
+        dict: path (relative to output_dir) and the byte size of each encoding
+    """
+    name = f"{subdir}/{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.json"
+    path = os.path.join(output_dir, name)
+    encodings = {'raw': (path, lambda: data), 'gzip': (path + '.gz', lambda: gzip.compress(data, 9, mtime=0))}
+    if brotli:
+        encodings['br'] = (path + '.br', lambda: brotli.compress(data, quality=11))
+    sizes = {}
+    for encoding, (encoded_path, encode) in encodings.items():
+        if not os.path.exists(encoded_path):
+            temp_path = _atomic_write_path(encoded_path)
+            with open(temp_path, 'wb') as f:
+                f.write(encode())
+            os.replace(temp_path, encoded_path)
+        sizes[encoding] = os.path.getsize(encoded_path)
+    return {'path': name, 'sizes': sizes}
+
+
+def export_categories(output_dir, category_index):
+    """
+    Write the category bitsets of a card index: for every canonical label the
+    base64 of a little-endian bitmap, bit i set when card i has the label.
+    The client decodes them once and filters with bitwise AND/OR/NOT.
+
+    Returns:
+        dict: The categories asset (path and sizes)
+    """
+    length = (category_index.item_count + 7) // 8
+    return write_asset(output_dir, 'categories', encode_json({
+        'item_count': category_index.item_count,
+        'kinds': {kind: base64.b64encode(bits.to_bytes(length, 'little')).decode('ascii')
+                  for kind, bits in category_index.kinds.items()},
+        'categories': {label: base64.b64encode(bits.to_bytes(length, 'little')).decode('ascii')
+                       for label, bits in category_index.categories.items()},
+        'counts': {label: bits.bit_count() for label, bits in category_index.categories.items()},
+    }))
+
+
+def export_items(output_dir, videos, blogs):
+    """
+    Write the item shards, the card index and the category bitsets of one
+    dataset (source or translation). Categories are written canonical.
+
+    Returns:
+        dict: The card index asset (path and sizes), its item count and categories asset
+    """
+    for subdir in ('items', 'cards', 'categories'):
+        os.makedirs(os.path.join(output_dir, subdir), exist_ok=True)
+    items = [(kind, item) for kind, kind_items in (('video', videos), ('blog', blogs)) for item in kind_items]
+    # Card positions are the item IDs of the category index
+    category_index = CategoryIndex.build((kind, item.get('related_categories')) for kind, item in items)
+    cards = []
+    for kind, item in items:
+        item = {key: value for key, value in item.items() if key not in PRIVATE_FIELDS}
+        if 'related_categories' in item:
+            item['related_categories'] = category_index.canonical_categories(item['related_categories'])
+        shard = write_asset(output_dir, 'items', encode_json(item))
+        card = {'kind': kind}
+        card.update({field: item[field] for field in CARD_FIELDS[kind] if item.get(field) is not None})
+        card['has_content'] = bool(item.get('mp3_content') or (item.get('content') or {}).get('whole_content'))
+        card['shard'] = shard['path']
+        card['sizes'] = shard['sizes']
+        cards.append(card)
+    index = write_asset(output_dir, 'cards', encode_json(cards))
+    index['count'] = len(cards)
+    index['categories'] = export_categories(output_dir, category_index)
+    return index
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def export_client_data(output_dir, videos, blogs, translations=None, prune=False):
+    """
+    Export the datasets for the client library screen.
+
+    Layout of output_dir:
+        manifest.json       card index of every language, to fetch without caching
+        cards/<hash>.json   card index of a language: names, descriptions,
+                            categories and shard sizes of every item
+        categories/<hash>.json  category bitsets over the cards of a language
+        items/<hash>.json   full item, one file per item and language
+
+    Every cards/, categories/ and items/ file has .gz and .br copies and is
+    named by the hash of its content, so it can be cached forever: a new data
+    release only changes the names of the items that changed.
+
+    Args:
+        output_dir (str): Directory served to the client
+        videos (list): Video items
+        blogs (list): Blog items
+        translations (dict): language -> (videos, blogs) of translated items
+        prune (bool): Delete files no language of this export references
+
+    Returns:
+        dict: The manifest
+    """
+    manifest = {
+        'version': 1,
+        'generated_at': time.time(),
+        'encodings': ['br', 'gzip'] if brotli else ['gzip'],
+        'languages': {'source': export_items(output_dir, videos, blogs)},
+    }
+    for language, (translated_videos, translated_blogs) in sorted((translations or {}).items()):
+        manifest['languages'][language] = export_items(output_dir, translated_videos, translated_blogs)
+
+    if prune:
+        referenced = {index['path'] for index in manifest['languages'].values()}
+        referenced.update(index['categories']['path'] for index in manifest['languages'].values())
+        for index in manifest['languages'].values():
+            referenced.update(card['shard'] for card in load_json(os.path.join(output_dir, index['path'])))
+        for subdir in ('items', 'cards', 'categories'):
+            for file_name in os.listdir(os.path.join(output_dir, subdir)):
+                name = subdir + '/' + file_name.split('.json')[0] + '.json'
+                if name not in referenced:
+                    os.remove(os.path.join(output_dir, subdir, file_name))
+
+    # The manifest goes last, so clients never see it before the files it names
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    temp_path = _atomic_write_path(manifest_path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+
+def load_translations(translation_dir):
+    """
+    Returns:
+        dict: language -> (videos, blogs) for each translation/<language>/ directory
+    """
+    translations = {}
+    for language in sorted(os.listdir(translation_dir)):
+        video_path = os.path.join(translation_dir, language, 'video-data.json')
+        blog_path = os.path.join(translation_dir, language, 'blog-data.json')
+        if os.path.exists(video_path) or os.path.exists(blog_path):
+            translations[language] = (
+                load_json(video_path) if os.path.exists(video_path) else [],
+                load_json(blog_path) if os.path.exists(blog_path) else [],
+            )
+    return translations
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Export the datasets as a card index and precompressed item shards for the client')
+    parser.add_argument('--output-dir', type=str, default=DEFAULT_OUTPUT_DIR,
+                        help=f'Directory served to the client (default: {DEFAULT_OUTPUT_DIR})')
+    parser.add_argument('--video-data', type=str, default='video-data-updated.json',
+                        help='Video items (default: video-data-updated.json)')
+    parser.add_argument('--blog-data', type=str, default='blog-data.json',
+                        help='Blog items (default: blog-data.json)')
+    parser.add_argument('--db', type=str, help='Read both datasets from this SQLite dataset store')
+    parser.add_argument('--translation-dir', type=str,
+                        help='Also export every language found in this directory (e.g. ../translation)')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete shards no longer referenced (clients still on the previous manifest lose them)')
+    args = parser.parse_args()
+
+    if not brotli:
+        print(f"{Fore.YELLOW}[WARNING] brotli is not installed; writing gzip copies only{Style.RESET_ALL}")
+    if args.db:
+        store = DatasetStore(args.db)
+        videos = list(store.iter_items('video'))
+        blogs = list(store.iter_items('blog'))
+        store.close()
+    else:
+        videos = load_json(args.video_data)
+        blogs = load_json(args.blog_data)
+    translations = load_translations(args.translation_dir) if args.translation_dir else None
+
+    start_time = time.perf_counter()
+    manifest = export_client_data(args.output_dir, videos, blogs, translations, args.prune)
+    source_bytes = sum(len(encode_json(item)) for item in videos + blogs)
+    for language, index in manifest['languages'].items():
+        sizes = ', '.join(f"{encoding} {size / 1024:.1f} KB" for encoding, size in index['sizes'].items())
+        print(f"{Fore.GREEN}[INFO] {language}: {index['count']} cards in {index['path']} ({sizes}){Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] Exported to {args.output_dir} in {time.perf_counter() - start_time:.1f}s; "
+          f"the full source items are {source_bytes / 1024 / 1024:.2f} MB{Style.RESET_ALL}")
+
+
+if __name__ == '__main__':
+    main()
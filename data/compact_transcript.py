@@ -0,0 +1,233 @@
+import re
+import sys
+import json
+import time
+import base64
+import bisect
+import argparse
+from array import array
+from colorama import init, Fore, Style
+
+# Speaker number of lines that have no "Speaker N:" label (older transcripts)
+NO_SPEAKER = -1
+
+# Marks a time that is not known (transcripts parsed back from text)
+NO_TIME = -1.0
+
+SPEAKER_LINE = re.compile(r"Speaker (\d+): (.*)\Z", re.S)
+
+# Array fields in to_dict(), with their typecodes (fixed sizes: 'I' is 4 bytes
+# on every supported platform, unlike 'L')
+ARRAY_FIELDS = {
+    'start': 'd',
+    'end': 'd',
+    'speaker': 'h',
+    'offset': 'I',
+    'confidence': 'f',
+}
+
+# Version 1 stored offsets as the platform's unsigned long (4 or 8 bytes)
+FORMAT_VERSION = 2
+
+
+def _encode_array(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _decode_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class CompactTranscript:
+    """
+    A transcript as parallel arrays plus one text buffer.
+
+    Utterance i spans text[offset[i]:offset[i + 1]] and has start[i], end[i]
+    (seconds), speaker[i] and confidence[i]. Lookups by time or speaker read
+    the arrays directly, with no parsing of the text, and render() gives back
+    the "Speaker N: text" string stored in mp3_content.
+    """
+
+    def __init__(self, text='', start=None, end=None, speaker=None, offset=None, confidence=None,
+                 final_newline=True):
+        self.text = text
+        self.start = start if start is not None else array('d')
+        self.end = end if end is not None else array('d')
+        self.speaker = speaker if speaker is not None else array('h')
+        self.offset = offset if offset is not None else array('I', [0])
+        self.confidence = confidence if confidence is not None else array('f')
+        self.final_newline = final_newline
+        self._speaker_index = None
+        self._longest = None
+
+    @classmethod
+    def from_utterances(cls, utterances):
+        """
+        Build a transcript from Deepgram utterances.
+
+        Args:
+            utterances (list): Dicts with start, end, speaker, transcript and confidence
+
+        Returns:
+            CompactTranscript
+        """
+        transcript = cls()
+        texts = []
+        position = 0
+        for utterance in utterances:
+            text = utterance.get('transcript', '')
+            texts.append(text)
+            position += len(text)
+            transcript.start.append(float(utterance.get('start', NO_TIME)))
+            transcript.end.append(float(utterance.get('end', NO_TIME)))
+            transcript.speaker.append(int(utterance.get('speaker', 0)))
+            transcript.confidence.append(float(utterance.get('confidence', 0.0)))
+            transcript.offset.append(position)
+        transcript.text = ''.join(texts)
+        return transcript
+
+    @classmethod
+    def from_mp3_content(cls, content):
+        """
+        Parse an existing mp3_content string, one utterance per line.
+
+        Times and confidences are not in the text, so they are set to
+        NO_TIME and 0. render() gives back exactly the same string.
+        """
+        lines = content.split('\n')
+        final_newline = content.endswith('\n')
+        if final_newline:
+            lines.pop()
+        utterances = []
+        for line in lines:
+            match = SPEAKER_LINE.match(line)
+            if match:
+                utterances.append({'speaker': int(match.group(1)), 'transcript': match.group(2)})
+            else:
+                utterances.append({'speaker': NO_SPEAKER, 'transcript': line})
+        transcript = cls.from_utterances(utterances)
+        transcript.final_newline = final_newline
+        return transcript
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON-serialisable form, arrays as base64 little-endian bytes
+        """
+        data = {'version': FORMAT_VERSION, 'text': self.text, 'final_newline': self.final_newline}
+        for name in ARRAY_FIELDS:
+            data[name] = _encode_array(getattr(self, name))
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        arrays = {name: _decode_array(typecode, data[name]) for name, typecode in ARRAY_FIELDS.items()
+                  if name != 'offset'}
+        offsets = base64.b64decode(data['offset'])
+        if data.get('version', 1) == 1 and len(offsets) == 8 * (len(arrays['start']) + 1):
+            # Written where unsigned long is 8 bytes
+            arrays['offset'] = array('I', _decode_array('Q', data['offset']))
+        else:
+            arrays['offset'] = _decode_array('I', data['offset'])
+        return cls(text=data['text'], final_newline=data.get('final_newline', True), **arrays)
+
+    def __len__(self):
+        return len(self.speaker)
+
+    def utterance_text(self, i):
+        return self.text[self.offset[i]:self.offset[i + 1]]
+
+    def utterance(self, i):
+        """
+        Returns:
+            dict: Utterance i in the Deepgram utterance format
+        """
+        return {
+            'start': self.start[i],
+            'end': self.end[i],
+            'speaker': self.speaker[i],
+            'confidence': self.confidence[i],
+            'transcript': self.utterance_text(i),
+        }
+
+    def between(self, start, end):
+        """
+        Indices of the utterances that overlap [start, end) seconds.
+
+        Utterances are in start order but their ends are not (one may outlast
+        the next), so the binary search is on start only: every overlapping
+        utterance starts before end and at most the longest utterance before
+        start. Ends are checked one by one in that range.
+        """
+        if self._longest is None:
+            self._longest = max((e - s for s, e in zip(self.start, self.end)), default=0.0)
+        first = bisect.bisect_left(self.start, start - self._longest)
+        last = bisect.bisect_left(self.start, end)
+        return [i for i in range(first, last) if self.end[i] > start]
+
+    def by_speaker(self, speaker):
+        """
+        Indices of the utterances of one speaker, in order.
+        """
+        if self._speaker_index is None:
+            self._speaker_index = {}
+            for i, label in enumerate(self.speaker):
+                self._speaker_index.setdefault(label, []).append(i)
+        return self._speaker_index.get(speaker, [])
+
+    def render_line(self, i):
+        text = self.utterance_text(i)
+        if self.speaker[i] == NO_SPEAKER:
+            return text
+        return f"Speaker {self.speaker[i]}: {text}"
+
+    def render(self, indices=None):
+        """
+        Render the transcript (or some utterances) in the mp3_content format.
+
+        Args:
+            indices (list): Utterances to include (default: all)
+
+        Returns:
+            str: "Speaker N: text" lines
+        """
+        if indices is None:
+            # The whole transcript keeps the exact ending of the original string
+            content = '\n'.join(self.render_line(i) for i in range(len(self)))
+            return content + '\n' if len(self) and self.final_newline else content
+        return ''.join(self.render_line(i) + '\n' for i in indices)
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Check and measure compact transcripts on a video data file')
+    parser.add_argument('--data', type=str, default='video-data-updated.json',
+                        help='Video data JSON with mp3_content transcripts (default: video-data-updated.json)')
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    contents = [item['mp3_content'] for item in items if item.get('mp3_content')]
+    start_time = time.perf_counter()
+    transcripts = [CompactTranscript.from_mp3_content(content) for content in contents]
+    parse_seconds = time.perf_counter() - start_time
+    identical = sum(1 for content, transcript in zip(contents, transcripts) if transcript.render() == content)
+    round_trip = sum(
+        1 for transcript in transcripts
+        if CompactTranscript.from_dict(json.loads(json.dumps(transcript.to_dict()))).render() == transcript.render()
+    )
+    print(f"{Fore.GREEN}[INFO] {len(contents)} transcripts, {sum(len(t) for t in transcripts)} utterances, "
+          f"parsed in {parse_seconds * 1000:.1f} ms{Style.RESET_ALL}")
+    print(f"{Fore.GREEN if identical == len(contents) else Fore.RED}[INFO] render() identical to mp3_content: "
+          f"{identical}/{len(contents)}, to_dict round trip: {round_trip}/{len(contents)}{Style.RESET_ALL}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,347 @@
+import os
 import json
+import argparse
+from colorama import init, Fore, Style
+from dataset_store import _atomic_write_path
 
-def find_missing_transcriptions():
+# Bytes read at a time when streaming a dataset file
+READ_CHUNK = 1 << 20
+
+# Pipeline stages of each kind, in order: (stage, field that holds its result).
+# An item is listed under the first stage whose field is empty.
+STAGES = {
+    'video': [('url', 'youtube_url'), ('mp3', 'mp3_file'), ('transcript', 'mp3_content')],
+    'blog': [('content', 'whole_content')],
+}
+
+# What to run on each missing-work list, and how to merge its results back into the snapshot
+STAGE_HINTS = {
+    'url': "python get-yc-video.py --input {path} && python control-video-data.py merge {snapshot} {path}",
+    'mp3': "python get-yc-video.py --input {path} && python control-video-data.py merge {snapshot} {path}",
+    'transcript': "python get-yc-video-transcription.py --input {path} && "
+                  "python control-video-data.py merge {snapshot} video-data-missing-gotten.json",
+    'content': "python get-data-blog-content.py",
+    'translation': "python ../translate-data.py --delta --language {language}",
+}
+
+# Text fields longer than this are summarized by length in diffs
+DIFF_TEXT_LIMIT = 200
+
+
+def iter_json_items(path):
+    """
+    Stream the items of a dataset file without loading the whole text.
+
+    Reads a JSON array (the snapshot format) or JSON lines (the journals)
+    a chunk at a time and decodes one item after the other.
+
+    Yields:
+        dict: Items in file order
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        eof = False
+        while True:
+            # Skip the array brackets, separators and whitespace between items
+            while position < len(buffer) and buffer[position] in '[],\r\n\t ':
+                position += 1
+            if position == len(buffer) and eof:
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
+            position = end
+
+
+def index_items(path):
+    """
+    Index a dataset file by page_url.
+
+    Returns:
+        tuple: (dict page_url -> item in file order, number of items without a
+            page_url, number of duplicate page_urls; the last duplicate wins)
+    """
+    items = {}
+    unkeyed = duplicates = 0
+    for item in iter_json_items(path):
+        page_url = item.get('page_url')
+        if not page_url:
+            unkeyed += 1
+            continue
+        if page_url in items:
+            duplicates += 1
+        items[page_url] = item
+    return items, unkeyed, duplicates
+
+
+def load_indexed(path):
+    items, unkeyed, duplicates = index_items(path)
+    print_loaded(path, items, unkeyed, duplicates)
+    return items
+
+
+def print_loaded(path, items, unkeyed, duplicates):
+    message = f"[INFO] Loaded {len(items)} items from {path}"
+    if unkeyed or duplicates:
+        message += f" ({unkeyed} without page_url skipped, {duplicates} duplicate page_urls)"
+    print(f"{Fore.GREEN}{message}{Style.RESET_ALL}")
+
+
+def item_kind(item):
+    return 'blog' if 'name_blog' in item or 'content' in item else 'video'
+
+
+def field_value(item, field):
+    # Blog content fields live under item['content']
+    if field in item:
+        return item[field]
+    return (item.get('content') or {}).get(field)
+
+
+def write_json(path, value):
+    temp_path = _atomic_write_path(path)
     try:
-        # Load the JSON file
-        with open('video-data-updated-5.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Keep track of items without transcription
-        missing_items = []
-        
-        # Go through each item
-        for index, item in enumerate(data):
-            if 'mp3_content' not in item or not item['mp3_content']:
-                missing_items.append({
-                    'index': index,
-                    'name': item.get('name_video', 'Unnamed')
-                })
-        
-        # Print results
-        print(f"\nItems missing transcription:")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def summarize(value):
+    if isinstance(value, str) and len(value) > DIFF_TEXT_LIMIT:
+        return {'chars': len(value)}
+    if isinstance(value, (list, dict)) and len(json.dumps(value, ensure_ascii=False)) > DIFF_TEXT_LIMIT:
+        return {'entries': len(value)}
+    return value
+
+
+def diff_items(old_items, new_items):
+    """
+    Field-level diff of two indexed snapshots.
+
+    Returns:
+        dict: added and removed page_urls, and for each changed page_url the
+            fields that differ as {'old': ..., 'new': ...} (long values summarized)
+    """
+    changed = {}
+    for page_url, new in new_items.items():
+        old = old_items.get(page_url)
+        if old is None or old == new:
+            continue
+        fields = {}
+        for field in dict.fromkeys(list(old) + list(new)):
+            if field == 'content' and isinstance(old.get(field), dict) and isinstance(new.get(field), dict):
+                for key in dict.fromkeys(list(old[field]) + list(new[field])):
+                    if old[field].get(key) != new[field].get(key):
+                        fields[f"content.{key}"] = {'old': summarize(old[field].get(key)),
+                                                     'new': summarize(new[field].get(key))}
+            elif old.get(field) != new.get(field):
+                fields[field] = {'old': summarize(old.get(field)), 'new': summarize(new.get(field))}
+        changed[page_url] = fields
+    return {
+        'added': [page_url for page_url in new_items if page_url not in old_items],
+        'removed': [page_url for page_url in old_items if page_url not in new_items],
+        'changed': changed,
+    }
+
+
+def merge_items(base_items, patch_items, overwrite_empty=False):
+    """
+    Merge a patch snapshot into a base snapshot in place, in one pass over the patch.
+
+    Fields of a patch item replace those of the base item with the same
+    page_url (blog content one key at a time); empty patch values only
+    replace base values with overwrite_empty. Patch items the base does not
+    have are appended.
+
+    Returns:
+        dict: Counts of updated, unchanged and added items
+    """
+    counts = {'updated': 0, 'unchanged': 0, 'added': 0}
+    for page_url, patch in patch_items.items():
+        base = base_items.get(page_url)
+        if base is None:
+            base_items[page_url] = patch
+            counts['added'] += 1
+            continue
+        before = json.dumps(base, sort_keys=True)
+        for field, value in patch.items():
+            if field == 'content' and isinstance(value, dict) and isinstance(base.get(field), dict):
+                for key, content_value in value.items():
+                    if content_value or overwrite_empty:
+                        base[field][key] = content_value
+            elif value or overwrite_empty or field not in base:
+                base[field] = value
+        counts['updated' if json.dumps(base, sort_keys=True) != before else 'unchanged'] += 1
+    return counts
+
+
+def missing_work(items, translations=None):
+    """
+    Group the items by the first pipeline stage they still need.
+
+    Args:
+        items (dict): Indexed snapshot
+        translations (dict): language -> indexed translated snapshot; items
+            with content whose translation lacks it need the translation stage
+
+    Returns:
+        dict: stage (or "translation-<language>") -> list of items, in snapshot order
+    """
+    work = {stage: [] for kind_stages in STAGES.values() for stage, _ in kind_stages}
+    for language in translations or {}:
+        work[f"translation-{language}"] = []
+    for page_url, item in items.items():
+        kind = item_kind(item)
+        for stage, field in STAGES[kind]:
+            if not field_value(item, field):
+                work[stage].append(item)
+                break
+        else:
+            content_field = STAGES[kind][-1][1]
+            for language, translated_items in (translations or {}).items():
+                translated = translated_items.get(page_url)
+                if translated is None or not field_value(translated, content_field):
+                    work[f"translation-{language}"].append(item)
+    return work
+
+
+def load_translations(translation_dir, file_name):
+    """
+    Returns:
+        dict: language -> indexed translation of file_name, for each language directory that has one
+    """
+    translations = {}
+    for language in sorted(os.listdir(translation_dir)):
+        path = os.path.join(translation_dir, language, file_name)
+        if os.path.exists(path):
+            translations[language] = load_indexed(path)
+    return translations
+
+
+def print_status(path, items, work):
+    """
+    Print the completion of every stage, and the items still missing a transcription.
+    """
+    missing_transcripts = [(index, item) for index, item in enumerate(items.values())
+                           if item_kind(item) == 'video' and not item.get('mp3_content')]
+    if missing_transcripts:
+        print(f"\n{Fore.CYAN}Items missing transcription:{Style.RESET_ALL}")
         print("-" * 50)
-        for item in missing_items:
-            print(f"Index {item['index']}: {item['name']}")
-        
-        print(f"\nTotal items missing transcription: {len(missing_items)}")
-        print(f"Total items in dataset: {len(data)}")
-        print(f"Completion percentage: {((len(data) - len(missing_items)) / len(data) * 100):.2f}%")
-        
-    except Exception as e:
-        print(f"Error: {str(e)}")
-
-if __name__ == "__main__":
-    find_missing_transcriptions()
\ No newline at end of file
+        for index, item in missing_transcripts:
+            print(f"Index {index}: {item.get('name_video', 'Unnamed')}")
+    print(f"\n{Fore.CYAN}[INFO] {len(items)} items in {path}{Style.RESET_ALL}")
+    kinds = {item_kind(item) for item in items.values()}
+    for stage, stage_items in work.items():
+        if stage_items or stage.startswith('translation-') or any(stage == name for kind in kinds for name, _ in STAGES[kind]):
+            color = Fore.YELLOW if stage_items else Fore.GREEN
+            print(f"{color}  {stage:<24} {len(stage_items):5d} missing{Style.RESET_ALL}")
+    if items:
+        done = len(items) - len(missing_transcripts)
+        print(f"{Fore.GREEN}[INFO] Completion percentage: {done / len(items) * 100:.2f}%{Style.RESET_ALL}")
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Check, diff and merge dataset snapshots keyed by page_url')
+    subparsers = parser.add_subparsers(dest='action')
+
+    status_parser = subparsers.add_parser('status', help='Count the items each pipeline stage still has to process')
+    missing_parser = subparsers.add_parser('missing', help='Write the items each pipeline stage still has to process')
+    for subparser in (status_parser, missing_parser):
+        subparser.add_argument('snapshot', nargs='?', default='video-data-updated.json',
+                               help='Dataset file (default: video-data-updated.json)')
+        subparser.add_argument('--translation-dir', type=str,
+                               help='Also check the translations in this directory (e.g. ../translation)')
+    missing_parser.add_argument('--output-dir', type=str, default='missing-work',
+                                help='Directory for the missing-<stage>.json lists (default: missing-work)')
+
+    diff_parser = subparsers.add_parser('diff', help='Field-level diff of snapshots against the first one')
+    diff_parser.add_argument('snapshots', nargs='+', help='Base snapshot, then one or more snapshots to compare')
+    diff_parser.add_argument('--output', type=str, help='Write the diff as JSON to this file')
+
+    merge_parser = subparsers.add_parser('merge', help='Merge patch snapshots into a base snapshot')
+    merge_parser.add_argument('base', help='Base snapshot, e.g. video-data-updated.json')
+    merge_parser.add_argument('patches', nargs='+', help='Patches applied in order, e.g. video-data-missing-gotten.json')
+    merge_parser.add_argument('--output', type=str, help='Merged snapshot (default: overwrite the base)')
+    merge_parser.add_argument('--overwrite-empty', action='store_true',
+                              help='Let empty patch values clear the base values')
+    args = parser.parse_args()
+
+    if args.action in (None, 'status', 'missing'):
+        snapshot = getattr(args, 'snapshot', 'video-data-updated.json')
+        items = load_indexed(snapshot)
+        translations = None
+        if getattr(args, 'translation_dir', None):
+            file_name = 'blog-data.json' if any(item_kind(item) == 'blog' for item in items.values()) else 'video-data.json'
+            translations = load_translations(args.translation_dir, file_name)
+        work = missing_work(items, translations)
+        if args.action != 'missing':
+            print_status(snapshot, items, work)
+            return
+        os.makedirs(args.output_dir, exist_ok=True)
+        for stage, stage_items in work.items():
+            path = os.path.join(args.output_dir, f"missing-{stage}.json")
+            if not stage_items:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            write_json(path, stage_items)
+            base_stage, _, language = stage.partition('-')
+            hint = STAGE_HINTS[base_stage].format(path=path, snapshot=snapshot, language=language)
+            print(f"{Fore.YELLOW}[INFO] {len(stage_items)} items need {stage}: {path}\n       run: {hint}{Style.RESET_ALL}")
+        if not any(work.values()):
+            print(f"{Fore.GREEN}[INFO] Nothing left to do for {snapshot}{Style.RESET_ALL}")
+
+    elif args.action == 'diff':
+        if len(args.snapshots) < 2:
+            print(f"{Fore.RED}[ERROR] diff needs a base snapshot and at least one more{Style.RESET_ALL}")
+            return
+        base = load_indexed(args.snapshots[0])
+        diffs = {}
+        for path in args.snapshots[1:]:
+            diff = diff_items(base, load_indexed(path))
+            diffs[path] = diff
+            print(f"{Fore.CYAN}[INFO] {args.snapshots[0]} -> {path}: {len(diff['added'])} added, "
+                  f"{len(diff['removed'])} removed, {len(diff['changed'])} changed{Style.RESET_ALL}")
+            for page_url, fields in diff['changed'].items():
+                print(f"  {page_url}")
+                for field, change in fields.items():
+                    print(f"    {field}: {json.dumps(change['old'], ensure_ascii=False)} -> "
+                          f"{json.dumps(change['new'], ensure_ascii=False)}")
+        if args.output:
+            write_json(args.output, diffs)
+            print(f"{Fore.GREEN}[INFO] Diff written to {args.output}{Style.RESET_ALL}")
+
+    else:
+        base, unkeyed, duplicates = index_items(args.base)
+        print_loaded(args.base, base, unkeyed, duplicates)
+        output = args.output or args.base
+        if (unkeyed or duplicates) and output == args.base:
+            # The merged snapshot only holds keyed items, one per page_url
+            print(f"{Fore.RED}[ERROR] {args.base} has items the merge would drop; "
+                  f"pass --output to write the merge to another file{Style.RESET_ALL}")
+            return
+        for path in args.patches:
+            counts = merge_items(base, load_indexed(path), args.overwrite_empty)
+            print(f"{Fore.CYAN}[INFO] {path}: {counts['updated']} updated, {counts['unchanged']} unchanged, "
+                  f"{counts['added']} added{Style.RESET_ALL}")
+        write_json(output, list(base.values()))
+        print(f"{Fore.GREEN}[INFO] Saved {len(base)} items to {output}{Style.RESET_ALL}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+from colorama import init, Fore, Style
+
+# Default SQLite file holding every dataset snapshot
+DEFAULT_DB_PATH = 'dataset.sqlite'
+
+# Columns stored for each kind of item, in the key order of the JSON files.
+# The pipeline stage that fills each column:
+#   scrape      -> name/description/related_categories/page_url (+ authors for blogs)
+#   get-yc-video.py -> youtube_url, mp3_file
+#   get-yc-video-transcription.py -> mp3_content, mp3_utterances (see compact_transcript.py)
+#   get-data-blog-content.py -> table_of_contents, whole_content
+COLUMNS = {
+    'video': ['name_video', 'description_video', 'related_categories', 'page_url', 'youtube_url', 'mp3_file', 'mp3_content',
+              'mp3_utterances'],
+    'blog': ['name_blog', 'description_blog', 'authors', 'related_categories', 'page_url', 'table_of_contents', 'whole_content'],
+}
+
+# Columns holding lists, stored as JSON text
+JSON_COLUMNS = {'related_categories', 'authors', 'table_of_contents', 'mp3_utterances'}
+
+# Blog columns that live under item['content'] in the JSON files
+CONTENT_COLUMNS = {'table_of_contents', 'whole_content'}
+
+
+def _atomic_write_path(path):
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    return temp_path
+
+
+class DatasetStore:
+    """
+    Indexed SQLite store for the video and blog datasets.
+
+    Each item is one row keyed by page_url, with one column per field, so a
+    pipeline stage can update a single field of a single item instead of
+    rewriting a whole JSON snapshot. Fields that are not known columns are
+    kept in an `extra` JSON column so nothing is lost on a round trip.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for kind, columns in COLUMNS.items():
+            column_sql = ", ".join(
+                f"{column} TEXT PRIMARY KEY" if column == 'page_url' else f"{column} TEXT"
+                for column in columns
+            )
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {kind} ({column_sql}, extra TEXT, position INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_position ON {kind} (position)")
+            # Stores created before a column was added get it now
+            existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({kind})")}
+            for column in columns:
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE {kind} ADD COLUMN {column} TEXT")
+        self.connection.commit()
+
+    def _check_kind(self, kind):
+        if kind not in COLUMNS:
+            raise ValueError(f"Unknown dataset kind: {kind} (expected one of {', '.join(COLUMNS)})")
+
+    def _encode(self, column, value):
+        if value is None:
+            return None
+        if column in JSON_COLUMNS:
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _row_to_item(self, kind, row):
+        columns = COLUMNS[kind]
+        item = {}
+        content = {}
+        for column, value in zip(columns, row):
+            if value is None:
+                continue
+            if column in JSON_COLUMNS:
+                value = json.loads(value)
+            if kind == 'blog' and column in CONTENT_COLUMNS:
+                content[column] = value
+            else:
+                item[column] = value
+        extra = json.loads(row[len(columns)]) if row[len(columns)] else {}
+        # Unknown blog content keys are kept in extra['content']
+        content.update(extra.pop('content', {}) if kind == 'blog' else {})
+        if content:
+            item['content'] = content
+        item.update(extra)
+        return item
+
+    def _item_to_columns(self, kind, item):
+        values = {}
+        extra = {}
+        for key, value in item.items():
+            if key == 'content' and kind == 'blog' and isinstance(value, dict):
+                for content_key, content_value in value.items():
+                    if content_key in CONTENT_COLUMNS:
+                        values[content_key] = content_value
+                    else:
+                        extra.setdefault('content', {})[content_key] = content_value
+            elif key in COLUMNS[kind]:
+                values[key] = value
+            else:
+                extra[key] = value
+        return values, extra
+
+    def upsert(self, kind, item, commit=True):
+        """
+        Insert an item, or update the fields it contains if page_url exists.
+
+        Args:
+            kind (str): "video" or "blog"
+            item (dict): Item in the JSON file format (must have page_url)
+            commit (bool): Commit right away (set False when batching)
+        """
+        self._check_kind(kind)
+        values, extra = self._item_to_columns(kind, item)
+        if not values.get('page_url'):
+            raise ValueError("Item has no page_url")
+        exists = self.connection.execute(
+            f"SELECT extra FROM {kind} WHERE page_url = ?", (values['page_url'],)
+        ).fetchone()
+        if exists:
+            fields = {column: value for column, value in values.items() if column != 'page_url'}
+            if extra:
+                merged_extra = json.loads(exists[0]) if exists[0] else {}
+                merged_extra.update(extra)
+                fields['extra'] = merged_extra
+            self.update_fields(kind, values['page_url'], commit=commit, **fields)
+            return
+
+        position = self.connection.execute(f"SELECT COALESCE(MAX(position) + 1, 0) FROM {kind}").fetchone()[0]
+        columns = list(values) + ['extra', 'position', 'updated_at']
+        params = [self._encode(column, value) for column, value in values.items()]
+        params += [json.dumps(extra, ensure_ascii=False) if extra else None, position, time.time()]
+        self.connection.execute(
+            f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            params
+        )
+        if commit:
+            self.connection.commit()
+
+    def upsert_many(self, kind, items):
+        """
+        Upsert many items in a single transaction.
+
+        Returns:
+            int: Number of items written
+        """
+        count = 0
+        for item in items:
+            self.upsert(kind, item, commit=False)
+            count += 1
+        self.connection.commit()
+        return count
+
+    def update_fields(self, kind, page_url, commit=True, **fields):
+        """
+        Update some fields of one item without touching the others.
+
+        Args:
+            kind (str): "video" or "blog"
+            page_url (str): Key of the item
+            commit (bool): Commit right away (set False when batching)
+            **fields: Column values to set (use extra=dict to replace extra fields)
+
+        Returns:
+            bool: True if the item exists and was updated
+        """
+        self._check_kind(kind)
+        assignments = []
+        params = []
+        for column, value in fields.items():
+            if column == 'extra':
+                params.append(json.dumps(value, ensure_ascii=False) if value else None)
+            elif column in COLUMNS[kind] and column != 'page_url':
+                params.append(self._encode(column, value))
+            else:
+                raise ValueError(f"Unknown {kind} field: {column}")
+            assignments.append(f"{column} = ?")
+        assignments.append("updated_at = ?")
+        params += [time.time(), page_url]
+        cursor = self.connection.execute(
+            f"UPDATE {kind} SET {', '.join(assignments)} WHERE page_url = ?", params
+        )
+        if commit:
+            self.connection.commit()
+        return cursor.rowcount > 0
+
+    def get(self, kind, page_url):
+        """
+        Returns:
+            dict: The item in the JSON file format, or None if it does not exist
+        """
+        self._check_kind(kind)
+        row = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS[kind])}, extra FROM {kind} WHERE page_url = ?", (page_url,)
+        ).fetchone()
+        return self._row_to_item(kind, row) if row else None
+
+    def iter_items(self, kind, missing=None):
+        """
+        Stream items in their original order without loading the whole table.
+
+        Args:
+            kind (str): "video" or "blog"
+            missing (str): Only yield items where this column is NULL or empty
+
+        Yields:
+            dict: Items in the JSON file format
+        """
+        self._check_kind(kind)
+        where = ""
+        if missing is not None:
+            if missing not in COLUMNS[kind]:
+                raise ValueError(f"Unknown {kind} field: {missing}")
+            where = f"WHERE {missing} IS NULL OR {missing} = ''"
+        # A separate cursor so callers can update rows while iterating
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT {', '.join(COLUMNS[kind])}, extra FROM {kind} {where} ORDER BY position")
+        try:
+            for row in cursor:
+                yield self._row_to_item(kind, row)
+        finally:
+            cursor.close()
+
+    def count(self, kind):
+        self._check_kind(kind)
+        return self.connection.execute(f"SELECT COUNT(*) FROM {kind}").fetchone()[0]
+
+    def import_json(self, kind, json_path):
+        """
+        Upsert every item of a JSON snapshot (e.g. video-data-updated.json).
+
+        Returns:
+            int: Number of items imported
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        return self.upsert_many(kind, items)
+
+    def export_json(self, kind, json_path, missing=None):
+        """
+        Write the items to a JSON file in the same format as today's snapshots.
+
+        Items are streamed to a temporary file that replaces json_path at the end.
+
+        Returns:
+            int: Number of items exported
+        """
+        temp_path = _atomic_write_path(json_path)
+        count = 0
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write("[")
+                for item in self.iter_items(kind, missing):
+                    # Same layout as json.dump(items, f, indent=2)
+                    item_json = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                    f.write(("," if count else "") + "\n  " + item_json)
+                    count += 1
+                f.write("\n]" if count else "]")
+            os.replace(temp_path, json_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return count
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Import and export dataset snapshots to and from the SQLite store')
+    parser.add_argument('action', choices=['import', 'export', 'count'],
+                        help='import a JSON file, export to a JSON file, or count the items')
+    parser.add_argument('kind', choices=list(COLUMNS), help='Dataset kind')
+    parser.add_argument('json_path', nargs='?', help='JSON file to import or export')
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH,
+                        help=f'SQLite dataset store (default: {DEFAULT_DB_PATH})')
+    parser.add_argument('--missing', type=str,
+                        help='When exporting, only include items where this field is empty')
+    args = parser.parse_args()
+
+    store = DatasetStore(args.db)
+    try:
+        if args.action == 'count':
+            print(f"{Fore.GREEN}[INFO] {store.count(args.kind)} {args.kind} items in {args.db}{Style.RESET_ALL}")
+        elif not args.json_path:
+            print(f"{Fore.RED}[ERROR] A JSON file is required for {args.action}{Style.RESET_ALL}")
+        elif args.action == 'import':
+            count = store.import_json(args.kind, args.json_path)
+            print(f"{Fore.GREEN}[INFO] Imported {count} {args.kind} items from {args.json_path} into {args.db}{Style.RESET_ALL}")
+        else:
+            count = store.export_json(args.kind, args.json_path, args.missing)
+            print(f"{Fore.GREEN}[INFO] Exported {count} {args.kind} items from {args.db} to {args.json_path}{Style.RESET_ALL}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
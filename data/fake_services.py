@@ -0,0 +1,282 @@
+import os
+import re
+import hashlib
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from colorama import init, Fore, Style
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default of 5 drops connections from concurrent clients
+
+
+class FakeServiceConfig:
+    """
+    Behaviour of a fake server.
+
+    Args:
+        latency (float): Base response time in seconds
+        jitter (float): Random extra latency, as a fraction of latency
+        seconds_per_kb (float): Extra latency per KB of request body (or page)
+        error_rate (float): Fraction of requests answered with HTTP 500
+        requests_per_second (float): Rate limit; requests over it get HTTP 429
+        seed (int): Seed for the error and jitter randomness
+    """
+
+    def __init__(self, latency=0.05, jitter=0.5, seconds_per_kb=0.0, error_rate=0.0,
+                 requests_per_second=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_kb = seconds_per_kb
+        self.error_rate = error_rate
+        self.requests_per_second = requests_per_second
+        self.seed = seed
+
+
+class FakeService:
+    """
+    Local HTTP server standing in for an external API.
+
+    Subclasses implement respond(method, path, body, headers) -> (status, content_type,
+    body) or (status, content_type, body, response_headers).
+    Latency, errors and rate limiting from the config are applied to every
+    request, and the server counts what it answered so a benchmark can
+    report retries.
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or FakeServiceConfig()
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'errors': 0}
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                service.handle(self, b'')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                service.handle(self, self.rfile.read(length))
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = _Server((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _admit(self):
+        # Returns (status to fail the request with or None, jitter factor)
+        config = self.config
+        with self.lock:
+            self.stats['requests'] += 1
+            if config.requests_per_second:
+                now = time.monotonic()
+                if now - self.window_start >= 1.0:
+                    self.window_start, self.window_count = now, 0
+                if self.window_count >= config.requests_per_second:
+                    self.stats['throttled'] += 1
+                    return 429, 0.0
+                self.window_count += 1
+            if config.error_rate and self.random.random() < config.error_rate:
+                self.stats['errors'] += 1
+                return 500, 0.0
+            return None, self.random.random() * config.jitter
+
+    def handle(self, handler, body):
+        failure, jitter = self._admit()
+        if failure:
+            time.sleep(self.config.latency / 10)
+            payload = json.dumps({'error': {'message': 'Rate limit exceeded' if failure == 429 else 'Internal error'}}).encode()
+            self._send(handler, failure, 'application/json', payload, {'Retry-After': '1'} if failure == 429 else None)
+            return
+        status, content_type, payload, *headers = self.respond(handler.command, handler.path, body, handler.headers)
+        size_kb = max(len(body), len(payload)) / 1024
+        time.sleep(self.config.latency * (1 + jitter) + self.config.seconds_per_kb * size_kb)
+        with self.lock:
+            self.stats['ok' if status < 400 else 'errors'] += 1
+        self._send(handler, status, content_type, payload, headers[0] if headers else None)
+
+    def _send(self, handler, status, content_type, payload, headers=None):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def respond(self, method, path, body, headers):
+        raise NotImplementedError
+
+
+class FakeOpenAI(FakeService):
+    """
+    OpenAI-compatible /v1/chat/completions endpoint.
+
+    The "translation" is the source text prefixed with the target language,
+    and JSON-array (packed) requests are answered with an array of the same
+    length, so every client code path can be exercised.
+    """
+
+    def respond(self, method, path, body, headers):
+        if method != 'POST' or not path.rstrip('/').endswith('/chat/completions'):
+            return 404, 'application/json', b'{"error": {"message": "Not found"}}'
+        request = json.loads(body or b'{}')
+        messages = request.get('messages', [])
+        system = messages[0]['content'] if messages else ''
+        text = messages[-1]['content'] if messages else ''
+        language = re.search(r'into (\w+)', system)
+        prefix = f"[{language.group(1) if language else 'translated'}] "
+        if 'JSON array' in system:
+            content = json.dumps([prefix + item for item in json.loads(text)], ensure_ascii=False)
+        else:
+            content = prefix + text.split('\n\n', 1)[-1]
+        prompt_tokens = sum(len(message['content']) for message in messages) // 4
+        completion_tokens = len(content) // 4
+        response = {
+            'id': f"chatcmpl-fake-{self.stats['requests']}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }
+        return 200, 'application/json', json.dumps(response, ensure_ascii=False).encode()
+
+
+class FakeDeepgram(FakeService):
+    """
+    Deepgram-compatible /v1/listen (prerecorded) endpoint.
+
+    Returns diarized utterances, one per ~BYTES_PER_UTTERANCE bytes of audio,
+    alternating between two speakers.
+    """
+
+    BYTES_PER_UTTERANCE = 16000
+
+    def respond(self, method, path, body, headers):
+        if method != 'POST' or not path.startswith('/v1/listen'):
+            return 404, 'application/json', b'{"error": "Not found"}'
+        count = max(1, min(500, len(body) // self.BYTES_PER_UTTERANCE))
+        utterances = [
+            {'start': i * 5.0, 'end': i * 5.0 + 4.5, 'confidence': 0.99, 'channel': 0,
+             'transcript': f"Utterance {i} of a fake transcript.", 'speaker': i % 2, 'id': f"utt-{i}"}
+            for i in range(count)
+        ]
+        response = {
+            'metadata': {'request_id': f"fake-{self.stats['requests']}", 'duration': count * 5.0, 'channels': 1},
+            'results': {
+                'channels': [{'alternatives': [{'transcript': ' '.join(u['transcript'] for u in utterances), 'confidence': 0.99}]}],
+                'utterances': utterances,
+            },
+        }
+        return 200, 'application/json', json.dumps(response).encode()
+
+
+class FakeYCPages(FakeService):
+    """
+    Static server for YC library pages.
+
+    A page is served from fixtures_dir/<last part of page_url>.html when that
+    file exists. Otherwise a page is generated with a YouTube iframe, except
+    for a `no_embed_rate` fraction of pages that, like the real site, only
+    load their player with JavaScript.
+
+    Pages carry an ETag and answer a matching If-None-Match with 304, like
+    the real site's CDN.
+    """
+
+    def __init__(self, page_urls, fixtures_dir=None, no_embed_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+        self.pages = {}
+        for i, page_url in enumerate(page_urls):
+            video_id = f"fake{i:07d}"
+            if self.random.random() < no_embed_rate:
+                self.pages[page_url] = f"<html><body><h1>{page_url}</h1><div id='player'></div></body></html>"
+            else:
+                self.pages[page_url] = (
+                    f"<html><body><h1>{page_url}</h1>"
+                    f"<iframe src='https://www.youtube.com/embed/{video_id}?rel=0'></iframe></body></html>"
+                )
+
+    def respond(self, method, path, body, headers):
+        page_url = path.split('?')[0]
+        page = None
+        if self.fixtures_dir:
+            fixture = os.path.join(self.fixtures_dir, os.path.basename(page_url.rstrip('/')) + '.html')
+            if os.path.exists(fixture):
+                with open(fixture, 'rb') as f:
+                    page = f.read()
+        if page is None and page_url in self.pages:
+            page = self.pages[page_url].encode()
+        if page is None:
+            return 404, 'text/html', b'<html><body>Not found</body></html>'
+        etag = '"' + hashlib.sha1(page).hexdigest() + '"'
+        if headers.get('If-None-Match') == etag:
+            return 304, 'text/html; charset=utf-8', b'', {'ETag': etag}
+        return 200, 'text/html; charset=utf-8', page, {'ETag': etag}
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Run local stand-ins for OpenAI, Deepgram and the YC library pages')
+    parser.add_argument('--data', type=str, default='yc-video-data.json',
+                        help='Video items whose page_url are served (default: yc-video-data.json)')
+    parser.add_argument('--fixtures', type=str, help='Directory of saved <slug>.html pages')
+    parser.add_argument('--latency', type=float, default=0.05, help='Base latency in seconds (default: 0.05)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 500 responses (default: 0)')
+    parser.add_argument('--rps', type=float, help='Requests per second before answering HTTP 429')
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(latency=args.latency, error_rate=args.error_rate, requests_per_second=args.rps)
+    with open(args.data, 'r', encoding='utf-8') as f:
+        page_urls = [item['page_url'] for item in json.load(f) if item.get('page_url')]
+    services = {
+        'OPENAI_BASE_URL': (FakeOpenAI(config=config).start(), '/v1'),
+        'DEEPGRAM_API_URL': (FakeDeepgram(config=config).start(), '/v1'),
+        'YC_BASE_URL': (FakeYCPages(page_urls, args.fixtures, config=config).start(), ''),
+    }
+    print(f"{Fore.GREEN}[INFO] Fake services running; export these to use them:{Style.RESET_ALL}")
+    for variable, (service, suffix) in services.items():
+        print(f"  export {variable}={service.url}{suffix}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for service, _ in services.values():
+            service.stop()
+
+
+if __name__ == '__main__':
+    main()
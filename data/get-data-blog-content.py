@@ -1,98 +1,474 @@
+import os
 import json
 import time
+import argparse
+import threading
+import requests
+import lxml.html
+import lxml.etree
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from termcolor import colored
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
+from dataset_store import DatasetStore
+from page_cache import PageCache, DEFAULT_CACHE_PATH as DEFAULT_PAGE_CACHE_PATH
 
-def scrape_yc_blog_data(input_json='tc-blog-data.json', output_json='yc-blog-data-extracted.json'):
-    print(colored(f"Starting scrape_yc_blog_data with input: {input_json}", "blue"))
-    
-    # 1. Read original JSON data
-    with open(input_json, 'r', encoding='utf-8') as f:
-        blog_data = json.load(f)
-    print(colored(f"Loaded {len(blog_data)} items from {input_json}", "green"))
+# Static fetch settings
+HTTP_WORKERS = 8
+HTTP_TIMEOUT = (5, 20)  # (connect, read) seconds
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; ochtarcus-scraper)"}
 
-    # 2. Set up Selenium (example: using Chrome in headless mode)
+# Headless browsers for pages whose content is not in the static HTML
+BROWSER_WORKERS = 2
+PAGE_READY_TIMEOUT = 10  # Seconds to wait for div.prose instead of a fixed sleep
+
+
+def _has_class(name):
+    # XPath for "the class attribute contains this class", like the CSS .name selector
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+TOC_XPATH = f"(//details)[1]//li[{_has_class('pl-3')}]"
+TITLE_XPATH = f"(//h1[{_has_class('ycdc-page-title')}])[1]"
+CONTENT_XPATH = f"(//div[{_has_class('prose')}])[1]"
+# Text nodes as BeautifulSoup's get_text() sees them (no script/style/template code)
+TEXT_XPATH = "descendant::text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+
+
+def _element_text(element, separator=''):
+    # Same as BeautifulSoup's get_text(separator, strip=True)
+    texts = (text.strip() for text in element.xpath(TEXT_XPATH))
+    return separator.join(text for text in texts if text)
+
+
+def extract_blog_content(html):
+    """
+    Extract the title, table of contents and text of a YC blog page with lxml.
+
+    A pure function of the page HTML, so it can run on saved pages (see
+    --benchmark). Gives the same result as extract_blog_content_bs4.
+
+    Args:
+        html (str): Page HTML
+
+    Returns:
+        dict: title, table_of_contents and whole_content
+    """
+    try:
+        tree = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except lxml.etree.ParserError:  # Empty document
+        return {"title": "", "table_of_contents": [], "whole_content": ""}
+
+    table_of_contents = [text for text in (_element_text(li) for li in tree.xpath(TOC_XPATH)) if text]
+    title = tree.xpath(TITLE_XPATH)
+    content = tree.xpath(CONTENT_XPATH)
+    return {
+        "title": _element_text(title[0]) if title else "",
+        "table_of_contents": table_of_contents,
+        "whole_content": _element_text(content[0], "\n") if content else "",
+    }
+
+
+def extract_blog_content_bs4(html):
+    """
+    The original BeautifulSoup (html.parser) extractor, kept as the reference
+    for extract_blog_content.
+
+    Returns:
+        dict: title, table_of_contents and whole_content
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # A) Extract Table of Contents (if it exists)
+    table_of_contents_list = []
+    details_toc = soup.find('details')
+    if details_toc:
+        li_tags = details_toc.select('li.pl-3')
+        for li in li_tags:
+            toc_text = li.get_text(strip=True)
+            if toc_text:
+                table_of_contents_list.append(toc_text)
+
+    # B) Extract the Title
+    title_el = soup.find('h1', class_='ycdc-page-title')
+    title_text = title_el.get_text(strip=True) if title_el else ""
+
+    # C) Extract the main blog text
+    main_content_el = soup.select_one('div.prose')
+    whole_content_text = main_content_el.get_text("\n", strip=True) if main_content_el else ""
+
+    return {"title": title_text, "table_of_contents": table_of_contents_list, "whole_content": whole_content_text}
+
+
+def create_http_session(pool_size):
+    """
+    Create a requests session with a keep-alive connection pool sized for
+    `pool_size` concurrent workers, retrying transient server errors.
+    """
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+
+def fetch_static(session, url):
+    """
+    Fetch a page without a browser.
+
+    Returns:
+        str: The page HTML, or None if the request failed
+    """
+    try:
+        response = session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(colored(f"Static fetch failed for {url}: {e}", "yellow"))
+        return None
+    if response.status_code != 200:
+        print(colored(f"Static fetch of {url} returned HTTP {response.status_code}", "yellow"))
+        return None
+    return response.text
+
+
+def fetch_static_cached(session, page_cache, url, has_content):
+    """
+    Fetch a page conditionally through the page cache.
+
+    The new fingerprint is deferred until the caller commits it after the
+    page's content is saved, so a page whose extraction failed is fetched in
+    full again next time.
+
+    Returns:
+        tuple: (state, html) as PageCache.fetch; the page is fetched in full
+            when it is unchanged but there is no earlier content to keep
+    """
+    state, html = page_cache.fetch(session, url, timeout=HTTP_TIMEOUT, defer=True)
+    if state == 'unchanged' and html is None and not has_content:
+        state, html = page_cache.fetch(session, url, timeout=HTTP_TIMEOUT, conditional=False, defer=True)
+    return state, html
+
+
+def create_chrome_driver():
     chrome_options = Options()
     chrome_options.add_argument("--headless")  # run browser headless (no UI)
-    # If needed, specify the path to your chromedriver with executable_path:
-    # driver = webdriver.Chrome(options=chrome_options, executable_path='/path/to/chromedriver')
-    driver = webdriver.Chrome(options=chrome_options)
-    print(colored("Initialized Chrome driver in headless mode", "green"))
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=chrome_options)
 
-    for i, item in enumerate(blog_data):
-        url = item.get("page_url")
-        if not url:
-            print(colored(f"Skipping item {i} - no URL found", "yellow"))
-            continue
 
+class BrowserPool:
+    """
+    Headless Chrome drivers for the pages the static fetch could not read.
+
+    Each worker thread keeps one driver for all its pages. Drivers are only
+    started when a page is submitted, and one that fails is replaced.
+    """
+
+    def __init__(self, size):
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='browser')
+        self.local = threading.local()
+        self.drivers = []
+        self.lock = threading.Lock()
+
+    def _get_driver(self):
+        driver = getattr(self.local, 'driver', None)
+        if driver is None:
+            driver = create_chrome_driver()
+            self.local.driver = driver
+            with self.lock:
+                self.drivers.append(driver)
+            print(colored(f"Started Chrome driver for {threading.current_thread().name}", "green"))
+        return driver
+
+    def _recycle_driver(self):
+        driver, self.local.driver = getattr(self.local, 'driver', None), None
+        if driver is None:
+            return
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
         try:
-            print(colored(f"Processing URL ({i+1}/{len(blog_data)}): {url}", "blue"))
-            
-            # 3. Open the page URL with Selenium
+            driver.quit()
+        except Exception:
+            pass
+
+    def fetch(self, url):
+        """
+        Load a page and return its rendered HTML (None on a browser error).
+        """
+        try:
+            driver = self._get_driver()
             driver.get(url)
+            try:
+                WebDriverWait(driver, PAGE_READY_TIMEOUT).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.prose"))
+                )
+            except TimeoutException:
+                print(colored(f"No div.prose on {url} after {PAGE_READY_TIMEOUT}s", "yellow"))
+            return driver.page_source
+        except Exception as e:
+            print(colored(f"Browser error on {url}, recycling driver: {e}", "red"))
+            self._recycle_driver()
+            return None
 
-            # Wait a bit for dynamic content to load, if needed
-            time.sleep(2)
-
-            # 4. Parse the page source with BeautifulSoup
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-            # A) Extract Table of Contents (if it exists)
-            table_of_contents_list = []
-            details_toc = soup.find('details')
-            if details_toc:
-                li_tags = details_toc.select('li.pl-3')
-                for li in li_tags:
-                    toc_text = li.get_text(strip=True)
-                    if toc_text:
-                        table_of_contents_list.append(toc_text)
-            print(colored(f"Found {len(table_of_contents_list)} TOC items", "green"))
-
-            # B) Extract the Title
-            title_el = soup.find('h1', class_='ycdc-page-title')
-            title_text = title_el.get_text(strip=True) if title_el else ""
-            print(colored(f"Extracted title: {title_text[:50]}...", "green"))
-
-            # C) Extract the main blog text
-            main_content_el = soup.select_one('div.prose')
-            whole_content_text = main_content_el.get_text("\n", strip=True) if main_content_el else ""
-            print(colored(f"Extracted content length: {len(whole_content_text)} chars", "green"))
-
-            # D) Update item with content and save immediately
-            item["content"] = {
-                "table_of_contents": table_of_contents_list,
-                "whole_content": whole_content_text
-            }
-            
-            # Save after each successful item extraction
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(blog_data, f, indent=2, ensure_ascii=False)
-            print(colored(f"Saved progress after processing item {i+1}", "green"))
+    def submit(self, url):
+        return self.executor.submit(self.fetch, url)
 
-        except Exception as e:
-            print(colored(f"Error scraping {url}: {e}", "red"))
-            item["content"] = {
-                "table_of_contents": [],
-                "whole_content": ""
-            }
-            # Save even after errors to preserve progress
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            drivers, self.drivers = self.drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def html_path(html_dir, url):
+    return os.path.join(html_dir, os.path.basename(url.rstrip('/')) + '.html')
+
+
+def progress_path(output_json):
+    # One JSON line per scraped page, appended as pages finish
+    return os.path.splitext(output_json)[0] + '.progress.jsonl'
+
+
+def load_progress(output_json):
+    """
+    Returns:
+        dict: page_url -> content of the pages an earlier run scraped successfully
+    """
+    done = {}
+    path = progress_path(output_json)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Line cut short by an interrupted run
+                # Pages that failed (files written before failures were left out) are scraped again
+                if entry.get("content", {}).get("whole_content"):
+                    done[entry["page_url"]] = entry["content"]
+    return done
+
+
+def scrape_yc_blog_data(input_json='tc-blog-data.json', output_json='yc-blog-data-extracted.json', store=None,
+                        http_workers=HTTP_WORKERS, browser_workers=BROWSER_WORKERS, html_dir=None, resume=False,
+                        page_cache=None):
+    """
+    Scrape the content of every blog page.
+
+    All pages are fetched concurrently without a browser first. Pages whose
+    static HTML has no div.prose text are loaded in a pool of headless
+    browsers. Results are written as each page finishes: one row update in
+    the store, or one line in the progress file with output_json written
+    once at the end.
+
+    With a page cache, pages are fetched with conditional requests and the
+    unchanged ones keep the content of the earlier run without being parsed.
+
+    Args:
+        input_json (str): Blog items
+        output_json (str): Where the items with their content are written
+        store (DatasetStore): Read from and write to this store instead of the JSON files
+        http_workers (int): Concurrent static fetches
+        browser_workers (int): Headless browsers
+        html_dir (str): Save every page's HTML here (for offline --benchmark runs)
+        resume (bool): Skip pages already in the progress file of an earlier run
+        page_cache (PageCache): Fingerprints of the pages from earlier runs
+    """
+    print(colored(f"Starting scrape_yc_blog_data with input: {store.path if store else input_json}", "blue"))
+
+    # 1. Read original JSON data (or the blog rows of the dataset store)
+    if store:
+        blog_data = list(store.iter_items('blog'))
+    else:
+        with open(input_json, 'r', encoding='utf-8') as f:
+            blog_data = json.load(f)
+    print(colored(f"Loaded {len(blog_data)} items from {store.path if store else input_json}", "green"))
+    if html_dir:
+        os.makedirs(html_dir, exist_ok=True)
+
+    done = load_progress(output_json) if resume and not store else {}
+    if page_cache and not store and os.path.exists(output_json):
+        # Content of the earlier run, kept for the pages that did not change
+        with open(output_json, 'r', encoding='utf-8') as f:
+            previous = {item["page_url"]: item["content"] for item in json.load(f) if item.get("content")}
+        for item in blog_data:
+            if item.get("page_url") in previous:
+                item.setdefault("content", previous[item["page_url"]])
+    items = []
+    for i, item in enumerate(blog_data):
+        if not item.get("page_url"):
+            print(colored(f"Skipping item {i} - no URL found", "yellow"))
+        elif item["page_url"] in done:
+            item["content"] = done[item["page_url"]]
+        else:
+            items.append(item)
+    if done:
+        print(colored(f"Resuming: {len(blog_data) - len(items)} items already scraped", "green"))
+
+    stats = {'static': 0, 'browser': 0, 'unchanged': 0, 'failed': 0}
+    start_time = time.perf_counter()
+    session = create_http_session(http_workers)
+    http_executor = ThreadPoolExecutor(max_workers=http_workers, thread_name_prefix='static')
+    browser_pool = None
+    progress = None if store else open(progress_path(output_json), 'a' if resume else 'w', encoding='utf-8')
+
+    def save(item, html, content, tier):
+        if not (content and content["whole_content"]):
+            stats['failed'] += 1
+            print(colored(f"[{sum(stats.values())}/{len(items)}] Error scraping {item['page_url']}: no content", "red"))
+            # Content of an earlier scrape is kept; a failure is retried on the next run
+            item.setdefault("content", {"table_of_contents": [], "whole_content": ""})
+            return
+        stats[tier] += 1
+        print(colored(f"[{sum(stats.values())}/{len(items)}] {tier}: {content['title'][:50]} - "
+                      f"{len(content['table_of_contents'])} TOC items, "
+                      f"{len(content['whole_content'])} chars", "green"))
+        if html_dir:
+            with open(html_path(html_dir, item["page_url"]), 'w', encoding='utf-8') as f:
+                f.write(html)
+        item["content"] = {
+            "table_of_contents": content["table_of_contents"],
+            "whole_content": content["whole_content"],
+        }
+        # Only this item is written, so saving stays cheap as the output grows
+        if store:
+            store.update_fields('blog', item['page_url'], **item["content"])
+        else:
+            progress.write(json.dumps({"page_url": item["page_url"], "content": item["content"]}, ensure_ascii=False) + "\n")
+            progress.flush()
+        if page_cache:
+            page_cache.commit(item["page_url"])
+
+    try:
+        pending = {}
+        for item in items:
+            if page_cache:
+                has_content = bool(item.get("content", {}).get("whole_content"))
+                future = http_executor.submit(fetch_static_cached, session, page_cache, item["page_url"], has_content)
+            else:
+                future = http_executor.submit(fetch_static, session, item["page_url"])
+            pending[future] = (item, 'static')
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item, tier = pending.pop(future)
+                html = future.result()
+                if page_cache and tier == 'static':
+                    state, html = html
+                    if state == 'unchanged' and item.get("content", {}).get("whole_content"):
+                        stats['unchanged'] += 1
+                        page_cache.commit(item["page_url"])
+                        continue
+                content = extract_blog_content(html) if html else None
+                if tier == 'static' and not (content and content["whole_content"]):
+                    # The content is rendered by JavaScript (or the fetch failed): use a browser
+                    if browser_pool is None:
+                        browser_pool = BrowserPool(browser_workers)
+                    pending[browser_pool.submit(item["page_url"])] = (item, 'browser')
+                    continue
+                save(item, html, content, tier)
+    finally:
+        http_executor.shutdown(wait=True)
+        session.close()
+        if browser_pool is not None:
+            browser_pool.close()
+            print(colored("Closed Chrome drivers", "green"))
+        if progress is not None:
+            progress.close()
             with open(output_json, 'w', encoding='utf-8') as f:
                 json.dump(blog_data, f, indent=2, ensure_ascii=False)
-            print(colored(f"Saved progress after error on item {i+1}", "yellow"))
 
-    # 5. Close the Selenium driver
-    driver.quit()
-    print(colored("Closed Chrome driver", "green"))
+    elapsed = time.perf_counter() - start_time
+    print(colored(f"Scraped {len(items)} pages in {elapsed:.1f}s: {stats['static']} static, "
+                  f"{stats['browser']} with a browser, {stats['unchanged']} unchanged, {stats['failed']} failed", "green"))
+    print(colored(f"Successfully completed data extraction to {store.path if store else output_json}", "green"))
 
-    print(colored(f"Successfully completed data extraction to {output_json}", "green"))
+
+def benchmark_extractors(html_dir, repeat=3):
+    """
+    Time extract_blog_content against the BeautifulSoup extractor on saved
+    pages and check that they agree.
+    """
+    pages = []
+    for name in sorted(os.listdir(html_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(html_dir, name), 'r', encoding='utf-8') as f:
+                pages.append((name, f.read()))
+    if not pages:
+        print(colored(f"No .html files in {html_dir}", "red"))
+        return
+
+    results = {}
+    for label, extractor in (("lxml", extract_blog_content), ("bs4 html.parser", extract_blog_content_bs4)):
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            results[label] = [extractor(html) for _, html in pages]
+        elapsed = (time.perf_counter() - start_time) / repeat
+        print(colored(f"{label:<16} {len(pages)} pages in {elapsed * 1000:.0f} ms = "
+                      f"{len(pages) / elapsed:.0f} pages/s", "green"))
+
+    mismatches = [name for (name, _), a, b in zip(pages, results["lxml"], results["bs4 html.parser"]) if a != b]
+    for name in mismatches:
+        print(colored(f"Extractors differ on {name}", "red"))
+    print(colored(f"Identical results on {len(pages) - len(mismatches)}/{len(pages)} pages",
+                  "green" if not mismatches else "red"))
 
 
 if __name__ == "__main__":
-    print(colored("Starting blog content extraction script", "blue"))
-    scrape_yc_blog_data(
-        input_json='tc-blog-data.json',
-        output_json='yc-blog-data-extracted.json'
-    )
-    print(colored("Finished blog content extraction script", "blue"))
+    parser = argparse.ArgumentParser(description='Scrape the content of the YC blog pages')
+    parser.add_argument('--db', type=str,
+                        help='Read blog items from and save their content to this SQLite dataset store')
+    parser.add_argument('--http-workers', type=int, default=HTTP_WORKERS,
+                        help=f'Concurrent static page fetches (default: {HTTP_WORKERS})')
+    parser.add_argument('--browser-workers', type=int, default=BROWSER_WORKERS,
+                        help=f'Headless browsers for pages without static content (default: {BROWSER_WORKERS})')
+    parser.add_argument('--html-dir', type=str, help='Save the HTML of every scraped page in this directory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip pages already scraped by an interrupted run (JSON output only)')
+    parser.add_argument('--page-cache', type=str, default=DEFAULT_PAGE_CACHE_PATH,
+                        help=f'ETag/Last-Modified/content hash cache of the pages (default: {DEFAULT_PAGE_CACHE_PATH})')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='Fetch and parse every page in full')
+    parser.add_argument('--changes', type=str, default='blog-page-changes.json',
+                        help='Where the new/changed/unchanged page summary is written (default: blog-page-changes.json)')
+    parser.add_argument('--benchmark', type=str, metavar='HTML_DIR',
+                        help='Benchmark the extractors on saved pages instead of scraping')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_extractors(args.benchmark)
+    else:
+        print(colored("Starting blog content extraction script", "blue"))
+        store = DatasetStore(args.db) if args.db else None
+        page_cache = None if args.no_page_cache else PageCache(args.page_cache)
+        scrape_yc_blog_data(
+            input_json='tc-blog-data.json',
+            output_json='yc-blog-data-extracted.json',
+            store=store,
+            http_workers=args.http_workers,
+            browser_workers=args.browser_workers,
+            html_dir=args.html_dir,
+            resume=args.resume,
+            page_cache=page_cache
+        )
+        if page_cache:
+            page_cache.print_summary('blog pages')
+            page_cache.write_summary(args.changes)
+            page_cache.close()
+        if store:
+            store.close()
+        print(colored("Finished blog content extraction script", "blue"))
@@ -3,10 +3,19 @@ import os
 import time
 import asyncio
 import math
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from colorama import init, Fore, Style
 from deepgram import Deepgram
 from dotenv import load_dotenv
 from pydub import AudioSegment
+from pydub.silence import detect_silence
+from pydub.utils import mediainfo
+from dataset_store import DatasetStore
+from audio_preprocess import preprocess_job, map_utterances, print_savings, print_totals
+from compact_transcript import CompactTranscript
+from transcription_cache import TranscriptionCache, DEFAULT_CACHE_PATH, hash_audio_file, make_cache_key
 
 # Initialize colorama for colored output
 init()
@@ -20,60 +29,401 @@ if not DEEPGRAM_API_KEY:
     print(f"{Fore.RED}[ERROR] DEEPGRAM_API_KEY not found in environment variables. Please set it first.{Style.RESET_ALL}")
     exit(1)
 
+# Deepgram endpoint, overridable to point at a local fake server
+DEEPGRAM_API_URL = os.getenv('DEEPGRAM_API_URL')
+
+def create_deepgram_client(api_url=None):
+    """
+    Create the Deepgram client, optionally for another API URL (no trailing slash).
+    """
+    if api_url:
+        return Deepgram({'api_key': DEEPGRAM_API_KEY, 'api_url': api_url})
+    return Deepgram(DEEPGRAM_API_KEY)
+
 # Initialize Deepgram client
-deepgram = Deepgram(DEEPGRAM_API_KEY)
+deepgram = create_deepgram_client(DEEPGRAM_API_URL)
+
+# Options of every Deepgram request (part of the transcription cache key)
+TRANSCRIPTION_OPTIONS = {
+    'smart_format': True,
+    'model': 'nova-3',
+    'diarize': True,  # Enable speaker diarization
+    'utterances': True  # Get per-speaker utterances
+}
+
+# Cache of raw Deepgram responses (opened in process_data; None disables it)
+transcription_cache = None
+
+# Responses that mean Deepgram is overloaded or rate limiting us
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Number of throttling responses seen so far (read by AdaptiveConcurrency)
+throttle_events = 0
+
+def get_error_status(error):
+    """
+    HTTP status of a failed Deepgram call, or None if it did not get a response.
+    """
+    http_error = getattr(error, 'http_library_error', None) or error
+    status = getattr(http_error, 'status', None)
+    return status if isinstance(status, int) else None
+
+def note_api_error(error):
+    """
+    Count the error if it is a 429 or 5xx, so the scheduler can back off.
+    """
+    global throttle_events
+    if get_error_status(error) in THROTTLE_STATUSES:
+        throttle_events += 1
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to Deepgram's responses (AIMD).
+    
+    After every window of `limit` completions the limit grows by one, or
+    shrinks by one if latency per MB of audio has climbed well above the
+    best seen so far. It halves as soon as a 429/5xx response is seen.
+    """
+    
+    def __init__(self, initial=8, minimum=1, maximum=32, latency_factor=2.0):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.since_change = 0
+        self.seen_throttles = throttle_events
+        self.latency = None  # Moving average, seconds per MB
+        self.best_latency = None
+        self.samples = 0
+        self.condition = asyncio.Condition()
+    
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+    
+    async def release(self, seconds, megabytes, success):
+        """
+        Free a slot and adjust the limit.
+        
+        Args:
+            seconds (float): How long the item took
+            megabytes (float): Size of its audio file
+            success (bool): Whether it was transcribed
+        """
+        async with self.condition:
+            self.in_flight -= 1
+            previous = self.limit
+            self.since_change += 1
+            if throttle_events > self.seen_throttles:
+                self.seen_throttles = throttle_events
+                self.limit = max(self.minimum, self.limit // 2)
+                self.since_change = 0
+            elif success:
+                per_mb = seconds / max(megabytes, 0.1)
+                self.latency = per_mb if self.latency is None else 0.8 * self.latency + 0.2 * per_mb
+                self.samples += 1
+                if self.samples >= 3:
+                    self.best_latency = min(self.best_latency or self.latency, self.latency)
+                # Adjust at most once per window of `limit` completions
+                if self.since_change >= self.limit:
+                    if self.best_latency and self.latency > self.latency_factor * self.best_latency:
+                        self.limit = max(self.minimum, self.limit - 1)
+                    else:
+                        self.limit = min(self.maximum, self.limit + 1)
+                    self.since_change = 0
+            if self.limit != previous:
+                print(f"{Fore.CYAN}[INFO] Concurrency {previous} -> {self.limit}{Style.RESET_ALL}")
+            self.condition.notify_all()
+
+# Mimetypes of the audio formats written by get-yc-video.py
+AUDIO_MIMETYPES = {
+    '.mp3': 'audio/mp3',
+    '.m4a': 'audio/mp4',
+    '.mp4': 'audio/mp4',
+    '.webm': 'audio/webm',
+    '.opus': 'audio/ogg',
+    '.ogg': 'audio/ogg',
+    '.wav': 'audio/wav',
+    '.flac': 'audio/flac',
+}
+
+def get_audio_mimetype(audio_file_path):
+    """
+    Get the mimetype Deepgram needs for an audio file, based on its extension.
+    """
+    extension = os.path.splitext(audio_file_path)[1].lower()
+    return AUDIO_MIMETYPES.get(extension, 'audio/mp3')
 
 # Comment out OpenAI related code
 # OPENAI_API_KEY = "..."
 # client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
-async def transcribe_audio_chunk(chunk_path):
+# Chunked transcription settings (see transcribe_audio_chunked)
+CHUNKED_MIN_SECONDS = 15 * 60     # Shorter files are sent in one request
+CHUNK_SECONDS = 10 * 60           # Target chunk length
+CHUNK_SEARCH_SECONDS = 30         # Look this far around each boundary for a pause
+CHUNK_OVERLAP_SECONDS = 30        # Audio shared by neighbouring chunks, used to match speakers
+MIN_SILENCE_MS = 400
+SILENCE_BELOW_DBFS = 16           # Silence threshold, in dB below the file's average loudness
+MAX_CONCURRENT_CHUNKS = 4
+MAX_CONCURRENT_DECODES = 2        # Long files decoded in memory at once, across all items
+CHUNK_RETRIES = 3
+
+# Bounds the decodes of every transcribe_audio_chunked call (created in the running loop)
+decode_slots = None
+
+def format_utterances(utterances):
+    """
+    Render Deepgram utterances as "Speaker N: text" lines.
+    """
+    transcription = ""
+    for utterance in utterances:
+        speaker = utterance.get('speaker', '0')  # Default to '0' if speaker not identified
+        text = utterance.get('transcript', '')
+        transcription += f"Speaker {speaker}: {text}\n"
+    return transcription
+
+def get_audio_duration(audio_file_path):
+    """
+    Duration of an audio file in seconds, read by ffprobe without decoding it.
+    """
+    try:
+        return float(mediainfo(audio_file_path).get('duration') or 0)
+    except Exception:
+        return 0.0
+
+def find_split_points(audio, chunk_ms, search_ms):
+    """
+    Pick chunk boundaries close to every chunk_ms, moved to the middle of the
+    nearest pause within search_ms so no word is cut in half.
+    
+    Args:
+        audio (AudioSegment): The decoded audio
+        chunk_ms (int): Target chunk length in milliseconds
+        search_ms (int): How far from the target boundary a pause may be
+        
+    Returns:
+        list: Boundaries in milliseconds, starting with 0 and ending with len(audio)
+    """
+    silence_thresh = audio.dBFS - SILENCE_BELOW_DBFS
+    points = [0]
+    target = chunk_ms
+    while target < len(audio) - search_ms:
+        window_start = max(points[-1] + 1, target - search_ms)
+        window = audio[window_start:target + search_ms]
+        silences = detect_silence(window, min_silence_len=MIN_SILENCE_MS, silence_thresh=silence_thresh)
+        if silences:
+            middles = [window_start + (start + end) // 2 for start, end in silences]
+            point = min(middles, key=lambda middle: abs(middle - target))
+        else:
+            point = target  # No pause nearby, cut at the target
+        points.append(point)
+        target = point + chunk_ms
+    points.append(len(audio))
+    return points
+
+def match_speakers(previous_utterances, chunk_utterances):
+    """
+    Map the speaker labels of one chunk onto the labels used so far.
+    
+    Deepgram numbers speakers per request, so the utterances both chunks
+    share in the overlap are compared: each local speaker gets the global
+    speaker it overlaps in time the most. Local speakers not heard in the
+    overlap are paired with the remaining global speakers, most recently
+    active first, only when the chunk has no more speakers than are known
+    so far; otherwise they are left out and get new labels.
+    
+    Args:
+        previous_utterances (list): Stitched utterances so far (global labels)
+        chunk_utterances (list): The chunk's utterances (local labels, absolute times)
+        
+    Returns:
+        dict: Local label -> global label
+    """
+    overlap_start = min((u['start'] for u in chunk_utterances), default=0)
+    overlaps = {}
+    for local in chunk_utterances:
+        for stitched in previous_utterances:
+            if stitched['end'] <= overlap_start:
+                continue
+            shared = min(local['end'], stitched['end']) - max(local['start'], stitched['start'])
+            if shared > 0:
+                key = (local.get('speaker', 0), stitched.get('speaker', 0))
+                overlaps[key] = overlaps.get(key, 0) + shared
+    speaker_map = {}
+    used = set()
+    for (local, stitched), _ in sorted(overlaps.items(), key=lambda entry: -entry[1]):
+        if local not in speaker_map and stitched not in used:
+            speaker_map[local] = stitched
+            used.add(stitched)
+    
+    # Speakers quiet during the overlap: pair them by recency, unless the
+    # chunk brings more speakers than are known (then someone is new)
+    last_heard = {}
+    for utterance in previous_utterances:
+        last_heard[utterance.get('speaker', 0)] = utterance['end']
+    if len({utterance.get('speaker', 0) for utterance in chunk_utterances}) > len(last_heard):
+        return speaker_map
+    free = sorted((speaker for speaker in last_heard if speaker not in used), key=lambda speaker: -last_heard[speaker])
+    for utterance in chunk_utterances:
+        local = utterance.get('speaker', 0)
+        if local not in speaker_map and free:
+            speaker_map[local] = free.pop(0)
+    return speaker_map
+
+async def transcribe_audio_chunked(audio_file_path, chunk_seconds=CHUNK_SECONDS):
+    """
+    Transcribe a long audio file as concurrent chunks.
+    
+    The audio is split at pauses near every chunk_seconds. Each chunk starts
+    CHUNK_OVERLAP_SECONDS before its boundary so speakers can be matched
+    with the previous chunk. The decoded file is only held while it is
+    split and the chunks are exported, at most
+    MAX_CONCURRENT_DECODES files at a time. A failed chunk is retried on
+    its own. The utterances are stitched back in order with offsets
+    relative to the whole file and one set of speaker labels.
+    
+    Args:
+        audio_file_path (str): Path to the audio file
+        chunk_seconds (int): Target chunk length in seconds
+        
+    Returns:
+        list: The stitched utterances, or None if a chunk failed every retry
+    """
+    global decode_slots
+    if decode_slots is None:
+        decode_slots = asyncio.Semaphore(MAX_CONCURRENT_DECODES)
+    
+    source_hash = await asyncio.to_thread(hash_audio_file, audio_file_path) if transcription_cache is not None else None
+    overlap_ms = CHUNK_OVERLAP_SECONDS * 1000
+    with tempfile.TemporaryDirectory(prefix='chunks-') as chunk_dir:
+        async with decode_slots:
+            audio = await asyncio.to_thread(AudioSegment.from_file, audio_file_path)
+            points = await asyncio.to_thread(find_split_points, audio, chunk_seconds * 1000, CHUNK_SEARCH_SECONDS * 1000)
+            print(f"{Fore.CYAN}[DEBUG] Split {audio_file_path} ({len(audio) / 60000:.1f} min) into {len(points) - 1} chunks{Style.RESET_ALL}")
+            chunk_hashes = []
+            for index in range(len(points) - 1):
+                start_ms = max(0, points[index] - overlap_ms)
+                # Chunks are temporary files, so they are cached by source audio and range
+                chunk_hash = f"{source_hash}:{start_ms}-{points[index + 1]}:mp3-64k" if source_hash else None
+                chunk_hashes.append(chunk_hash)
+                # Every chunk is written, so a cache entry missing at request time still has its file
+                await asyncio.to_thread(audio[start_ms:points[index + 1]].export,
+                                        os.path.join(chunk_dir, f"chunk-{index:03d}.mp3"), format='mp3', bitrate='64k')
+            del audio
+        total_chunks = len(points) - 1
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+        async def run_chunk(index):
+            start_ms = max(0, points[index] - overlap_ms)
+            chunk_path = os.path.join(chunk_dir, f"chunk-{index:03d}.mp3")
+            async with semaphore:
+                utterances = await transcribe_audio_chunk(chunk_path, audio_hash=chunk_hashes[index])
+            if utterances is None:
+                return None
+            # Shift the offsets so they are relative to the whole file
+            for utterance in utterances:
+                utterance['start'] = utterance.get('start', 0) + start_ms / 1000
+                utterance['end'] = utterance.get('end', 0) + start_ms / 1000
+            return utterances
+        
+        chunks = await asyncio.gather(*(run_chunk(index) for index in range(total_chunks)))
+    
+    failed = [index for index, utterances in enumerate(chunks) if utterances is None]
+    if failed:
+        print(f"{Fore.RED}[ERROR] Chunks {failed} of {audio_file_path} failed after {CHUNK_RETRIES} attempts{Style.RESET_ALL}")
+        return None
+    
+    stitched = []
+    next_speaker = 0
+    for index, utterances in enumerate(chunks):
+        boundary = points[index] / 1000
+        # Utterances are owned by the chunk their middle falls in
+        owned = [u for u in utterances if (u['start'] + u['end']) / 2 >= boundary]
+        speaker_map = match_speakers(stitched, utterances) if index else {}
+        for utterance in owned:
+            local = utterance.get('speaker', 0)
+            if local not in speaker_map:
+                speaker_map[local] = next_speaker
+            next_speaker = max(next_speaker, speaker_map[local] + 1)
+            utterance['speaker'] = speaker_map[local]
+            stitched.append(utterance)
+    return stitched
+
+async def request_transcription(audio_file_path, audio_hash=None):
+    """
+    Send one prerecorded request to Deepgram, or answer it from the
+    transcription cache if the same audio was transcribed with the same
+    options before.
+    
+    Args:
+        audio_file_path (str): Audio file to upload
+        audio_hash (str): Id of the exact audio (default: hash of the file)
+        
+    Returns:
+        dict: The raw Deepgram response
+    """
+    key = None
+    if transcription_cache is not None:
+        audio_hash = audio_hash or await asyncio.to_thread(hash_audio_file, audio_file_path)
+        key = make_cache_key(audio_hash, TRANSCRIPTION_OPTIONS)
+        response = transcription_cache.get(key)
+        if response is not None:
+            print(f"{Fore.GREEN}[DEBUG] Using cached transcription for {audio_file_path}{Style.RESET_ALL}")
+            return response
+    
+    with open(audio_file_path, 'rb') as audio:
+        source = {'buffer': audio, 'mimetype': get_audio_mimetype(audio_file_path)}
+        response = await deepgram.transcription.prerecorded(source, dict(TRANSCRIPTION_OPTIONS))
+    if key is not None and response:
+        transcription_cache.set(key, audio_hash, TRANSCRIPTION_OPTIONS, response)
+    return response
+
+async def transcribe_audio_chunk(chunk_path, retry_count=CHUNK_RETRIES, audio_hash=None):
     """
     Transcribe a single audio chunk using Deepgram's API with diarization.
     
     Args:
         chunk_path (str): Path to the audio chunk file
+        retry_count (int): Attempts before giving up on this chunk
+        audio_hash (str): Cache id of the chunk (see request_transcription)
         
     Returns:
-        str: The transcribed text
+        list: Deepgram utterances (offsets relative to the chunk), or None if every attempt failed
     """
     print(f"{Fore.YELLOW}[DEBUG] Transcribing chunk: {chunk_path}{Style.RESET_ALL}")
     
-    try:
-        with open(chunk_path, "rb") as audio_file:
-            options = {
-                'smart_format': True,
-                'model': 'nova-3',
-                'diarize': True,  # Enable speaker diarization
-                'utterances': False  # Get per-speaker utterances
-            }
-            response = await deepgram.transcription.prerecorded({'buffer': audio_file, 'mimetype': 'audio/mp3'}, options)
+    for attempt in range(retry_count):
+        try:
+            response = await request_transcription(chunk_path, audio_hash)
             
-            # Extract transcription with speaker labels
             utterances = response['results']['utterances']
-            transcription = ""
-            for utterance in utterances:
-                speaker = utterance.get('speaker', '0')  # Default to '0' if speaker not identified
-                text = utterance.get('transcript', '')
-                transcription += f"Speaker {speaker}: {text}\n"
-            
             print(f"{Fore.GREEN}[DEBUG] Successfully transcribed chunk with {len(utterances)} utterances{Style.RESET_ALL}")
-            return transcription
+            return utterances
             
-    except Exception as e:
-        print(f"{Fore.RED}[ERROR] Chunk transcription failed: {str(e)}{Style.RESET_ALL}")
-        return ""
+        except Exception as e:
+            note_api_error(e)
+            print(f"{Fore.RED}[ERROR] Chunk transcription failed (attempt {attempt + 1}/{retry_count}): {str(e)}{Style.RESET_ALL}")
+            if attempt < retry_count - 1:
+                await asyncio.sleep(2 ** attempt)
+    return None
 
-async def transcribe_audio(audio_file_path):
+async def transcribe_utterances(audio_file_path, chunked=False, timestamp_map=None):
     """
     Transcribe an audio file using Deepgram's API with diarization.
-    If the file is too large, it will be split into chunks.
+    If chunked is set and the file is long, it is split into chunks
+    that are transcribed concurrently.
     
     Args:
         audio_file_path (str): Path to the audio file
+        chunked (bool): Use transcribe_audio_chunked for files longer than CHUNKED_MIN_SECONDS
+        timestamp_map (list): Map from a preprocessed file back to the original
+            (see audio_preprocess.py); utterance times are rewritten with it
         
     Returns:
-        str: The transcribed text
+        list: Deepgram utterances (times in the original audio), or None on failure
     """
     print(f"{Fore.YELLOW}[DEBUG] Starting transcription of {audio_file_path}{Style.RESET_ALL}")
     
@@ -83,33 +433,36 @@ async def transcribe_audio(audio_file_path):
             print(f"{Fore.RED}[ERROR] File not found: {audio_file_path}{Style.RESET_ALL}")
             return None
         
-        with open(audio_file_path, 'rb') as audio:
-            source = {'buffer': audio, 'mimetype': 'audio/mp3'}
-            options = {
-                'smart_format': True,
-                'model': 'nova-3',
-                'diarize': True,  # Enable speaker diarization
-                'utterances': True  # Get per-speaker utterances
-            }
-            
-            response = await deepgram.transcription.prerecorded(source, options)
-            
-            # Extract transcription with speaker labels
+        if chunked and get_audio_duration(audio_file_path) > CHUNKED_MIN_SECONDS:
+            utterances = await transcribe_audio_chunked(audio_file_path)
+            if utterances is None:
+                return None
+        else:
+            response = await request_transcription(audio_file_path)
             utterances = response['results']['utterances']
-            transcription = ""
-            for utterance in utterances:
-                speaker = utterance.get('speaker', '0')  # Default to '0' if speaker not identified
-                text = utterance.get('transcript', '')
-                transcription += f"Speaker {speaker}: {text}\n"
-                
-            print(f"{Fore.GREEN}[DEBUG] Successfully transcribed audio with {len(utterances)} utterances{Style.RESET_ALL}")
-            return transcription
-            
+        
+        map_utterances(utterances, timestamp_map)
+        print(f"{Fore.GREEN}[DEBUG] Successfully transcribed audio with {len(utterances)} utterances{Style.RESET_ALL}")
+        return utterances
+        
     except Exception as e:
+        note_api_error(e)
         print(f"{Fore.RED}[ERROR] Transcription failed: {str(e)}{Style.RESET_ALL}")
         return None
 
-async def process_item(item, i, total_items):
+async def transcribe_audio(audio_file_path, chunked=False, timestamp_map=None):
+    """
+    Transcribe an audio file into "Speaker N: text" lines (see transcribe_utterances).
+    
+    Returns:
+        str: The transcribed text
+    """
+    utterances = await transcribe_utterances(audio_file_path, chunked, timestamp_map)
+    if utterances is None:
+        return None
+    return format_utterances(utterances)
+
+async def process_item(item, i, total_items, chunked=False, preprocessed=None):
     """
     Process a single item from the data.
     
@@ -117,13 +470,15 @@ async def process_item(item, i, total_items):
         item (dict): The item to process
         i (int): The index of the item
         total_items (int): The total number of items
+        chunked (bool): Transcribe long audio as concurrent chunks
+        preprocessed (dict): audio_preprocess result to transcribe instead of the download
         
     Returns:
         bool: True if successful, False otherwise
     """
     print(f"\n{Fore.CYAN}[INFO] Processing item {i}/{total_items}: {item.get('name_video', 'Unnamed')}{Style.RESET_ALL}")
     
-    # 1. Get the MP3 file path
+    # 1. Get the audio file path (MP3, or the native opus/m4a stream)
     mp3_file = item.get('mp3_file')
     if not mp3_file:
         print(f"{Fore.YELLOW}[WARNING] No MP3 file found for item {i}, skipping{Style.RESET_ALL}")
@@ -131,82 +486,220 @@ async def process_item(item, i, total_items):
     
     # Make sure the path is in the downloaded directory
     mp3_file = os.path.join('./downloaded', os.path.basename(mp3_file))
+    timestamp_map = None
+    if preprocessed:
+        mp3_file, timestamp_map = preprocessed['path'], preprocessed['timestamp_map']
     
     # 2. Transcribe the MP3 using Deepgram
-    transcription = await transcribe_audio(mp3_file)
-    if not transcription:
+    utterances = await transcribe_utterances(mp3_file, chunked, timestamp_map)
+    if not utterances:
         print(f"{Fore.YELLOW}[WARNING] Could not transcribe item {i}, skipping{Style.RESET_ALL}")
         return False
     
-    # 3. Add transcription to the item
-    item['mp3_content'] = transcription
+    # 3. Add the compact utterances and the rendered text to the item
+    transcript = CompactTranscript.from_utterances(utterances)
+    item['mp3_content'] = transcript.render()
+    item['mp3_utterances'] = transcript.to_dict()
     return True
 
-async def process_data_async():
+# Scheduler settings for process_data_async
+INITIAL_CONCURRENCY = 8
+MAX_CONCURRENCY = 32
+SAVE_EVERY = 10         # Save after this many transcriptions...
+SAVE_INTERVAL = 30.0    # ...or this many seconds, whichever comes first
+
+def save_json(data, path):
+    """
+    Write the JSON file through a temporary file so a crash never leaves it half written.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+async def process_data_async(store=None, chunked=False, initial_concurrency=INITIAL_CONCURRENCY,
+                             max_concurrency=MAX_CONCURRENCY, preprocess_workers=0, input_path='video-data-missing.json'):
     """
     Asynchronous version of the main function to process the YC video data.
+    
+    Items go through a continuous work queue whose concurrency adapts to
+    Deepgram's latency and throttling, and results are saved every
+    SAVE_EVERY transcriptions or SAVE_INTERVAL seconds. Items that already
+    have mp3_content (in the store, or in a previous output file) are skipped,
+    so an interrupted run resumes where it stopped.
+    
+    Args:
+        store (DatasetStore): If given, transcribe the store items missing
+            mp3_content and save each transcription to its row
+        chunked (bool): Transcribe long audio as concurrent chunks
+        initial_concurrency (int): Concurrent transcriptions to start with
+        max_concurrency (int): Upper bound for the adaptive concurrency
+        preprocess_workers (int): If set, downmix, resample and trim silence from
+            each file in this many worker processes before it is uploaded
+        input_path (str): Video items to transcribe when no store is given
     """
     print(f"{Fore.CYAN}[INFO] Starting YC video transcription process{Style.RESET_ALL}")
+    output_path = './video-data-missing-gotten.json'
     
     # Load the data
     try:
-        with open('video-data-missing.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if store:
+            data = [item for item in store.iter_items('video', missing='mp3_content') if item.get('mp3_file')]
+        else:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Pick up the transcriptions of an earlier run
+            if os.path.exists(output_path):
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    done = {item.get('page_url'): item for item in json.load(f) if item.get('mp3_content')}
+                for item in data:
+                    if not item.get('mp3_content') and item.get('page_url') in done:
+                        previous = done[item['page_url']]
+                        item['mp3_content'] = previous['mp3_content']
+                        if previous.get('mp3_utterances') is not None:
+                            item['mp3_utterances'] = previous['mp3_utterances']
         print(f"{Fore.GREEN}[INFO] Loaded data with {len(data)} items{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}[ERROR] Failed to load data: {str(e)}{Style.RESET_ALL}")
         return
 
-    # Configure concurrent processing
-    BATCH_SIZE = 10  # Process 10 items per batch
-    MAX_CONCURRENT_CALLS = 8  # Process 8 concurrent calls
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
-    success_count = 0
-    start_index = 0
-    # end_index = 110
-
-    print(f"{Fore.CYAN}[INFO] Starting from item {start_index + 1} out of {len(data)} items{Style.RESET_ALL}")
+    pending = [(i, item) for i, item in enumerate(data, 1) if not item.get('mp3_content')]
+    print(f"{Fore.CYAN}[INFO] {len(data) - len(pending)} items already transcribed, {len(pending)} to go{Style.RESET_ALL}")
 
-    # Modify process_item to use semaphore
-    async def process_item_with_semaphore(item, i, total_items):
-        async with semaphore:
-            return await process_item(item, i, total_items)
-
-    # Process items in batches
-    remaining_items = data[start_index:]
-    for batch_start in range(0, len(remaining_items), BATCH_SIZE):
-        batch = remaining_items[batch_start:batch_start + BATCH_SIZE]
-        batch_tasks = []
-        
-        # Create tasks for each item in the batch
-        for idx, item in enumerate(batch):
-            global_idx = start_index + batch_start + idx
-            task = process_item_with_semaphore(item, global_idx, len(data))
-            batch_tasks.append(task)
-        
-        # Process batch concurrently
-        batch_results = await asyncio.gather(*batch_tasks)
-        success_count += sum(1 for result in batch_results if result)
+    queue = asyncio.Queue()
+    for entry in pending:
+        queue.put_nowait(entry)
+    limiter = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+    success_count = 0
+    finished_count = 0
+    unsaved = []
+    save_requested = asyncio.Event()
+    preprocess_pool = ProcessPoolExecutor(max_workers=preprocess_workers) if preprocess_workers else None
+    preprocess_results = []
 
-        # Save after each batch
+    def save():
         try:
-            with open('./video-data-missing-gotten.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            print(f"{Fore.GREEN}[INFO] Saved updated data after processing batch{Style.RESET_ALL}")
-            print(f"{Fore.GREEN}[INFO] {success_count} items transcribed, {len(data) - (batch_start + start_index + len(batch))} items remaining{Style.RESET_ALL}")
+            if store:
+                # Only the rows transcribed since the last save are written
+                for item in unsaved:
+                    store.update_fields('video', item['page_url'], commit=False, mp3_content=item['mp3_content'],
+                                        mp3_utterances=item.get('mp3_utterances'))
+                store.connection.commit()
+            else:
+                save_json(data, output_path)
+            print(f"{Fore.GREEN}[INFO] Saved {len(unsaved)} new transcriptions; {success_count} transcribed, "
+                  f"{len(pending) - finished_count} items remaining, concurrency {limiter.limit}{Style.RESET_ALL}")
+            unsaved.clear()
         except Exception as e:
             print(f"{Fore.RED}[ERROR] Failed to save data: {str(e)}{Style.RESET_ALL}")
 
+    async def worker():
+        nonlocal success_count, finished_count
+        while True:
+            try:
+                i, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            mp3_file = os.path.join('./downloaded', os.path.basename(item.get('mp3_file') or ''))
+            preprocessed = None
+            if preprocess_pool:
+                # CPU work happens before taking an API slot
+                preprocessed = await asyncio.get_running_loop().run_in_executor(preprocess_pool, preprocess_job, mp3_file)
+                print_savings(preprocessed)
+                preprocess_results.append(preprocessed)
+                if preprocessed['error']:
+                    preprocessed = None
+                else:
+                    mp3_file = preprocessed['path']
+            await limiter.acquire()
+            start_time = time.perf_counter()
+            try:
+                result = await process_item(item, i, len(data), chunked, preprocessed)
+            except Exception as e:
+                print(f"{Fore.RED}[ERROR] Item {i} failed: {str(e)}{Style.RESET_ALL}")
+                result = False
+            megabytes = os.path.getsize(mp3_file) / 1024 / 1024 if os.path.isfile(mp3_file) else 0
+            await limiter.release(time.perf_counter() - start_time, megabytes, result)
+            finished_count += 1
+            if result:
+                success_count += 1
+                unsaved.append(item)
+                if len(unsaved) >= SAVE_EVERY:
+                    save_requested.set()
+
+    async def saver():
+        # Save on a timer, or early once SAVE_EVERY results are waiting
+        while True:
+            try:
+                await asyncio.wait_for(save_requested.wait(), SAVE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            save_requested.clear()
+            if unsaved:
+                save()
+
+    saver_task = asyncio.create_task(saver())
+    try:
+        await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+    finally:
+        saver_task.cancel()
+        if unsaved:
+            save()
+        if preprocess_pool:
+            preprocess_pool.shutdown()
+
     # Print finalization message
     print(f"\n{Fore.GREEN}[INFO] === FINALIZED ===={Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[INFO] Successfully transcribed {success_count} out of {len(data) - start_index} items processed{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[INFO] Results saved to ./video-data-missing-gotten.json{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] Successfully transcribed {success_count} out of {len(pending)} items processed{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] Results saved to {store.path if store else output_path}{Style.RESET_ALL}")
+    print_totals(preprocess_results)
+    
+    # Report how many Deepgram calls the transcription cache saved
+    if transcription_cache is not None:
+        stats = transcription_cache.stats()
+        print(f"{Fore.GREEN}[INFO] Transcription cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+              f"{stats['stores']} stored, {stats['entries']} entries, {stats['total_bytes'] / 1024 / 1024:.1f} MB on disk{Style.RESET_ALL}")
 
 def process_data():
     """
     Main function to process the YC video data.
     """
-    asyncio.run(process_data_async())
+    parser = argparse.ArgumentParser(description='Transcribe the downloaded YC videos with Deepgram')
+    parser.add_argument('--input', type=str, default='video-data-missing.json',
+                        help='Video items to transcribe, when --db is not used (default: video-data-missing.json)')
+    parser.add_argument('--db', type=str,
+                        help='Transcribe the items of this SQLite dataset store that have no mp3_content yet')
+    parser.add_argument('--chunked', action='store_true',
+                        help=f'Split audio longer than {CHUNKED_MIN_SECONDS // 60} minutes at pauses and transcribe the chunks concurrently')
+    parser.add_argument('--concurrency', type=int, default=INITIAL_CONCURRENCY,
+                        help=f'Concurrent transcriptions to start with (default: {INITIAL_CONCURRENCY})')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f'Upper bound for the adaptive concurrency (default: {MAX_CONCURRENCY})')
+    parser.add_argument('--preprocess', type=int, nargs='?', const=os.cpu_count(), default=0, metavar='WORKERS',
+                        help='Downmix to mono, resample and trim silence before uploading, in this many processes (default: one per CPU)')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Cache of Deepgram responses keyed by audio hash and options (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call Deepgram, ignoring the transcription cache')
+    parser.add_argument('--api-url', type=str,
+                        help='Deepgram API URL, e.g. a local fake server (default: $DEEPGRAM_API_URL or api.deepgram.com)')
+    args = parser.parse_args()
+    
+    global deepgram, transcription_cache
+    if args.api_url:
+        deepgram = create_deepgram_client(args.api_url)
+    if not args.no_cache:
+        transcription_cache = TranscriptionCache(args.cache_path)
+    
+    store = DatasetStore(args.db) if args.db else None
+    try:
+        asyncio.run(process_data_async(store, args.chunked, args.concurrency, args.max_concurrency, args.preprocess,
+                                       args.input))
+    finally:
+        if transcription_cache is not None:
+            transcription_cache.close()
+        if store:
+            store.close()
 
 if __name__ == "__main__":
     process_data()
@@ -1,18 +1,28 @@
 import os
 import json
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from pytube import YouTube
 from urllib.parse import urlparse, parse_qs
 from colorama import init, Fore, Style
 import yt_dlp
 import re
+import subprocess
+from pydub.utils import mediainfo
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataset_store import DatasetStore
+from page_cache import PageCache, DEFAULT_CACHE_PATH as DEFAULT_PAGE_CACHE_PATH
 
 # Initialize colorama
 init()
@@ -52,106 +62,375 @@ def download_youtube_as_mp3(youtube_url, output_filename):
         print(f"{Fore.RED}[DEBUG] Error with yt-dlp: {e}{Style.RESET_ALL}")
         raise
 
-def extract_youtube_link_with_selenium(url):
+# Audio formats for download_youtube_audio:
+#   native - keep YouTube's own audio stream (opus/m4a), no re-encode
+#   mono   - low-bitrate mono opus transcoded by ffmpeg, smallest upload for transcription
+#   mp3    - the original 192 kbps MP3 re-encode
+AUDIO_FORMATS = ['native', 'mono', 'mp3']
+DEFAULT_AUDIO_FORMAT = 'native'
+MONO_BITRATE = '32'  # kbps, plenty for speech
+MONO_SAMPLE_RATE = '16000'
+
+def download_youtube_audio(youtube_url, output_filename, audio_format=DEFAULT_AUDIO_FORMAT):
     """
-    Uses Selenium to load the page, click on the YouTube thumbnail,
-    and extract the video URL after it loads.
+    Downloads the audio of the YouTube video at youtube_url into the
+    'downloaded' folder, named output_filename plus the audio extension.
+    
+    Args:
+        youtube_url (str): YouTube watch URL
+        output_filename (str): File name without extension
+        audio_format (str): One of AUDIO_FORMATS
+        
+    Returns:
+        str: Path of the downloaded audio file
     """
-    print(f"{Fore.CYAN}[DEBUG] Starting Selenium to interact with: {url}{Style.RESET_ALL}")
+    if audio_format == 'mp3':
+        return download_youtube_as_mp3(youtube_url, output_filename)
+    
+    print(f"{Fore.CYAN}[DEBUG] Starting {audio_format} audio download for YouTube URL: {youtube_url}{Style.RESET_ALL}")
+    os.makedirs('downloaded', exist_ok=True)
+    
+    ydl_opts = {
+        # Prefer a stream that needs no conversion at all
+        'format': 'bestaudio[acodec=opus]/bestaudio[ext=m4a]/bestaudio/best',
+        'outtmpl': os.path.join('downloaded', output_filename + '.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True
+    }
+    if audio_format == 'mono':
+        # yt-dlp's FFmpegExtractAudio copies an opus source as is, so ffmpeg is run here
+        ydl_opts['format'] = 'worstaudio[acodec=opus]/worstaudio/bestaudio/best'
+        ydl_opts['outtmpl'] = os.path.join('downloaded', output_filename + '.source.%(ext)s')
     
-    # Setup Chrome options
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(youtube_url, download=True)
+            downloads = info.get('requested_downloads') or []
+            output_path = downloads[0]['filepath'] if downloads else ydl.prepare_filename(info)
+        if audio_format == 'mono':
+            source_path = output_path
+            output_path = os.path.join('downloaded', output_filename + '.opus')
+            try:
+                subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', source_path, '-vn',
+                                '-c:a', 'libopus', '-b:a', MONO_BITRATE + 'k', '-ac', '1', '-ar', MONO_SAMPLE_RATE,
+                                output_path], check=True, capture_output=True)
+            finally:
+                os.remove(source_path)
+        print(f"{Fore.GREEN}[DEBUG] Downloaded file to: {output_path}{Style.RESET_ALL}")
+        return output_path
+    except subprocess.CalledProcessError as e:
+        print(f"{Fore.RED}[DEBUG] Error with ffmpeg: {e.stderr.decode(errors='replace').strip()}{Style.RESET_ALL}")
+        raise
+    except Exception as e:
+        print(f"{Fore.RED}[DEBUG] Error with yt-dlp: {e}{Style.RESET_ALL}")
+        raise
+
+def download_audio_job(job):
+    """
+    Download one video in a worker process and measure it.
+    
+    Args:
+        job (tuple): (index, youtube_url, output_filename, audio_format)
+        
+    Returns:
+        dict: index, path, bytes on disk, seconds and error (if any)
+    """
+    index, youtube_url, output_filename, audio_format = job
+    start_time = time.perf_counter()
+    try:
+        path = download_youtube_audio(youtube_url, output_filename, audio_format)
+        return {'index': index, 'path': path, 'bytes': os.path.getsize(path),
+                'seconds': time.perf_counter() - start_time, 'error': None}
+    except Exception as e:
+        return {'index': index, 'path': None, 'bytes': 0,
+                'seconds': time.perf_counter() - start_time, 'error': str(e)}
+
+def download_audio_parallel(jobs, workers):
+    """
+    Run download_audio_job for every job on a pool of worker processes.
+    
+    Yields:
+        dict: The result of each job, as soon as it finishes
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(download_audio_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+def benchmark_audio_formats(youtube_urls, workers):
+    """
+    Compare bytes on disk, wall time per video and the channels and sample
+    rate of the files for each audio format against the original MP3 re-encode.
+    
+    Args:
+        youtube_urls (list): YouTube URLs to download in every format
+        workers (int): Download worker processes
+    """
+    totals = {}
+    for audio_format in AUDIO_FORMATS:
+        jobs = [(i, url, f"benchmark_{audio_format}_{i}", audio_format) for i, url in enumerate(youtube_urls)]
+        start_time = time.perf_counter()
+        results = [result for result in download_audio_parallel(jobs, workers) if not result['error']]
+        wall_time = time.perf_counter() - start_time
+        layouts = set()
+        for result in results:
+            info = mediainfo(result['path'])
+            layouts.add(f"{info.get('channels', '?')} ch {info.get('sample_rate', '?')} Hz")
+            os.remove(result['path'])
+        count = len(results) or 1
+        totals[audio_format] = (
+            sum(result['bytes'] for result in results) / count,
+            sum(result['seconds'] for result in results) / count,
+            wall_time,
+            len(results),
+            ', '.join(sorted(layouts)) or 'no files'
+        )
+    
+    mp3_bytes, mp3_seconds = totals['mp3'][0] or 1, totals['mp3'][1] or 1
+    print(f"\n{Fore.CYAN}[INFO] Audio download benchmark ({len(youtube_urls)} videos, {workers} workers){Style.RESET_ALL}")
+    for audio_format, (avg_bytes, avg_seconds, wall_time, count, layout) in totals.items():
+        print(f"{Fore.GREEN}[INFO] {audio_format}: {avg_bytes / 1024 / 1024:.2f} MB/video ({avg_bytes / mp3_bytes:.0%} of mp3), "
+              f"{avg_seconds:.1f}s/video ({avg_seconds / mp3_seconds:.0%} of mp3), "
+              f"{wall_time:.1f}s wall for {count} videos, {layout}{Style.RESET_ALL}")
+
+# Seconds to wait for the YouTube embed to appear on a page, and for the video after clicking it
+PAGE_READY_TIMEOUT = 10
+VIDEO_READY_TIMEOUT = 5
+
+# Elements that show the page's video embed has rendered
+VIDEO_EMBED_SELECTOR = (
+    "iframe[src*='youtube.com'], [data-video-id], "
+    ".ytp-cued-thumbnail-overlay-image, .ytp-large-play-button"
+)
+
+def create_chrome_driver():
+    """
+    Start a headless Chrome driver with the options used for scraping.
+    """
     chrome_options = Options()
     chrome_options.add_argument("--headless")  # Run in headless mode
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=chrome_options)
+
+def youtube_video_loaded(driver):
+    """
+    WebDriverWait condition: a YouTube embed iframe or video source is present.
+    """
+    return bool(
+        driver.find_elements(By.CSS_SELECTOR, "iframe[src*='youtube.com/embed/']")
+        or driver.find_elements(By.CSS_SELECTOR, "video[src*='youtube.com']")
+    )
+
+def extract_youtube_link_with_driver(driver, url):
+    """
+    Load the page in an existing driver, click on the YouTube thumbnail
+    and extract the video URL after it loads.
     
+    Waits explicitly for the embed instead of sleeping a fixed time.
+    WebDriver errors are raised so the caller can recycle the driver.
+    """
+    driver.get(url)
+    print(f"{Fore.GREEN}[DEBUG] Loaded page with Selenium{Style.RESET_ALL}")
+    
+    # Wait for the video embed (or give up after PAGE_READY_TIMEOUT, e.g. pages without video)
     try:
-        # Initialize the driver
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(url)
-        print(f"{Fore.GREEN}[DEBUG] Loaded page with Selenium{Style.RESET_ALL}")
-        
-        # Wait a moment for page to fully load
-        time.sleep(2)
-        
-        # Look for YouTube thumbnail/play button and click it
-        # Try several possible selectors
-        selectors = [
-            "//div[contains(@class, 'ytp-cued-thumbnail-overlay-image')]",  # YouTube thumbnail overlay
-            "//button[contains(@class, 'ytp-large-play-button')]",  # YouTube play button
-            "//div[contains(@class, 'ytplayer')]",  # YouTube player div
-            "//div[contains(@id, 'ytplayer')]",  # YouTube player by ID
-            "//iframe[contains(@src, 'youtube.com')]",  # YouTube iframe
-            "//div[contains(@class, 'video-stream')]",  # Video stream element
-            "//div[contains(@class, 'html5-video-player')]"  # HTML5 video player
-        ]
-        
-        clicked = False
-        for selector in selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements:
-                    print(f"{Fore.YELLOW}[DEBUG] Found clickable element with selector: {selector}{Style.RESET_ALL}")
-                    elements[0].click()
-                    print(f"{Fore.GREEN}[DEBUG] Clicked on element{Style.RESET_ALL}")
-                    clicked = True
-                    # Wait for video to load
-                    time.sleep(3)
-                    break
-            except Exception as e:
-                print(f"{Fore.YELLOW}[DEBUG] Could not click selector {selector}: {e}{Style.RESET_ALL}")
-        
-        if not clicked:
-            print(f"{Fore.RED}[DEBUG] Could not find any clickable YouTube elements{Style.RESET_ALL}")
-        
-        # After clicking, use various methods to find the YouTube URL
-        
-        # Method 1: Look for video element with src attribute
-        video_elements = driver.find_elements(By.TAG_NAME, "video")
-        for video in video_elements:
-            src = video.get_attribute("src")
-            if src and "youtube.com" in src:
-                print(f"{Fore.GREEN}[DEBUG] Found video src: {src}{Style.RESET_ALL}")
-                driver.quit()
-                return src
-        
-        # Method 2: Check iframe src after click
-        iframes = driver.find_elements(By.TAG_NAME, "iframe")
-        for iframe in iframes:
-            src = iframe.get_attribute("src")
-            if src and "youtube.com/embed/" in src:
-                print(f"{Fore.GREEN}[DEBUG] Found iframe src after click: {src}{Style.RESET_ALL}")
-                video_id = src.split("/embed/")[1].split("?")[0]
-                watch_url = f"https://youtube.com/watch?v={video_id}"
-                driver.quit()
-                return watch_url
-        
-        # Method 3: Get page source after clicking and extract with BeautifulSoup
-        html_content = driver.page_source
-        youtube_link = extract_youtube_link_from_html(html_content)
-        if youtube_link:
-            print(f"{Fore.GREEN}[DEBUG] Found YouTube link from HTML after clicking: {youtube_link}{Style.RESET_ALL}")
-            driver.quit()
-            return youtube_link
-        
-        # Method 4: Look for data attributes that might contain the video ID
-        elements_with_data = driver.find_elements(By.XPATH, "//*[@data-video-id]")
-        if elements_with_data:
-            video_id = elements_with_data[0].get_attribute("data-video-id")
+        WebDriverWait(driver, PAGE_READY_TIMEOUT).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, VIDEO_EMBED_SELECTOR))
+        )
+    except TimeoutException:
+        print(f"{Fore.YELLOW}[DEBUG] No video embed appeared within {PAGE_READY_TIMEOUT}s{Style.RESET_ALL}")
+    
+    # Look for YouTube thumbnail/play button and click it
+    # Try several possible selectors
+    selectors = [
+        "//div[contains(@class, 'ytp-cued-thumbnail-overlay-image')]",  # YouTube thumbnail overlay
+        "//button[contains(@class, 'ytp-large-play-button')]",  # YouTube play button
+        "//div[contains(@class, 'ytplayer')]",  # YouTube player div
+        "//div[contains(@id, 'ytplayer')]",  # YouTube player by ID
+        "//iframe[contains(@src, 'youtube.com')]",  # YouTube iframe
+        "//div[contains(@class, 'video-stream')]",  # Video stream element
+        "//div[contains(@class, 'html5-video-player')]"  # HTML5 video player
+    ]
+    
+    clicked = False
+    for selector in selectors:
+        try:
+            elements = driver.find_elements(By.XPATH, selector)
+            if elements:
+                print(f"{Fore.YELLOW}[DEBUG] Found clickable element with selector: {selector}{Style.RESET_ALL}")
+                elements[0].click()
+                print(f"{Fore.GREEN}[DEBUG] Clicked on element{Style.RESET_ALL}")
+                clicked = True
+                # Wait for video to load
+                try:
+                    WebDriverWait(driver, VIDEO_READY_TIMEOUT).until(youtube_video_loaded)
+                except TimeoutException:
+                    pass
+                break
+        except WebDriverException as e:
+            print(f"{Fore.YELLOW}[DEBUG] Could not click selector {selector}: {e}{Style.RESET_ALL}")
+    
+    if not clicked:
+        print(f"{Fore.RED}[DEBUG] Could not find any clickable YouTube elements{Style.RESET_ALL}")
+    
+    # After clicking, use various methods to find the YouTube URL
+    
+    # Method 1: Look for video element with src attribute
+    video_elements = driver.find_elements(By.TAG_NAME, "video")
+    for video in video_elements:
+        src = video.get_attribute("src")
+        if src and "youtube.com" in src:
+            print(f"{Fore.GREEN}[DEBUG] Found video src: {src}{Style.RESET_ALL}")
+            return src
+    
+    # Method 2: Check iframe src after click
+    iframes = driver.find_elements(By.TAG_NAME, "iframe")
+    for iframe in iframes:
+        src = iframe.get_attribute("src")
+        if src and "youtube.com/embed/" in src:
+            print(f"{Fore.GREEN}[DEBUG] Found iframe src after click: {src}{Style.RESET_ALL}")
+            video_id = src.split("/embed/")[1].split("?")[0]
             watch_url = f"https://youtube.com/watch?v={video_id}"
-            print(f"{Fore.GREEN}[DEBUG] Found video ID from data attribute: {watch_url}{Style.RESET_ALL}")
-            driver.quit()
             return watch_url
-        
-        driver.quit()
-        print(f"{Fore.RED}[DEBUG] Could not extract YouTube URL after clicking{Style.RESET_ALL}")
-        return None
+    
+    # Method 3: Get page source after clicking and extract with BeautifulSoup
+    html_content = driver.page_source
+    youtube_link = extract_youtube_link_from_html(html_content)
+    if youtube_link:
+        print(f"{Fore.GREEN}[DEBUG] Found YouTube link from HTML after clicking: {youtube_link}{Style.RESET_ALL}")
+        return youtube_link
+    
+    # Method 4: Look for data attributes that might contain the video ID
+    elements_with_data = driver.find_elements(By.XPATH, "//*[@data-video-id]")
+    if elements_with_data:
+        video_id = elements_with_data[0].get_attribute("data-video-id")
+        watch_url = f"https://youtube.com/watch?v={video_id}"
+        print(f"{Fore.GREEN}[DEBUG] Found video ID from data attribute: {watch_url}{Style.RESET_ALL}")
+        return watch_url
+    
+    print(f"{Fore.RED}[DEBUG] Could not extract YouTube URL after clicking{Style.RESET_ALL}")
+    return None
+
+def extract_youtube_link_with_selenium(url):
+    """
+    Uses Selenium to load the page, click on the YouTube thumbnail,
+    and extract the video URL after it loads.
+    
+    Starts and quits its own browser; use DriverPool for many pages.
+    """
+    print(f"{Fore.CYAN}[DEBUG] Starting Selenium to interact with: {url}{Style.RESET_ALL}")
+    
+    driver = None
+    try:
+        # Initialize the driver
+        driver = create_chrome_driver()
+        return extract_youtube_link_with_driver(driver, url)
     
     except Exception as e:
         print(f"{Fore.RED}[DEBUG] Selenium error: {e}{Style.RESET_ALL}")
-        if 'driver' in locals():
-            driver.quit()
         return None
+    finally:
+        if driver is not None:
+            driver.quit()
+
+class DriverPool:
+    """
+    Pool of long-lived headless Chrome drivers working through a queue of pages.
+    
+    Each worker thread keeps its own driver for all the pages it handles. A
+    driver that raises an error is quit and replaced before the next page.
+    """
+    
+    def __init__(self, size):
+        self.size = size
+        self.local = threading.local()
+        self.drivers = []
+        self.lock = threading.Lock()
+        self.recycled = 0
+    
+    def _get_driver(self):
+        driver = getattr(self.local, 'driver', None)
+        if driver is None:
+            driver = create_chrome_driver()
+            self.local.driver = driver
+            with self.lock:
+                self.drivers.append(driver)
+        return driver
+    
+    def _recycle_driver(self):
+        driver = getattr(self.local, 'driver', None)
+        self.local.driver = None
+        if driver is None:
+            return
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+            self.recycled += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def extract(self, url):
+        """
+        Extract the YouTube link of one page with this thread's driver.
+        """
+        print(f"{Fore.CYAN}[DEBUG] Pool worker {threading.current_thread().name} loading: {url}{Style.RESET_ALL}")
+        try:
+            return extract_youtube_link_with_driver(self._get_driver(), url)
+        except Exception as e:
+            print(f"{Fore.RED}[DEBUG] Selenium error on {url}, recycling driver: {e}{Style.RESET_ALL}")
+            self._recycle_driver()
+            return None
+    
+    def map(self, urls):
+        """
+        Extract the YouTube links of all pages in parallel.
+        
+        Returns:
+            list: YouTube link (or None) for each URL, in order
+        """
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='selenium') as executor:
+            return list(executor.map(self.extract, urls))
+    
+    def close(self):
+        with self.lock:
+            drivers, self.drivers = self.drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark_driver_pool(urls, pool_sizes):
+    """
+    Measure pages per minute of the Selenium stage for several pool sizes.
+    
+    Args:
+        urls (list): Page URLs to load with every pool size
+        pool_sizes (list): Numbers of browsers to try
+    """
+    results = []
+    for pool_size in pool_sizes:
+        start_time = time.perf_counter()
+        with DriverPool(pool_size) as pool:
+            links = pool.map(urls)
+            recycled = pool.recycled
+        elapsed = time.perf_counter() - start_time
+        found = sum(1 for link in links if link)
+        results.append((pool_size, len(urls) / elapsed * 60, found, recycled))
+    
+    print(f"\n{Fore.CYAN}[INFO] Selenium driver pool benchmark ({len(urls)} pages){Style.RESET_ALL}")
+    for pool_size, pages_per_minute, found, recycled in results:
+        print(f"{Fore.GREEN}[INFO] pool size {pool_size}: {pages_per_minute:.1f} pages/min, "
+              f"{found}/{len(urls)} links found, {recycled} drivers recycled{Style.RESET_ALL}")
 
 def extract_youtube_link_from_html(html_content):
     """
@@ -221,73 +500,293 @@ def extract_youtube_link_from_html(html_content):
     print(f"{Fore.RED}[DEBUG] No YouTube video found in HTML{Style.RESET_ALL}")
     return None
 
+# Site the library pages are fetched from, overridable to point at a local fake server
+YC_BASE_URL = os.getenv('YC_BASE_URL', 'https://www.ycombinator.com')
+
+# Static fetch tier settings
+HTTP_TIMEOUT = (5, 20)  # (connect, read) seconds
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; ochtarcus-scraper)"}
+
+def create_http_session(pool_size):
+    """
+    Create a requests session with a keep-alive connection pool sized for
+    `pool_size` concurrent workers, retrying transient server errors.
+    """
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+def fetch_youtube_link_static(session, url):
+    """
+    Fetch a page over the pooled session and run the static HTML extractor.
+    
+    Returns:
+        str: The YouTube watch URL, or None if the page has no static embed
+    """
+    try:
+        response = session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"{Fore.RED}[DEBUG] Static fetch failed for {url}: {e}{Style.RESET_ALL}")
+        return None
+    if response.status_code != 200:
+        print(f"{Fore.RED}[DEBUG] Failed to fetch {url} (HTTP {response.status_code}){Style.RESET_ALL}")
+        return None
+    return extract_youtube_link_from_html(response.text)
+
+def fetch_youtube_link_cached(session, page_cache, page_url, url, known_link=None):
+    """
+    Like fetch_youtube_link_static, but with a conditional request through
+    the page cache. An unchanged page whose link is already known is not
+    parsed at all.
+    
+    The page's new fingerprint is deferred: the caller commits it once the
+    audio of the link is saved, so a failed download is retried on the next
+    run instead of keeping the old link.
+    
+    Returns:
+        str: The YouTube watch URL, or None if the page has no static embed
+    """
+    state, html = page_cache.fetch(session, page_url, url, timeout=HTTP_TIMEOUT, defer=True)
+    if state == 'unchanged' and known_link:
+        print(f"{Fore.GREEN}[DEBUG] Unchanged page, keeping {known_link}: {url}{Style.RESET_ALL}")
+        return known_link
+    if state == 'unchanged' and html is None:
+        # 304 Not Modified, but there is no earlier result to keep
+        state, html = page_cache.fetch(session, page_url, url, timeout=HTTP_TIMEOUT, conditional=False, defer=True)
+    return extract_youtube_link_from_html(html) if html else None
+
+def resolve_youtube_links(urls, http_workers=16, browser_workers=4, page_cache=None, page_urls=None, known_links=None):
+    """
+    Find the YouTube link of every page with a tiered fetcher.
+    
+    Tier 1 fetches all pages concurrently over a pooled HTTP session and
+    runs the static extractor. Only the pages it misses are loaded in the
+    Selenium driver pool (tier 2).
+    
+    With a page cache, tier 1 sends conditional requests and keeps the
+    known link of every unchanged page, so those pages are neither parsed
+    nor opened in a browser. The caller commits each page's fingerprint
+    once its audio is saved.
+    
+    Args:
+        urls (list): Page URLs
+        http_workers (int): Concurrent static fetches
+        browser_workers (int): Headless browsers for the pages tier 1 missed
+        page_cache (PageCache): Fingerprints of earlier runs
+        page_urls (list): Cache key of each URL (default: the URLs)
+        known_links (list): Link found by an earlier run for each URL, or None
+        
+    Returns:
+        tuple: (list of links or None in the order of urls, dict of tier statistics)
+    """
+    stats = {'pages': len(urls), 'static_hits': 0, 'browser_hits': 0, 'misses': 0,
+             'static_seconds': 0.0, 'browser_seconds': 0.0, 'browser_pages': 0}
+    
+    # Tier 1: pooled static fetch
+    start_time = time.perf_counter()
+    session = create_http_session(http_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=http_workers, thread_name_prefix='static') as executor:
+            if page_cache is None:
+                links = list(executor.map(lambda url: fetch_youtube_link_static(session, url), urls))
+            else:
+                links = list(executor.map(
+                    lambda args: fetch_youtube_link_cached(session, page_cache, *args),
+                    zip(page_urls or urls, urls, known_links or [None] * len(urls))
+                ))
+    finally:
+        session.close()
+    stats['static_seconds'] = time.perf_counter() - start_time
+    stats['static_hits'] = sum(1 for link in links if link)
+    
+    # Tier 2: headless browsers, only for the pages tier 1 missed
+    missed = [i for i, link in enumerate(links) if not link]
+    stats['browser_pages'] = len(missed)
+    if missed:
+        print(f"{Fore.YELLOW}[DEBUG] Static tier missed {len(missed)} pages, escalating to {browser_workers} browsers{Style.RESET_ALL}")
+        start_time = time.perf_counter()
+        with DriverPool(browser_workers) as pool:
+            browser_links = pool.map([urls[i] for i in missed])
+        stats['browser_seconds'] = time.perf_counter() - start_time
+        for i, link in zip(missed, browser_links):
+            links[i] = link
+        stats['browser_hits'] = sum(1 for link in browser_links if link)
+    stats['misses'] = len(urls) - stats['static_hits'] - stats['browser_hits']
+    
+    print_tier_stats(stats)
+    return links, stats
+
+def save_downloaded(data):
+    """
+    Write every item that has audio (downloaded in this run or an earlier one)
+    to yc-video-data-downloaded.json.
+    """
+    with open('yc-video-data-downloaded.json', 'w', encoding='utf-8') as f:
+        json.dump([item for item in data if item.get('mp3_file')], f, indent=2, ensure_ascii=False)
+
+def print_tier_stats(stats):
+    """
+    Print the per-tier hit rates of resolve_youtube_links.
+    """
+    pages = stats['pages'] or 1
+    print(f"\n{Fore.CYAN}[INFO] Tiered fetch results for {stats['pages']} pages:{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] static tier: {stats['static_hits']} hits ({stats['static_hits'] / pages:.1%}) "
+          f"in {stats['static_seconds']:.1f}s{Style.RESET_ALL}")
+    browser_pages = stats['browser_pages']
+    browser_rate = stats['browser_hits'] / browser_pages if browser_pages else 0.0
+    print(f"{Fore.GREEN}[INFO] browser tier: {stats['browser_hits']}/{browser_pages} escalated pages hit ({browser_rate:.1%}) "
+          f"in {stats['browser_seconds']:.1f}s{Style.RESET_ALL}")
+    if browser_pages:
+        seconds_per_page = stats['browser_seconds'] / browser_pages
+        saved = seconds_per_page * (stats['pages'] - browser_pages)
+        print(f"{Fore.GREEN}[INFO] browser time saved: ~{saved:.0f}s ({stats['pages'] - browser_pages} pages never opened in a browser){Style.RESET_ALL}")
+    else:
+        print(f"{Fore.GREEN}[INFO] browser time saved: no page needed a browser{Style.RESET_ALL}")
+    print(f"{Fore.RED if stats['misses'] else Fore.GREEN}[INFO] no link found: {stats['misses']}{Style.RESET_ALL}")
+
 def main():
+    parser = argparse.ArgumentParser(description='Find the YouTube video of each YC library page and download its audio')
+    parser.add_argument('--input', type=str, default='yc-video-data.json',
+                        help='Video items to resolve and download, when --db is not used; updated in place '
+                             '(default: yc-video-data.json)')
+    parser.add_argument('--db', type=str,
+                        help='Read items from and save results to this SQLite dataset store instead of the JSON files')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of headless browsers for pages the static fetch misses (default: 4)')
+    parser.add_argument('--http-workers', type=int, default=16,
+                        help='Number of concurrent static page fetches (default: 16)')
+    parser.add_argument('--download-workers', type=int, default=4,
+                        help='Number of parallel audio download processes (default: 4)')
+    parser.add_argument('--audio-format', choices=AUDIO_FORMATS, default=DEFAULT_AUDIO_FORMAT,
+                        help=f'native keeps the opus/m4a stream, mono is a low-bitrate mono transcode, '
+                             f'mp3 is the old 192 kbps re-encode (default: {DEFAULT_AUDIO_FORMAT})')
+    parser.add_argument('--base-url', type=str, default=YC_BASE_URL,
+                        help=f'Site to fetch the library pages from (default: $YC_BASE_URL or {YC_BASE_URL})')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Check every page again (with --db, not only those without audio); unchanged pages are skipped')
+    parser.add_argument('--page-cache', type=str, default=DEFAULT_PAGE_CACHE_PATH,
+                        help=f'ETag/Last-Modified/content hash cache of the pages (default: {DEFAULT_PAGE_CACHE_PATH})')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='Fetch and parse every page in full')
+    parser.add_argument('--changes', type=str, default='video-page-changes.json',
+                        help='Where the new/changed/unchanged page summary is written (default: video-page-changes.json)')
+    parser.add_argument('--benchmark-audio', type=int,
+                        help='Only compare bytes and time per video of every audio format on this many videos')
+    parser.add_argument('--benchmark-pool', type=str,
+                        help='Only measure pages/min for these comma-separated pool sizes, e.g. "1,2,4,8"')
+    parser.add_argument('--benchmark-pages', type=int, default=20,
+                        help='Number of pages used by --benchmark-pool (default: 20)')
+    args = parser.parse_args()
+    
     print(f"{Fore.CYAN}[DEBUG] Starting main execution{Style.RESET_ALL}")
     
-    # 1) Load the JSON data
-    with open('yc-video-data.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # 1) Load the JSON data (or only the items still missing an MP3 from the store)
+    store = DatasetStore(args.db) if args.db else None
+    if store:
+        data = list(store.iter_items('video', missing=None if args.refresh else 'mp3_file'))
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     print(f"{Fore.GREEN}[DEBUG] Loaded JSON data with {len(data)} items{Style.RESET_ALL}")
     
-    updated_data = []
-
+    # 2) Build the final URLs by prepending https://www.ycombinator.com/ (or --base-url)
+    final_urls = [args.base_url + item.get('page_url', '') for item in data]
+    
+    if args.benchmark_pool:
+        pool_sizes = [int(size) for size in args.benchmark_pool.split(',')]
+        benchmark_driver_pool(final_urls[:args.benchmark_pages], pool_sizes)
+        if store:
+            store.close()
+        return
+    
+    # 3) Fetch the pages statically first; only pages without a static embed go to the browsers
+    page_cache = None if args.no_page_cache else PageCache(args.page_cache)
+    youtube_links, _ = resolve_youtube_links(
+        final_urls, args.http_workers, args.workers, page_cache,
+        [item.get('page_url', '') for item in data], [item.get('youtube_url') for item in data]
+    )
+    if page_cache:
+        page_cache.print_summary('video pages')
+        page_cache.write_summary(args.changes)
+    
+    # 4) Queue a download for every item with a YouTube link (and no audio for that link yet)
+    jobs = []
     for i, item in enumerate(data, 1):
-        print(f"\n{Fore.CYAN}[DEBUG] Processing item {i} of {len(data)}{Style.RESET_ALL}")
-        
-        # 2) Build the final URL by prepending https://www.ycombinator.com/
-        original_path = item.get('page_url', '')
-        final_url = 'https://www.ycombinator.com' + original_path
-        print(f"{Fore.YELLOW}[DEBUG] Processing URL: {final_url}{Style.RESET_ALL}")
-        
-        # 3) First try using Selenium to interact with the page and get the YouTube link
-        youtube_link = extract_youtube_link_with_selenium(final_url)
-        
-        print(f"\n{Fore.CYAN}[DEBUG] YouTube link extraction status for item {i}:{Style.RESET_ALL}")
-        # 4) If Selenium approach fails, try the static HTML approach as fallback
-        if not youtube_link:
-            print(f"{Fore.YELLOW}[DEBUG] Selenium approach failed, trying static HTML approach{Style.RESET_ALL}")
-            # Fetch the HTML
-            response = requests.get(final_url)
-            if response.status_code != 200:
-                print(f"{Fore.RED}[DEBUG] Failed to fetch {final_url}{Style.RESET_ALL}")
-                continue
-            
-            html_content = response.text
-            print(f"{Fore.GREEN}[DEBUG] Successfully fetched HTML content{Style.RESET_ALL}")
-            
-            # Extract the YouTube link from the HTML
-            youtube_link = extract_youtube_link_from_html(html_content)
-            
-        if not youtube_link:
-            print(f"{Fore.RED}[DEBUG] No YouTube link found on {final_url}{Style.RESET_ALL}")
+        if not youtube_links[i - 1]:
+            print(f"{Fore.RED}[DEBUG] No YouTube link found on {final_urls[i - 1]}{Style.RESET_ALL}")
             continue
-        
-        print(f"\n{Fore.CYAN}[DEBUG] Starting download for item {i}:{Style.RESET_ALL}")
-        # 5) Download the video as an MP3
-        mp3_filename = item.get('name_video', 'untitled_video').replace(' ', '_')
-        print(f"{Fore.YELLOW}[DEBUG] Using filename: {mp3_filename}{Style.RESET_ALL}")
-        
-        try:
-            saved_mp3_path = download_youtube_as_mp3(youtube_link, mp3_filename)
-            print(f"{Fore.GREEN}[DEBUG] Successfully downloaded MP3 to: {saved_mp3_path}{Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.RED}[DEBUG] Error downloading {youtube_link}: {e}{Style.RESET_ALL}")
+        if item.get('youtube_url') == youtube_links[i - 1] and item.get('mp3_file') and os.path.exists(item['mp3_file']):
+            if page_cache:
+                page_cache.commit(item['page_url'])
+            continue
+        if item.get('youtube_url') and item['youtube_url'] != youtube_links[i - 1]:
+            # The page embeds another video now: its audio, transcript and translations are stale
+            print(f"{Fore.YELLOW}[DEBUG] Video changed on {final_urls[i - 1]}, downloading it again{Style.RESET_ALL}")
+            for field in ('mp3_file', 'mp3_content', 'mp3_utterances'):
+                item.pop(field, None)
+            if store:
+                store.update_fields('video', item['page_url'], mp3_file=None, mp3_content=None, mp3_utterances=None)
+        audio_filename = item.get('name_video', 'untitled_video').replace(' ', '_')
+        jobs.append((i, youtube_links[i - 1], audio_filename, args.audio_format))
+    
+    if args.benchmark_audio:
+        benchmark_audio_formats([job[1] for job in jobs[:args.benchmark_audio]], args.download_workers)
+        if store:
+            store.close()
+        if page_cache:
+            page_cache.close()
+        return
+    
+    # 5) Download the audio in parallel worker processes, saving each item as it finishes
+    print(f"\n{Fore.CYAN}[DEBUG] Downloading {len(jobs)} videos as {args.audio_format} audio with {args.download_workers} workers{Style.RESET_ALL}")
+    updated_data = []
+    total_bytes = 0
+    start_time = time.perf_counter()
+    for result in download_audio_parallel(jobs, args.download_workers):
+        i = result['index']
+        item = data[i - 1]
+        if result['error']:
+            print(f"{Fore.RED}[DEBUG] Error downloading {youtube_links[i - 1]}: {result['error']}{Style.RESET_ALL}")
             continue
+        total_bytes += result['bytes']
+        print(f"{Fore.GREEN}[DEBUG] Item {i}: downloaded {result['bytes'] / 1024 / 1024:.2f} MB to {result['path']} in {result['seconds']:.1f}s{Style.RESET_ALL}")
         
-        # 6) Store the YouTube link in the item dictionary
-        item['youtube_url'] = youtube_link
-        item['mp3_file'] = saved_mp3_path
+        # 6) Store the YouTube link and audio file in the item dictionary
+        item['youtube_url'] = youtube_links[i - 1]
+        item['mp3_file'] = result['path']
         
         updated_data.append(item)
         print(f"{Fore.GREEN}[DEBUG] Added item {i} to updated data{Style.RESET_ALL}")
         
-        # Save both JSON files after each successful download
-        with open('yc-video-data-downloaded.json', 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, indent=2, ensure_ascii=False)
-        with open('yc-video-data.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"{Fore.GREEN}[DEBUG] Updated both JSON files after item {i}{Style.RESET_ALL}")
+        # With a store only this row is written; otherwise save both JSON files after each successful download
+        if store:
+            store.update_fields('video', item['page_url'], youtube_url=item['youtube_url'], mp3_file=item['mp3_file'])
+            print(f"{Fore.GREEN}[DEBUG] Updated dataset store row after item {i}{Style.RESET_ALL}")
+        else:
+            save_downloaded(data)
+            with open(args.input, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            print(f"{Fore.GREEN}[DEBUG] Updated both JSON files after item {i}{Style.RESET_ALL}")
+        # Only now that the new link and its audio are saved does the page count as seen
+        if page_cache:
+            page_cache.commit(item['page_url'])
+    
+    if not store and not updated_data:
+        # Nothing new, but the list still reflects the audio that is already there
+        save_downloaded(data)
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"{Fore.GREEN}[DEBUG] Downloaded {len(updated_data)}/{len(jobs)} videos, {total_bytes / 1024 / 1024:.1f} MB on disk, "
+          f"{elapsed:.1f}s wall time{Style.RESET_ALL}")
     
+    if store:
+        store.close()
+    if page_cache:
+        page_cache.close()
     print(f"\n{Fore.GREEN}[DEBUG] Completed processing all {len(data)} items{Style.RESET_ALL}")
 
 if __name__ == '__main__':
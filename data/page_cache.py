@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import requests
+from colorama import init, Fore, Style
+
+# Default location of the cache, next to the scraped data
+DEFAULT_CACHE_PATH = 'page-cache.sqlite'
+
+# Page states of a refresh, in the order they are reported
+PAGE_STATES = ('new', 'changed', 'unchanged', 'failed')
+
+# Parts of a page that differ between two fetches of the same content
+VOLATILE_PATTERNS = [
+    re.compile(r'<!--.*?-->', re.S),                                   # Comments (build stamps, timings)
+    re.compile(r'\s(?:nonce|integrity)="[^"]*"'),                      # Per-request CSP nonces, asset hashes
+    re.compile(r'<meta[^>]+name="csrf-[^"]*"[^>]*>'),                  # CSRF tokens
+    re.compile(r'"buildId":"[^"]*"'),                                  # Next.js build id in __NEXT_DATA__
+    re.compile(r'/_next/static/[\w-]+/'),                              # Build-specific asset directories
+    re.compile(r'\?(?:v|ver|_)=[\w.-]+(?=["\'])'),                     # Cache-busting query strings
+]
+WHITESPACE = re.compile(r'\s+')
+
+
+def content_hash(html):
+    """
+    SHA-256 of a page with volatile markup removed and whitespace collapsed,
+    so two fetches of an unchanged page hash the same even when the server
+    does not support conditional requests.
+
+    Args:
+        html (str): Page HTML
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    for pattern in VOLATILE_PATTERNS:
+        html = pattern.sub('', html)
+    html = WHITESPACE.sub(' ', html).strip()
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """
+    Persistent SQLite cache of page fingerprints keyed by page_url.
+
+    For every page it keeps the ETag, Last-Modified and content_hash of the
+    last fetch, sends them back as a conditional request and classifies the
+    page as new, changed, unchanged or failed. The states of the current run
+    are kept in `states` for write_summary. Safe to use from several threads.
+
+    With fetch(defer=True) the new fingerprint is only stored by commit(),
+    which the caller runs once the results extracted from the page are
+    saved. A page whose processing failed keeps its old fingerprint, so the
+    next run fetches it in full again instead of getting a 304.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.states = {}
+        self.pending = {}  # page_url -> fingerprint waiting for commit()
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                page_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                changed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def _row(self, page_url):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT etag, last_modified, content_hash FROM pages WHERE page_url = ?", (page_url,)
+            ).fetchone()
+
+    def fetch(self, session, page_url, url=None, timeout=None, conditional=True, defer=False):
+        """
+        Fetch a page, conditionally if it was fetched before.
+
+        Args:
+            session (requests.Session): Session to fetch with
+            page_url (str): Key of the page
+            url (str): URL to fetch (default: page_url)
+            timeout: requests timeout
+            conditional (bool): Send If-None-Match / If-Modified-Since
+            defer (bool): Keep the new fingerprint until commit(page_url)
+
+        Returns:
+            tuple: (state, html). state is one of PAGE_STATES; html is None
+                when the server answered 304 Not Modified or the fetch failed
+        """
+        row = self._row(page_url)
+        headers = {}
+        if row and conditional:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        try:
+            response = session.get(url or page_url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"{Fore.RED}[DEBUG] Fetch failed for {url or page_url}: {e}{Style.RESET_ALL}")
+            return self._record(page_url, 'failed'), None
+
+        now = time.time()
+        if response.status_code == 304 and row:
+            with self.lock:
+                self.connection.execute("UPDATE pages SET checked_at = ? WHERE page_url = ?", (now, page_url))
+                self.connection.commit()
+            return self._record(page_url, 'unchanged'), None
+        if response.status_code != 200:
+            print(f"{Fore.RED}[DEBUG] Failed to fetch {url or page_url} (HTTP {response.status_code}){Style.RESET_ALL}")
+            return self._record(page_url, 'failed'), None
+
+        html = response.text
+        digest = content_hash(html)
+        if row is None:
+            state = 'new'
+        elif row[2] == digest:
+            state = 'unchanged'
+        else:
+            state = 'changed'
+        fingerprint = (response.headers.get('ETag'), response.headers.get('Last-Modified'), digest, now)
+        if defer:
+            with self.lock:
+                self.pending[page_url] = fingerprint
+        else:
+            self._store(page_url, *fingerprint)
+        return self._record(page_url, state), html
+
+    def _store(self, page_url, etag, last_modified, digest, now):
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO pages (page_url, etag, last_modified, content_hash, checked_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(page_url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash, checked_at = excluded.checked_at,
+                    changed_at = CASE WHEN pages.content_hash = excluded.content_hash
+                                      THEN pages.changed_at ELSE excluded.changed_at END
+                """,
+                (page_url, etag, last_modified, digest, now, now)
+            )
+            self.connection.commit()
+
+    def commit(self, page_url):
+        """
+        Store the fingerprint of a deferred fetch, once the page's results are saved.
+
+        Returns:
+            bool: True if there was a fingerprint to store (pages answered
+                with 304 have none)
+        """
+        with self.lock:
+            fingerprint = self.pending.pop(page_url, None)
+        if fingerprint is None:
+            return False
+        self._store(page_url, *fingerprint)
+        return True
+
+    def _record(self, page_url, state):
+        with self.lock:
+            # A page fetched twice in one run (e.g. 304 then a full fetch) keeps its first state
+            self.states.setdefault(page_url, state)
+            return self.states[page_url]
+
+    def forget(self, page_url):
+        """
+        Drop a page's fingerprint so the next run fetches and extracts it in full.
+        """
+        with self.lock:
+            self.pending.pop(page_url, None)
+            self.connection.execute("DELETE FROM pages WHERE page_url = ?", (page_url,))
+            self.connection.commit()
+
+    def summary(self):
+        """
+        Returns:
+            dict: page_urls of this run grouped by state
+        """
+        with self.lock:
+            groups = {state: [] for state in PAGE_STATES}
+            for page_url, state in self.states.items():
+                groups[state].append(page_url)
+        return {state: sorted(page_urls) for state, page_urls in groups.items()}
+
+    def write_summary(self, path):
+        """
+        Write the summary of this run as JSON, for the later stages to read.
+        """
+        summary = {'checked_at': time.time(), **self.summary()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    def print_summary(self, label='pages'):
+        counts = {state: len(page_urls) for state, page_urls in self.summary().items()}
+        print(f"{Fore.CYAN}[INFO] {sum(counts.values())} {label} checked: {counts['new']} new, "
+              f"{counts['changed']} changed, {counts['unchanged']} unchanged, {counts['failed']} failed{Style.RESET_ALL}")
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Show what the page fingerprint cache holds')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Page cache (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--forget', type=str, nargs='*', default=[],
+                        help='Drop these page_urls so they are scraped again in full')
+    args = parser.parse_args()
+
+    cache = PageCache(args.cache_path)
+    for page_url in args.forget:
+        cache.forget(page_url)
+        print(f"{Fore.YELLOW}[INFO] Forgot {page_url}{Style.RESET_ALL}")
+    entries, validators = cache.connection.execute(
+        "SELECT COUNT(*), COALESCE(SUM(etag IS NOT NULL OR last_modified IS NOT NULL), 0) FROM pages"
+    ).fetchone()
+    print(f"{Fore.GREEN}[INFO] {entries} pages in {args.cache_path}, "
+          f"{validators} with an ETag or Last-Modified validator{Style.RESET_ALL}")
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,497 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from colorama import init, Fore, Style
+from dataset_store import DatasetStore
+from page_cache import PageCache, DEFAULT_CACHE_PATH as PAGE_CACHE_PATH
+from transcription_cache import TranscriptionCache
+
+# Initialize colorama
+init()
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(DATA_DIR)
+
+# The atomic JSON writer lives next to translate-data.py in the repository root
+sys.path.append(ROOT_DIR)
+from translation_journal import write_json_atomic
+
+# The stage scripts have hyphenated names, so they are loaded from their paths
+STAGE_SCRIPTS = {
+    'get_yc_video': os.path.join(DATA_DIR, 'get-yc-video.py'),
+    'get_yc_video_transcription': os.path.join(DATA_DIR, 'get-yc-video-transcription.py'),
+    'translate_data': os.path.join(ROOT_DIR, 'translate-data.py'),
+}
+
+# Items waiting between two stages; a full queue blocks the stage before it
+DEFAULT_QUEUE_SIZE = 8
+
+# Sentinel telling a stage worker that its upstream has finished
+STOP = object()
+
+
+def load_script(name):
+    """
+    Import one of STAGE_SCRIPTS as a module called `name`.
+
+    The module is registered in sys.modules so functions defined in it can be
+    pickled into worker processes (which call this as their initializer).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    for path in (DATA_DIR, ROOT_DIR):
+        if path not in sys.path:
+            sys.path.append(path)
+    spec = importlib.util.spec_from_file_location(name, STAGE_SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+class StageStats:
+    """
+    Counters and timings of one pipeline stage.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0  # Time spent blocked on a full downstream queue
+
+    def report(self):
+        average = self.busy_seconds / self.done if self.done else 0.0
+        color = Fore.RED if self.failed else Fore.GREEN
+        print(f"{color}[INFO] {self.name:<10} workers={self.workers:<3} done={self.done:<5} skipped={self.skipped:<5} "
+              f"failed={self.failed:<4} avg {average:.1f}s/item, blocked on downstream {self.wait_seconds:.1f}s{Style.RESET_ALL}")
+
+
+async def run_stage(stats, handler, inbox, outbox, downstream_workers):
+    """
+    Run `stats.workers` workers that take items from inbox, process them with
+    handler and pass them on to outbox as soon as each one is done.
+
+    Args:
+        stats (StageStats): Stage counters (also gives the number of workers)
+        handler: async function(item) returning True if it did work, False if
+            the item needed nothing from this stage, or raising on failure
+        inbox (asyncio.Queue): Items from the previous stage
+        outbox (asyncio.Queue): Queue of the next stage, or None for the last stage
+        downstream_workers (int): Number of workers reading outbox
+    """
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is STOP:
+                return
+            start_time = time.perf_counter()
+            try:
+                did_work = await handler(item)
+            except Exception as e:
+                stats.failed += 1
+                print(f"{Fore.RED}[ERROR] {stats.name} failed for {item.get('name_video', 'Unnamed')}: {e}{Style.RESET_ALL}")
+                continue
+            if did_work:
+                stats.done += 1
+                stats.busy_seconds += time.perf_counter() - start_time
+            else:
+                stats.skipped += 1
+            if outbox is not None:
+                start_time = time.perf_counter()
+                await outbox.put(item)
+                stats.wait_seconds += time.perf_counter() - start_time
+
+    await asyncio.gather(*(worker() for _ in range(stats.workers)))
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            await outbox.put(STOP)
+
+
+class VideoPipeline:
+    """
+    Streaming scrape -> download -> transcribe -> translate pipeline.
+
+    Every stage runs its own pool of workers, connected to the next stage by
+    a bounded queue, so a video moves on the moment its previous stage is
+    done instead of waiting for the whole corpus. Blocking work (page fetches,
+    browsers, yt-dlp) runs in executors sized to each stage's concurrency.
+    Stages that an item already has a result for are skipped. With a page
+    cache (refresh), every page is checked again with a conditional request;
+    a page that now embeds another video has its later results cleared.
+    """
+
+    def __init__(self, target_languages=None, store=None, audio_format=None,
+                 scrape_workers=8, browser_workers=2, download_workers=4,
+                 transcribe_workers=8, translate_workers=8, queue_size=DEFAULT_QUEUE_SIZE, chunked=False,
+                 page_cache=None):
+        self.gyv = load_script('get_yc_video')
+        self.transcription = load_script('get_yc_video_transcription')
+        self.translation = load_script('translate_data') if target_languages else None
+        self.target_languages = target_languages or []
+        self.store = store
+        self.audio_format = audio_format or self.gyv.DEFAULT_AUDIO_FORMAT
+        self.queue_size = queue_size
+        self.chunked = chunked
+        self.browser_workers = browser_workers
+        self.page_cache = page_cache
+        self.saved_pages = []  # page_urls to commit to the page cache once the output file is written
+        self.stats = {
+            'scrape': StageStats('scrape', scrape_workers),
+            'download': StageStats('download', download_workers),
+            'transcribe': StageStats('transcribe', transcribe_workers),
+        }
+        if self.target_languages:
+            self.stats['translate'] = StageStats('translate', translate_workers)
+        # page_url -> translated item, and page_url -> source field hashes it was translated from, per language
+        self.translations = {language: {} for language in self.target_languages}
+        self.manifests = {language: {} for language in self.target_languages}
+        self.started_at = {}
+        self.positions = {}
+        self.latencies = []
+        self.first_item_seconds = None
+
+    def _save(self, item, **fields):
+        if self.store:
+            self.store.update_fields('video', item['page_url'], **fields)
+
+    async def scrape(self, item):
+        if item.get('youtube_url') and self.page_cache is None:
+            return False
+        loop = asyncio.get_running_loop()
+        url = self.gyv.YC_BASE_URL + item.get('page_url', '')
+        if self.page_cache is None:
+            link = await loop.run_in_executor(self.http_executor, self.gyv.fetch_youtube_link_static, self.session, url)
+        else:
+            link = await loop.run_in_executor(
+                self.http_executor, self.gyv.fetch_youtube_link_cached,
+                self.session, self.page_cache, item['page_url'], url, item.get('youtube_url')
+            )
+        if not link:
+            # Only pages without a static embed are opened in a browser
+            link = await loop.run_in_executor(self.browser_executor, self.driver_pool.extract, url)
+        if item.get('youtube_url') and link in (None, item['youtube_url']):
+            return False  # Same video (or the page could not be checked again): keep the earlier results
+        if not link:
+            raise RuntimeError(f"No YouTube link found on {url}")
+        if item.get('youtube_url'):
+            # Another video: the audio, transcript and translations of the old one are stale
+            for field in ('mp3_file', 'mp3_content', 'mp3_utterances'):
+                item.pop(field, None)
+            for language in self.target_languages:
+                self.translations[language].pop(item['page_url'], None)
+                self.manifests[language].pop(item['page_url'], None)
+            self._save(item, mp3_file=None, mp3_content=None, mp3_utterances=None)
+        item['youtube_url'] = link
+        self._save(item, youtube_url=link)
+        return True
+
+    def _commit_page(self, item):
+        # The page's new fingerprint is stored only once its audio is saved (see PageCache.commit).
+        # Without a store the results reach disk at the end of the run, so the commit waits until then.
+        if self.page_cache is None:
+            return
+        if self.store:
+            self.page_cache.commit(item['page_url'])
+        else:
+            self.saved_pages.append(item['page_url'])
+
+    async def download(self, item):
+        if item.get('mp3_content'):
+            self._commit_page(item)
+            return False
+        if item.get('mp3_file') and os.path.exists(os.path.join('downloaded', os.path.basename(item['mp3_file']))):
+            self._commit_page(item)
+            return False
+        loop = asyncio.get_running_loop()
+        audio_filename = item.get('name_video', 'untitled_video').replace(' ', '_')
+        result = await loop.run_in_executor(
+            self.process_executor, self.gyv.download_audio_job,
+            (0, item['youtube_url'], audio_filename, self.audio_format)
+        )
+        if result['error']:
+            raise RuntimeError(result['error'])
+        item['mp3_file'] = result['path']
+        self._save(item, mp3_file=result['path'])
+        self._commit_page(item)
+        return True
+
+    async def transcribe(self, item):
+        if item.get('mp3_content'):
+            return False
+        position = self.positions[item['page_url']]
+        if not await self.transcription.process_item(item, position, len(self.positions), self.chunked):
+            raise RuntimeError("Transcription failed")
+        self._save(item, mp3_content=item['mp3_content'], mp3_utterances=item.get('mp3_utterances'))
+        return True
+
+    async def translate(self, item):
+        # Like translate-data.py --delta: a translation is kept only while the source
+        # fields still hash as recorded in the manifest; changed fields are translated again
+        source_hashes = self.translation.hash_source_fields(item, 'video')
+        plans = {}  # language -> fields to translate (None: the whole item)
+        for language in self.target_languages:
+            if item['page_url'] not in self.translations[language]:
+                plans[language] = None
+                continue
+            recorded = self.manifests[language].get(item['page_url'], {})
+            changed = {field for field, field_hash in source_hashes.items() if recorded.get(field) != field_hash}
+            if changed:
+                plans[language] = changed
+        if not plans:
+            return False
+        results = await asyncio.gather(
+            *(self.translation.translate_video_data(item, language, fields) for language, fields in plans.items())
+        )
+        failed = []
+        for (language, fields), translated_item in zip(plans.items(), results):
+            if fields is not None:
+                # Keep the earlier translations of the fields that did not change
+                self.translation.copy_translated_fields(
+                    translated_item, self.translations[language][item['page_url']], set(source_hashes) - fields, 'video'
+                )
+            if any(self.translation.has_translation_error(translated_item.get(field))
+                   for field in self.translation.VIDEO_TRANSLATED_FIELDS):
+                failed.append(language)
+            else:
+                self.translations[language][item['page_url']] = translated_item
+                self.manifests[language][item['page_url']] = source_hashes
+        if failed:
+            raise RuntimeError(f"Translation failed for {', '.join(failed)}")
+        return True
+
+    def load_translations(self):
+        for language in self.target_languages:
+            path = os.path.join('translation', language.lower(), 'video-data.json')
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.translations[language] = {item['page_url']: item for item in json.load(f)}
+            manifest_path = os.path.splitext(path)[0] + '.manifest.json'
+            if os.path.exists(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifests[language] = json.load(f)
+
+    def save_translations(self, items):
+        """
+        Write every language's video-data.json in the order of the source items,
+        with the manifest translate-data.py --delta reads next to it.
+        """
+        for language in self.target_languages:
+            translation_dir = os.path.join('translation', language.lower())
+            os.makedirs(translation_dir, exist_ok=True)
+            translated = self.translations[language]
+            ordered = [translated[item['page_url']] for item in items if item['page_url'] in translated]
+            known = {item['page_url'] for item in items}
+            ordered += [item for page_url, item in translated.items() if page_url not in known]
+            write_json_atomic(os.path.join(translation_dir, 'video-data.json'), ordered)
+            manifest = {item['page_url']: self.manifests[language][item['page_url']]
+                        for item in ordered if item['page_url'] in self.manifests[language]}
+            write_json_atomic(os.path.join(translation_dir, 'video-data.manifest.json'), manifest)
+
+    async def feed(self, items, queue, downstream_workers):
+        self.positions = {item['page_url']: i for i, item in enumerate(items, 1)}
+        for item in items:
+            self.started_at[item['page_url']] = time.perf_counter()
+            await queue.put(item)
+        for _ in range(downstream_workers):
+            await queue.put(STOP)
+
+    async def finish(self, queue):
+        # Drain the last queue, recording how long each item took end to end
+        while True:
+            item = await queue.get()
+            if item is STOP:
+                return
+            now = time.perf_counter()
+            self.latencies.append(now - self.started_at[item['page_url']])
+            if self.first_item_seconds is None:
+                self.first_item_seconds = now - self.run_started_at
+            print(f"{Fore.GREEN}[INFO] Finished {item.get('name_video', 'Unnamed')} "
+                  f"in {self.latencies[-1]:.1f}s ({len(self.latencies)} done){Style.RESET_ALL}")
+
+    async def run(self, items):
+        """
+        Push items through every stage.
+
+        Args:
+            items (list): Video items (updated in place)
+        """
+        self.load_translations()
+        stages = [(stats, getattr(self, name)) for name, stats in self.stats.items()]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+
+        scrape_workers = self.stats['scrape'].workers
+        self.session = self.gyv.create_http_session(scrape_workers)
+        self.http_executor = ThreadPoolExecutor(max_workers=scrape_workers, thread_name_prefix='static')
+        # DriverPool keeps one browser per thread, so this executor bounds the browser count
+        self.driver_pool = self.gyv.DriverPool(self.browser_workers)
+        self.browser_executor = ThreadPoolExecutor(max_workers=self.browser_workers, thread_name_prefix='browser')
+        self.process_executor = ProcessPoolExecutor(
+            max_workers=self.stats['download'].workers, initializer=load_script, initargs=('get_yc_video',)
+        )
+
+        self.run_started_at = time.perf_counter()
+        try:
+            await asyncio.gather(
+                self.feed(items, queues[0], stages[0][0].workers),
+                *(
+                    run_stage(stats, handler, queues[i], queues[i + 1],
+                              stages[i + 1][0].workers if i + 1 < len(stages) else 1)
+                    for i, (stats, handler) in enumerate(stages)
+                ),
+                self.finish(queues[-1]),
+            )
+        finally:
+            self.session.close()
+            self.http_executor.shutdown()
+            self.browser_executor.shutdown()
+            self.driver_pool.close()
+            self.process_executor.shutdown()
+            if self.target_languages:
+                self.save_translations(items)
+        self.report(time.perf_counter() - self.run_started_at)
+
+    def report(self, elapsed):
+        if self.page_cache is not None:
+            self.page_cache.print_summary('video pages')
+        print(f"\n{Fore.CYAN}[INFO] === PIPELINE COMPLETED in {elapsed:.1f}s ===={Style.RESET_ALL}")
+        for stats in self.stats.values():
+            stats.report()
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            print(f"{Fore.GREEN}[INFO] {len(latencies)} items through every stage; first finished after "
+                  f"{self.first_item_seconds:.1f}s, end-to-end latency p50 {latencies[len(latencies) // 2]:.1f}s, "
+                  f"max {latencies[-1]:.1f}s{Style.RESET_ALL}")
+
+
+def load_json_items(input_path, output_path):
+    """
+    Load the input items, merged with the results already in the output
+    file so finished stages are not run again.
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    if os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            done = {item['page_url']: item for item in json.load(f) if item.get('page_url')}
+        for item in items:
+            for key, value in done.pop(item.get('page_url'), {}).items():
+                item.setdefault(key, value)
+        # Keep finished items that are no longer in the input
+        items += list(done.values())
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Stream YC videos through scrape -> download -> transcribe -> translate with bounded queues between stages'
+    )
+    parser.add_argument('--db', type=str,
+                        help='Read items from and save each stage result to this SQLite dataset store')
+    parser.add_argument('--input', type=str, default='yc-video-data.json',
+                        help='Scraped video items, when --db is not used (default: yc-video-data.json)')
+    parser.add_argument('--output', type=str, default='video-data-updated.json',
+                        help='Merged results, when --db is not used (default: video-data-updated.json)')
+    parser.add_argument('--languages', type=str, nargs='*', default=[],
+                        help='Also translate into these languages, e.g. "--languages turkish french" or "--languages all"')
+    parser.add_argument('--audio-format', type=str, default=None,
+                        help='Audio format passed to get-yc-video.py (native, mono or mp3)')
+    parser.add_argument('--scrape-workers', type=int, default=8,
+                        help='Concurrent static page fetches (default: 8)')
+    parser.add_argument('--browser-workers', type=int, default=2,
+                        help='Headless browsers for pages without a static embed (default: 2)')
+    parser.add_argument('--download-workers', type=int, default=4,
+                        help='Parallel audio download processes (default: 4)')
+    parser.add_argument('--transcribe-workers', type=int, default=8,
+                        help='Concurrent transcriptions (default: 8)')
+    parser.add_argument('--translate-workers', type=int, default=8,
+                        help='Items translated at the same time (default: 8)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Items buffered between two stages (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--chunked', action='store_true',
+                        help='Transcribe long audio as concurrent chunks split at pauses')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the APIs, ignoring the transcription and translation caches')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Check every page again with conditional requests; only pages whose video changed are redone')
+    parser.add_argument('--page-cache', type=str, default=PAGE_CACHE_PATH,
+                        help=f'Page fingerprint cache used by --refresh (default: {PAGE_CACHE_PATH})')
+    parser.add_argument('--changes', type=str, default='video-page-changes.json',
+                        help='Where --refresh writes the new/changed/unchanged page summary (default: video-page-changes.json)')
+    parser.add_argument('--limit', type=int,
+                        help='Only process the first N items')
+    args = parser.parse_args()
+
+    target_languages = []
+    if args.languages:
+        translation = load_script('translate_data')
+        requested = [language.strip().lower() for value in args.languages for language in value.split(',') if language.strip()]
+        if 'all' in requested:
+            requested = list(translation.SUPPORTED_LANGUAGES)
+        for language in requested:
+            if language not in translation.SUPPORTED_LANGUAGES:
+                print(f"{Fore.RED}[ERROR] Unsupported language: {language}{Style.RESET_ALL}")
+                return
+        target_languages = [translation.SUPPORTED_LANGUAGES[language] for language in dict.fromkeys(requested)]
+        if not args.no_cache:
+            translation.engine.cache = translation.TranslationCache(translation.DEFAULT_CACHE_PATH)
+
+    transcription = load_script('get_yc_video_transcription')
+    if not args.no_cache:
+        transcription.transcription_cache = TranscriptionCache()
+
+    store = DatasetStore(args.db) if args.db else None
+    if store:
+        items = list(store.iter_items('video'))
+    else:
+        items = load_json_items(args.input, args.output)
+    if args.limit:
+        items = items[:args.limit]
+    print(f"{Fore.GREEN}[INFO] Loaded {len(items)} video items{Style.RESET_ALL}")
+
+    pipeline = VideoPipeline(
+        target_languages=target_languages,
+        store=store,
+        audio_format=args.audio_format,
+        scrape_workers=args.scrape_workers,
+        browser_workers=args.browser_workers,
+        download_workers=args.download_workers,
+        transcribe_workers=args.transcribe_workers,
+        translate_workers=args.translate_workers,
+        queue_size=args.queue_size,
+        chunked=args.chunked,
+        page_cache=PageCache(args.page_cache) if args.refresh else None,
+    )
+    try:
+        asyncio.run(pipeline.run(items))
+    finally:
+        if target_languages and translation.engine.cache is not None:
+            translation.engine.cache.close()
+        if transcription.transcription_cache is not None:
+            transcription.transcription_cache.close()
+        if store:
+            store.close()
+        else:
+            write_json_atomic(args.output, items)
+            print(f"{Fore.GREEN}[INFO] Results saved to {args.output}{Style.RESET_ALL}")
+        if pipeline.page_cache is not None:
+            for page_url in pipeline.saved_pages:
+                pipeline.page_cache.commit(page_url)
+            pipeline.page_cache.write_summary(args.changes)
+            pipeline.page_cache.close()
+
+
+if __name__ == '__main__':
+    main()
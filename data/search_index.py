@@ -0,0 +1,656 @@
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import time
+import bisect
+import random
+import struct
+import argparse
+import unicodedata
+from array import array
+from itertools import accumulate
+from colorama import init, Fore, Style
+from dataset_store import DatasetStore
+from categories import CategoryIndex
+
+# Where build writes the index (index.json plus one file per shard)
+DEFAULT_INDEX_DIR = 'search-index'
+
+# Documents per shard file
+DEFAULT_SHARD_DOCS = 64
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Characters of text around the best match returned as the snippet
+SNIPPET_CHARS = 240
+
+# Indexed fields of a document, in position order
+FIELDS = ('name', 'description', 'content')
+
+TOKEN = re.compile(r"[^\W_]+")
+PHRASE = re.compile(r'"([^"]*)"')
+
+SHARD_MAGIC = b'YCBM25\x02\x00'
+# magic, doc_count, term_count, token_count, then the offset of each section
+SHARD_HEADER = struct.Struct('<8s3I8I')
+DOC_FIELDS = 6  # token count, description start, content start, name/description/content chars
+
+# The character offset of every CHECKPOINT_STRIDE-th token is kept for snippets
+CHECKPOINT_STRIDE = 8
+
+# Positions left empty between two fields, so no phrase matches across them
+FIELD_GAP = 16
+
+# Normalized form of every token seen, as normalizing is the slow part of tokenizing
+_normal_forms = {}
+
+
+def normalize_token(token):
+    """
+    Case-fold a token and strip its accents ("Café" -> "cafe").
+    """
+    normal = _normal_forms.get(token)
+    if normal is None:
+        normal = token.casefold()
+        if not normal.isascii():
+            normal = ''.join(c for c in unicodedata.normalize('NFKD', normal) if not unicodedata.combining(c))
+        _normal_forms[token] = normal
+    return normal
+
+
+def tokenize(text):
+    """
+    Split text into normalized word tokens.
+
+    Returns:
+        list: (token, start, end) with character offsets into text
+    """
+    return [(normalize_token(match.group()), match.start(), match.end()) for match in TOKEN.finditer(text)]
+
+
+def parse_query(query):
+    """
+    Split a query into loose terms and "quoted phrases".
+
+    Returns:
+        tuple: (list of terms, list of phrases as lists of terms)
+    """
+    phrases = [terms for terms in ([token for token, _, _ in tokenize(phrase)] for phrase in PHRASE.findall(query)) if terms]
+    terms = [token for token, _, _ in tokenize(PHRASE.sub(' ', query))]
+    return terms, phrases
+
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(data):
+    """
+    Decode a buffer of unsigned LEB128 varints.
+
+    Returns:
+        list: The decoded integers
+    """
+    if data.isascii():
+        return list(data)  # Every value fits in one byte
+    values = []
+    value = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            values.append(value | (byte << shift))
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    return values
+
+
+def load_documents(video_path='video-data-updated.json', blog_path='blog-data.json', store=None):
+    """
+    Read the video and blog datasets as search documents.
+
+    Args:
+        video_path (str): Video items with mp3_content
+        blog_path (str): Blog items with content.whole_content
+        store (DatasetStore): Read both kinds from this store instead
+
+    Returns:
+        list: dicts with page_url, kind, name, description, content and related_categories
+    """
+    if store:
+        videos = list(store.iter_items('video'))
+        blogs = list(store.iter_items('blog'))
+    else:
+        videos, blogs = [], []
+        if os.path.exists(video_path):
+            with open(video_path, 'r', encoding='utf-8') as f:
+                videos = json.load(f)
+        if os.path.exists(blog_path):
+            with open(blog_path, 'r', encoding='utf-8') as f:
+                blogs = json.load(f)
+    documents = []
+    for item in videos:
+        documents.append({
+            'page_url': item['page_url'], 'kind': 'video',
+            'name': item.get('name_video') or '', 'description': item.get('description_video') or '',
+            'content': item.get('mp3_content') or '', 'related_categories': item.get('related_categories') or [],
+        })
+    for item in blogs:
+        documents.append({
+            'page_url': item['page_url'], 'kind': 'blog',
+            'name': item.get('name_blog') or '', 'description': item.get('description_blog') or '',
+            'content': (item.get('content') or {}).get('whole_content') or '',
+            'related_categories': item.get('related_categories') or [],
+        })
+    return documents
+
+
+def write_shard(path, documents):
+    """
+    Write the inverted index of some documents to one shard file.
+
+    Layout (little-endian): header, then
+        doc table     uint32[doc_count * DOC_FIELDS]
+        checkpoint index uint32[doc_count + 1] first checkpoint of each document
+        checkpoints   uint32[]               character offset, in its field, of every
+                                             CHECKPOINT_STRIDE-th position of a document
+                                             (the field's length in the gaps between fields)
+        term offsets  uint32[term_count + 1] into the term blob (terms sorted)
+        term dfs      uint32[term_count]
+        postings offs uint32[term_count + 1] into the postings blob
+        term blob     UTF-8 terms
+        postings blob per term: varint header size, then a header of varint
+                      (doc delta, tf, position bytes) per document, then the
+                      delta-encoded varint positions of each document
+    """
+    doc_table = array('I')
+    checkpoint_index = array('I', [0])
+    checkpoints = array('I')
+    token_count = 0
+    postings = {}  # term -> list of (doc, positions)
+    for doc, document in enumerate(documents):
+        position = 0
+        field_starts = []
+        term_positions = {}
+        for index, field in enumerate(FIELDS):
+            if index:
+                # Checkpoints in the gap point at the end of the previous field
+                for gap_position in range(position, position + FIELD_GAP):
+                    if gap_position % CHECKPOINT_STRIDE == 0:
+                        checkpoints.append(len(document[FIELDS[index - 1]]))
+                position += FIELD_GAP
+            field_starts.append(position)
+            for token, start, end in tokenize(document[field]):
+                term_positions.setdefault(token, []).append(position)
+                if position % CHECKPOINT_STRIDE == 0:
+                    checkpoints.append(start)
+                position += 1
+        for term, positions in term_positions.items():
+            postings.setdefault(term, []).append((doc, positions))
+        checkpoint_index.append(len(checkpoints))
+        # The gaps hold no tokens, so they do not count towards the BM25 length
+        tokens = position - FIELD_GAP * (len(FIELDS) - 1)
+        token_count += tokens
+        doc_table.extend([tokens, field_starts[1], field_starts[2]] + [len(document[field]) for field in FIELDS])
+
+    terms = sorted(postings)
+    term_offsets = array('I', [0])
+    term_dfs = array('I')
+    postings_offsets = array('I', [0])
+    term_blob = bytearray()
+    postings_blob = bytearray()
+    for term in terms:
+        term_blob += term.encode('utf-8')
+        term_offsets.append(len(term_blob))
+        term_dfs.append(len(postings[term]))
+        header = bytearray()
+        encoded = bytearray()
+        previous_doc = 0
+        for doc, positions in postings[term]:
+            size = len(encoded)
+            previous = 0
+            for position in positions:
+                encode_varint(position - previous, encoded)
+                previous = position
+            encode_varint(doc - previous_doc, header)
+            encode_varint(len(positions), header)
+            encode_varint(len(encoded) - size, header)
+            previous_doc = doc
+        encode_varint(len(header), postings_blob)
+        postings_blob += header
+        postings_blob += encoded
+        postings_offsets.append(len(postings_blob))
+
+    sections = [doc_table, checkpoint_index, checkpoints, term_offsets, term_dfs, postings_offsets]
+    offsets = []
+    position = SHARD_HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section) * section.itemsize
+    offsets.append(position)
+    offsets.append(position + len(term_blob))
+    with open(path, 'wb') as f:
+        f.write(SHARD_HEADER.pack(SHARD_MAGIC, len(documents), len(terms), token_count, *offsets))
+        for section in sections:
+            if sys.byteorder != 'little':
+                section.byteswap()
+            f.write(section.tobytes())
+        f.write(term_blob)
+        f.write(postings_blob)
+    return os.path.getsize(path), token_count
+
+
+def build_index(documents, index_dir=DEFAULT_INDEX_DIR, shard_docs=DEFAULT_SHARD_DOCS):
+    """
+    Build the sharded index of documents into index_dir, replacing any earlier build.
+
+    Returns:
+        dict: The manifest written to index.json
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    shards = []
+    total_tokens = 0
+    for number, base in enumerate(range(0, len(documents), shard_docs)):
+        name = f"shard-{number:03d}.bin"
+        size, tokens = write_shard(os.path.join(index_dir, name), documents[base:base + shard_docs])
+        shards.append({'file': name, 'doc_base': base, 'doc_count': len(documents[base:base + shard_docs]), 'bytes': size})
+        total_tokens += tokens
+    manifest = {
+        'version': 1,
+        'doc_count': len(documents),
+        'avg_length': total_tokens / max(len(documents), 1),
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'shards': shards,
+        'docs': [[document['page_url'], document['kind'], document['name']] for document in documents],
+    }
+    # Remove shards of an earlier, bigger build
+    for name in os.listdir(index_dir):
+        if name.startswith('shard-') and name not in {shard['file'] for shard in shards}:
+            os.remove(os.path.join(index_dir, name))
+    CategoryIndex.from_documents(documents).save(os.path.join(index_dir, 'categories.json'))
+    with open(os.path.join(index_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+
+class IndexShard:
+    """
+    One memory-mapped shard file of a SearchIndex.
+    """
+
+    def __init__(self, path, doc_base):
+        self.doc_base = doc_base
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        header = SHARD_HEADER.unpack_from(self.map)
+        if header[0] != SHARD_MAGIC:
+            if header[0][:6] == SHARD_MAGIC[:6]:
+                raise ValueError(f"Search index shard of another format version, rebuild the index: {path}")
+            raise ValueError(f"Not a search index shard: {path}")
+        self.doc_count, self.term_count, self.token_count = header[1:4]
+        offsets = header[4:]
+        self.doc_table = self._array(offsets[0], offsets[1], 'I')
+        self.checkpoint_index = self._array(offsets[1], offsets[2], 'I')
+        self.checkpoints = self._array(offsets[2], offsets[3], 'I')
+        self.term_offsets = self._array(offsets[3], offsets[4], 'I')
+        self.term_dfs = self._array(offsets[4], offsets[5], 'I')
+        self.postings_offsets = self._array(offsets[5], offsets[6], 'I')
+        self.term_blob = offsets[6]
+        self.postings_blob = offsets[7]
+
+    def _array(self, start, end, typecode):
+        if sys.byteorder == 'little':
+            return self.view[start:end].cast(typecode)
+        # Big-endian hosts get a byte-swapped copy instead of a view
+        values = array(typecode, self.view[start:end].tobytes())
+        values.byteswap()
+        return values
+
+    def _term(self, i):
+        return self.map[self.term_blob + self.term_offsets[i]:self.term_blob + self.term_offsets[i + 1]]
+
+    def lookup(self, term):
+        """
+        Binary search the term dictionary.
+
+        Returns:
+            int: Term number, or None if the shard does not contain the term
+        """
+        key = term.encode('utf-8')
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.term_count and self._term(low) == key:
+            return low
+        return None
+
+    def postings(self, term_number):
+        """
+        Decode the document list of a term (its positions stay encoded).
+
+        Returns:
+            dict: local document -> (tf, start, end) of its positions in the shard
+        """
+        start = self.postings_blob + self.postings_offsets[term_number]
+        header_size, shift = 0, 0
+        while True:
+            byte = self.map[start]
+            start += 1
+            header_size |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        values = iter(decode_varints(self.map[start:start + header_size]))
+        offset = start + header_size
+        postings = {}
+        doc = 0
+        for delta, tf, size in zip(values, values, values):
+            doc += delta
+            postings[doc] = (tf, offset, offset + size)
+            offset += size
+        return postings
+
+    def positions(self, posting):
+        return list(accumulate(decode_varints(self.map[posting[1]:posting[2]])))
+
+    def document(self, doc):
+        """
+        Returns:
+            tuple: token count, description start, content start, name/description/content chars
+        """
+        return tuple(self.doc_table[doc * DOC_FIELDS:(doc + 1) * DOC_FIELDS])
+
+    def checkpoint_offset(self, doc, position, field_start, field_end, field_chars):
+        """
+        Character offset (in the field) of the checkpoint token at `position`,
+        or the start/end of the field when the checkpoint falls outside it.
+        """
+        if position < field_start:
+            return 0
+        if position >= field_end:
+            return field_chars
+        return self.checkpoints[self.checkpoint_index[doc] + position // CHECKPOINT_STRIDE]
+
+    def close(self):
+        for name in ('doc_table', 'checkpoint_index', 'checkpoints', 'term_offsets', 'term_dfs', 'postings_offsets'):
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                value.release()
+        self.view.release()
+        self.map.close()
+
+
+class SearchIndex:
+    """
+    Query API over an index built by build_index.
+
+    search() ranks documents with BM25 over name, description and content.
+    "Quoted phrases" in the query must appear as written. Each result has the
+    page_url and the character offsets of a snippet and of the matched words
+    in one field of the document, so the caller can highlight its own copy
+    of the text.
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        with open(os.path.join(index_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.docs = self.manifest['docs']
+        self.doc_count = self.manifest['doc_count']
+        self.avg_length = self.manifest['avg_length'] or 1.0
+        self.k1 = self.manifest['k1']
+        self.b = self.manifest['b']
+        self.shards = [IndexShard(os.path.join(index_dir, shard['file']), shard['doc_base'])
+                       for shard in self.manifest['shards']]
+        # Indexes built before category filters have no categories.json
+        categories_path = os.path.join(index_dir, 'categories.json')
+        self.categories = CategoryIndex.load(categories_path) if os.path.exists(categories_path) else None
+
+    def idf(self, df):
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k=10, documents=None, categories=None):
+        """
+        Args:
+            query (str): Words and "quoted phrases"
+            k (int): Number of results
+            documents (set): Only return these global document numbers
+            categories (str): Only return documents matching this category filter
+                (see CategoryIndex.query, e.g. 'Fundraising AND NOT YC')
+
+        Returns:
+            list: dicts with page_url, kind, name, score, field, snippet (start, end)
+                and match (start, end), best first. match covers the matched words,
+                widened to the nearest token checkpoints
+        """
+        terms, phrases = parse_query(query)
+        allowed = None
+        if categories:
+            if self.categories is None:
+                raise ValueError("This index has no category data; rebuild it to filter by category")
+            # Raises ValueError for an unknown category or a malformed filter
+            allowed = self.categories.query(categories)
+        query_terms = list(dict.fromkeys(terms + [term for phrase in phrases for term in phrase]))
+        if not query_terms:
+            return []
+
+        # Global document frequencies are the sum over the shards
+        lookups = [{term: shard.lookup(term) for term in query_terms} for shard in self.shards]
+        df = {term: sum(shard.term_dfs[found[term]] for shard, found in zip(self.shards, lookups)
+                        if found[term] is not None)
+              for term in query_terms}
+        idf = {term: self.idf(df[term]) for term in query_terms}
+
+        candidates = []
+        k1, b, avg_length = self.k1, self.b, self.avg_length
+        for shard, found in zip(self.shards, lookups):
+            postings = {term: shard.postings(number) for term, number in found.items() if number is not None}
+            if any(term not in postings for phrase in phrases for term in phrase):
+                continue
+            scores = {}
+            for term, term_postings in postings.items():
+                weight = idf[term]
+                for doc, (tf, _, _) in term_postings.items():
+                    length = shard.doc_table[doc * DOC_FIELDS]
+                    scores[doc] = scores.get(doc, 0.0) + weight * tf * (k1 + 1) / (
+                        tf + k1 * (1 - b + b * length / avg_length))
+            for doc, score in scores.items():
+                global_doc = shard.doc_base + doc
+                if documents is not None and global_doc not in documents:
+                    continue
+                if allowed is not None and not allowed >> global_doc & 1:
+                    continue
+                if any(doc not in postings[term] for phrase in phrases for term in phrase):
+                    continue
+                candidates.append((score, global_doc, shard, doc, postings))
+
+        # Phrases are checked best first, so positions are only decoded until k documents match
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        results = []
+        for score, global_doc, shard, doc, postings in candidates:
+            phrase_positions = []
+            for phrase in phrases:
+                found_at = self._phrase_positions(shard, postings, phrase, doc)
+                if not found_at:
+                    break
+                phrase_positions.append((found_at, len(phrase)))
+            else:
+                page_url, kind, name = self.docs[global_doc]
+                result = {'page_url': page_url, 'kind': kind, 'name': name, 'score': round(score, 4)}
+                result.update(self._snippet(shard, doc, postings, phrase_positions, idf))
+                results.append(result)
+                if len(results) == k:
+                    break
+        return results
+
+    def _phrase_positions(self, shard, postings, phrase, doc):
+        # Positions where the phrase starts in doc, intersecting the rarest terms first
+        starts = None
+        for offset, term in sorted(enumerate(phrase), key=lambda entry: postings[entry[1]][doc][0]):
+            shifted = {position - offset for position in shard.positions(postings[term][doc])}
+            starts = shifted if starts is None else starts & shifted
+            if not starts:
+                return []
+        return sorted(starts)
+
+    def _snippet(self, shard, doc, postings, phrase_positions, idf):
+        """
+        Pick the field and window to show: the first phrase match, or else
+        the first occurrence of the rarest query word, preferring content.
+        """
+        document = shard.document(doc)
+        # The content field ends after the tokens of every field and the gaps between them
+        field_starts = (0, document[1], document[2], document[0] + FIELD_GAP * (len(FIELDS) - 1))
+        if phrase_positions:
+            positions, length = phrase_positions[0]
+            anchor = [position for position in positions if position >= field_starts[2]] or positions
+            anchor_span = (anchor[0], anchor[0] + length - 1)
+        else:
+            rarest = sorted((term for term, term_postings in postings.items() if doc in term_postings),
+                            key=lambda term: -idf[term])
+            anchor_position = None
+            for term in rarest:
+                positions = shard.positions(postings[term][doc])
+                if anchor_position is None:
+                    anchor_position = positions[0]
+                index = bisect.bisect_left(positions, field_starts[2])
+                if index < len(positions):
+                    anchor_position = positions[index]
+                    break
+            anchor_span = (anchor_position, anchor_position)
+
+        field = max(i for i in range(3) if field_starts[i] <= anchor_span[0])
+        bounds = (field_starts[field], field_starts[field + 1], document[3 + field])
+        # The match is widened to token checkpoints: from the one at or before its first word
+        # to the one after its last word
+        first = shard.checkpoint_offset(doc, anchor_span[0] - anchor_span[0] % CHECKPOINT_STRIDE, *bounds)
+        last = shard.checkpoint_offset(doc, anchor_span[1] - anchor_span[1] % CHECKPOINT_STRIDE + CHECKPOINT_STRIDE, *bounds)
+        start = max(0, min(first - SNIPPET_CHARS // 4, bounds[2] - SNIPPET_CHARS))
+        end = min(bounds[2], max(last, start + SNIPPET_CHARS))
+        return {'field': FIELDS[field], 'snippet': (start, end), 'match': (first, last)}
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def benchmark(index, documents, queries=300, k=10, seed=0):
+    """
+    Measure search latency on queries sampled from the corpus (single words,
+    word pairs and quoted phrases), against a plain scan of the texts.
+    """
+    rng = random.Random(seed)
+    texts = [doc for doc in documents if doc['content']]
+    samples = []
+    for i in range(queries):
+        tokens = [token for token, _, _ in tokenize(rng.choice(texts)['content'])]
+        position = rng.randrange(max(len(tokens) - 3, 1))
+        words = tokens[position:position + 3] or ['startup']
+        if i % 3 == 0:
+            samples.append(words[0])
+        elif i % 3 == 1:
+            samples.append(' '.join(words[:2]))
+        else:
+            samples.append('"' + ' '.join(words) + '"')
+
+    latencies = []
+    by_kind = {'word': [], 'pair': [], 'phrase': []}
+    empty = 0
+    for i, query in enumerate(samples):
+        start_time = time.perf_counter()
+        results = index.search(query, k)
+        latencies.append(time.perf_counter() - start_time)
+        by_kind[('word', 'pair', 'phrase')[i % 3]].append(latencies[-1])
+        empty += not results
+    latencies.sort()
+
+    lowered = [(doc['name'] + '\n' + doc['description'] + '\n' + doc['content']).lower() for doc in documents]
+    scan_latencies = []
+    for query in samples[:50]:
+        needle = query.strip('"').lower()
+        start_time = time.perf_counter()
+        [text.count(needle) for text in lowered]
+        scan_latencies.append(time.perf_counter() - start_time)
+    scan_latencies.sort()
+
+    def percentile(values, fraction):
+        return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+    print(f"{Fore.GREEN}[INFO] {len(samples)} queries (k={k}): p50 {percentile(latencies, 0.5):.3f} ms, "
+          f"p90 {percentile(latencies, 0.9):.3f} ms, p99 {percentile(latencies, 0.99):.3f} ms, "
+          f"{empty} without results{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] p50 by query: " + ', '.join(
+        f"{kind} {percentile(sorted(values), 0.5):.3f} ms" for kind, values in by_kind.items()) + Style.RESET_ALL)
+    print(f"{Fore.GREEN}[INFO] plain scan of {sum(len(text) for text in lowered) / 1024 / 1024:.1f} MB of text: "
+          f"p50 {percentile(scan_latencies, 0.5):.3f} ms (no ranking){Style.RESET_ALL}")
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Build and query the BM25 full-text index of the videos and blog posts')
+    parser.add_argument('action', choices=['build', 'query', 'benchmark'],
+                        help='build the index, run a query, or measure query latency')
+    parser.add_argument('query', nargs='?', help='Query for the query action (use "..." for phrases)')
+    parser.add_argument('--index-dir', type=str, default=DEFAULT_INDEX_DIR,
+                        help=f'Index directory (default: {DEFAULT_INDEX_DIR})')
+    parser.add_argument('--video-data', type=str, default='video-data-updated.json',
+                        help='Video items (default: video-data-updated.json)')
+    parser.add_argument('--blog-data', type=str, default='blog-data.json',
+                        help='Blog items (default: blog-data.json)')
+    parser.add_argument('--db', type=str, help='Read both datasets from this SQLite dataset store')
+    parser.add_argument('--shard-docs', type=int, default=DEFAULT_SHARD_DOCS,
+                        help=f'Documents per shard (default: {DEFAULT_SHARD_DOCS})')
+    parser.add_argument('--categories', type=str,
+                        help='Only return items matching this category filter, e.g. \'Fundraising AND NOT YC\'')
+    parser.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+    args = parser.parse_args()
+
+    if args.action in ('build', 'benchmark'):
+        store = DatasetStore(args.db) if args.db else None
+        documents = load_documents(args.video_data, args.blog_data, store)
+        if store:
+            store.close()
+    if args.action == 'build':
+        start_time = time.perf_counter()
+        manifest = build_index(documents, args.index_dir, args.shard_docs)
+        text_bytes = sum(len(document[field].encode('utf-8')) for document in documents for field in FIELDS)
+        index_bytes = sum(shard['bytes'] for shard in manifest['shards'])
+        print(f"{Fore.GREEN}[INFO] Indexed {manifest['doc_count']} documents into {len(manifest['shards'])} shards "
+              f"in {time.perf_counter() - start_time:.1f}s: {index_bytes / 1024 / 1024:.2f} MB index for "
+              f"{text_bytes / 1024 / 1024:.2f} MB of text{Style.RESET_ALL}")
+        return
+
+    index = SearchIndex(args.index_dir)
+    try:
+        if args.action == 'benchmark':
+            benchmark(index, documents, k=args.k)
+        elif not args.query:
+            print(f"{Fore.RED}[ERROR] A query is required{Style.RESET_ALL}")
+        else:
+            try:
+                results = index.search(args.query, args.k, categories=args.categories)
+            except ValueError as e:
+                print(f"{Fore.RED}[ERROR] {e}{Style.RESET_ALL}")
+                return
+            for result in results:
+                print(f"{Fore.CYAN}{result['score']:8.3f}{Style.RESET_ALL} [{result['kind']}] {result['name']} "
+                      f"({result['page_url']}) {result['field']} {result['snippet'][0]}-{result['snippet'][1]}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,609 @@
+import os
+import json
+import time
+import zlib
+import random
+import hashlib
+import argparse
+import numpy as np
+from colorama import init, Fore, Style
+from dataset_store import DatasetStore
+from search_index import TOKEN, tokenize, load_documents
+
+# Where build writes the index
+DEFAULT_INDEX_DIR = 'semantic-index'
+
+# Passages: windows of PASSAGE_WORDS words, each starting PASSAGE_WORDS - PASSAGE_OVERLAP after the last
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 40
+
+# Hashed TF-IDF features (word unigrams and bigrams) and the SVD projection
+HASH_BUCKETS = 1 << 18
+MAX_FEATURES = 50000
+DEFAULT_DIM = 128
+
+# Quantization of the stored vectors
+QUANTIZATIONS = ('int8', 'float16')
+DEFAULT_QUANTIZATION = 'int8'
+
+# IVF: lists searched per query
+DEFAULT_NPROBE = 16
+
+# Fields a passage can come from (items without content get one passage of their description)
+PASSAGE_FIELDS = ('content', 'description')
+
+
+def hashed_features(text):
+    """
+    Count the word unigrams and bigrams of text by hash bucket.
+
+    Returns:
+        dict: bucket -> count
+    """
+    tokens = [token for token, _, _ in tokenize(text)]
+    counts = {}
+    for gram in tokens + [first + ' ' + second for first, second in zip(tokens, tokens[1:])]:
+        bucket = zlib.crc32(gram.encode('utf-8')) & (HASH_BUCKETS - 1)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+class SparseRows:
+    """
+    Minimal CSR matrix: just what the TF-IDF projection and its SVD need.
+    """
+
+    def __init__(self, indptr, indices, data, n_columns):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_rows = len(indptr) - 1
+        self.n_columns = n_columns
+
+    def dot(self, dense, batch_rows=512):
+        """
+        Returns:
+            np.ndarray: self @ dense, computed a batch of rows at a time to bound memory
+        """
+        out = np.zeros((self.n_rows, dense.shape[1]), dtype=np.float32)
+        for start in range(0, self.n_rows, batch_rows):
+            end = min(self.n_rows, start + batch_rows)
+            first, last = self.indptr[start], self.indptr[end]
+            if first == last:
+                continue
+            products = self.data[first:last, None] * dense[self.indices[first:last]]
+            lengths = np.diff(self.indptr[start:end + 1])
+            nonempty = lengths > 0
+            # Empty rows have no segment, so reduceat only gets the starts of non-empty rows
+            out[start:end][nonempty] = np.add.reduceat(products, (self.indptr[start:end] - first)[nonempty], axis=0)
+        return out
+
+    def transpose(self):
+        order = np.argsort(self.indices, kind='stable')
+        rows = np.repeat(np.arange(self.n_rows, dtype=np.int32), np.diff(self.indptr))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(self.indices, minlength=self.n_columns))])
+        return SparseRows(indptr, rows[order], self.data[order], self.n_rows)
+
+
+def randomized_svd(matrix, rank, oversample=16, iterations=2, seed=0):
+    """
+    Top right singular vectors of a sparse matrix (Halko et al. range finder
+    with power iterations).
+
+    Returns:
+        np.ndarray: (rank, n_columns) float32
+    """
+    rng = np.random.default_rng(seed)
+    transposed = matrix.transpose()
+    width = min(rank + oversample, matrix.n_rows, matrix.n_columns)
+    basis = np.linalg.qr(matrix.dot(rng.standard_normal((matrix.n_columns, width)).astype(np.float32)))[0]
+    for _ in range(iterations):
+        basis = np.linalg.qr(transposed.dot(basis))[0]
+        basis = np.linalg.qr(matrix.dot(basis))[0]
+    projected = transposed.dot(basis).T
+    _, _, components = np.linalg.svd(projected, full_matrices=False)
+    return components[:rank].astype(np.float32)
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class Embedder:
+    """
+    Interface of the passage embedders.
+
+    An embedder is fitted once on the corpus (or not at all, for pretrained
+    models), turns texts into L2-normalized float32 vectors and saves the
+    state it needs as NumPy arrays. Register new ones in EMBEDDERS.
+    """
+
+    name = None
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+
+    def fit(self, texts):
+        return self
+
+    def embed(self, texts):
+        """
+        Returns:
+            np.ndarray: (len(texts), dim) float32, rows of unit length
+        """
+        raise NotImplementedError
+
+    def fit_embed(self, texts):
+        return self.fit(texts).embed(texts)
+
+    def state(self):
+        return {}
+
+    def load_state(self, state):
+        pass
+
+
+class HashedTfidfSvdEmbedder(Embedder):
+    """
+    Latent semantic embedding: hashed word/bigram TF-IDF projected on its
+    top `dim` singular vectors. Fully offline and fitted in seconds.
+    """
+
+    name = 'hashed-tfidf-svd'
+
+    def __init__(self, dim=DEFAULT_DIM, max_features=MAX_FEATURES, seed=0):
+        super().__init__(dim)
+        self.max_features = max_features
+        self.seed = seed
+        self.columns = None     # bucket -> column, or -1 for buckets left out
+        self.idf = None         # per column
+        self.components = None  # (dim, columns)
+
+    def _rows(self, features):
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in features:
+            buckets = np.fromiter(counts, dtype=np.int64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            columns = self.columns[buckets]
+            kept = columns >= 0
+            weights = (1 + np.log(tf[kept])) * self.idf[columns[kept]]
+            norm = np.linalg.norm(weights)
+            indices.append(columns[kept])
+            data.append(weights / norm if norm else weights)
+            indptr.append(indptr[-1] + int(kept.sum()))
+        return SparseRows(
+            np.array(indptr, dtype=np.int64),
+            np.concatenate(indices).astype(np.int32) if indices else np.zeros(0, dtype=np.int32),
+            np.concatenate(data).astype(np.float32) if data else np.zeros(0, dtype=np.float32),
+            len(self.idf),
+        )
+
+    def fit(self, texts):
+        self.fit_embed(texts)
+        return self
+
+    def fit_embed(self, texts):
+        # The fitted matrix is projected directly instead of hashing the texts twice
+        features = [hashed_features(text) for text in texts]
+        df = np.zeros(HASH_BUCKETS, dtype=np.int64)
+        for counts in features:
+            df[np.fromiter(counts, dtype=np.int64, count=len(counts))] += 1
+        # Buckets in at least two passages, the most frequent first
+        candidates = np.flatnonzero(df >= 2)
+        kept = np.sort(candidates[np.argsort(-df[candidates], kind='stable')[:self.max_features]])
+        self.columns = np.full(HASH_BUCKETS, -1, dtype=np.int32)
+        self.columns[kept] = np.arange(len(kept), dtype=np.int32)
+        self.idf = (np.log((1 + len(texts)) / (1 + df[kept])) + 1).astype(np.float32)
+        matrix = self._rows(features)
+        self.components = randomized_svd(matrix, min(self.dim, matrix.n_rows, matrix.n_columns), seed=self.seed)
+        self.dim = len(self.components)
+        return normalize_rows(matrix.dot(np.ascontiguousarray(self.components.T)))
+
+    def embed(self, texts):
+        matrix = self._rows([hashed_features(text) for text in texts])
+        return normalize_rows(matrix.dot(np.ascontiguousarray(self.components.T)))
+
+    def state(self):
+        return {'columns': self.columns, 'idf': self.idf, 'components': self.components}
+
+    def load_state(self, state):
+        self.columns = state['columns']
+        self.idf = state['idf']
+        self.components = state['components']
+        self.dim = len(self.components)
+
+
+EMBEDDERS = {
+    HashedTfidfSvdEmbedder.name: HashedTfidfSvdEmbedder,
+}
+
+
+def split_passages(document):
+    """
+    Split a document into overlapping windows of PASSAGE_WORDS words.
+
+    Returns:
+        list: (field, start, end) character spans; one description passage
+            for documents without content
+    """
+    for field in PASSAGE_FIELDS:
+        words = [(match.start(), match.end()) for match in TOKEN.finditer(document[field])]
+        if words:
+            break
+    else:
+        return []
+    step = PASSAGE_WORDS - PASSAGE_OVERLAP
+    passages = []
+    for first in range(0, max(len(words) - PASSAGE_OVERLAP, 1), step):
+        last = min(first + PASSAGE_WORDS, len(words)) - 1
+        passages.append((field, words[first][0], words[last][1]))
+    return passages
+
+
+def passage_text(document, field, start, end):
+    # The title gives every passage the context of its talk or post
+    return document['name'] + '. ' + document[field][start:end]
+
+
+def document_hash(document):
+    payload = json.dumps([document['name'], document['description'], document['content']], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def quantize(vectors, quantization):
+    """
+    Returns:
+        tuple: (quantized vectors, per-row float32 scales or None)
+    """
+    if quantization == 'float16':
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def dequantize(vectors, scales):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def spherical_kmeans(vectors, n_lists, iterations=20, seed=0):
+    """
+    k-means on unit vectors with cosine similarity.
+
+    Returns:
+        tuple: (centroids (n_lists, dim), list of each vector)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def load_arrays(index_dir, mmap_mode=None):
+    arrays = {}
+    for name in ('vectors', 'scales', 'centroids', 'list_offsets', 'passage_item', 'passage_field', 'passage_span'):
+        path = os.path.join(index_dir, name + '.npy')
+        if os.path.exists(path):
+            arrays[name] = np.load(path, mmap_mode=mmap_mode if name in ('vectors', 'scales') else None)
+    return arrays
+
+
+def build_index(documents, index_dir=DEFAULT_INDEX_DIR, dim=DEFAULT_DIM, quantization=DEFAULT_QUANTIZATION,
+                embedder_name=HashedTfidfSvdEmbedder.name, refit=False):
+    """
+    Build or update the semantic index.
+
+    An existing index with the same settings is updated incrementally: the
+    passages of unchanged documents keep their vectors, only new or changed
+    documents are embedded (with the fitted model) and assigned to the
+    existing IVF lists. refit retrains the embedder and the lists on
+    everything.
+
+    Returns:
+        dict: Counts of reused, embedded and removed documents
+    """
+    manifest_path = os.path.join(index_dir, 'index.json')
+    previous = None
+    if not refit and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        settings = (previous['embedder'], previous['requested_dim'], previous['quantization'],
+                    previous['passage_words'], previous['passage_overlap'])
+        if settings != (embedder_name, dim, quantization, PASSAGE_WORDS, PASSAGE_OVERLAP):
+            previous = None
+
+    embedder = EMBEDDERS[embedder_name](dim)
+    hashes = [document_hash(document) for document in documents]
+    stats = {'reused': 0, 'embedded': 0, 'removed': 0}
+    ready = {}  # document number -> (passages, vectors) that need no embedding
+    if previous:
+        with np.load(os.path.join(index_dir, 'model.npz')) as state:
+            embedder.load_state({name: state[name] for name in state.files})
+        arrays = load_arrays(index_dir)
+        old_vectors = dequantize(arrays['vectors'], arrays.get('scales'))
+        old_items = {item['page_url']: (number, item['hash']) for number, item in enumerate(previous['items'])}
+        order = np.argsort(arrays['passage_item'], kind='stable')
+        bounds = np.searchsorted(arrays['passage_item'][order], np.arange(len(previous['items']) + 1))
+        for number, (document, digest) in enumerate(zip(documents, hashes)):
+            old = old_items.pop(document['page_url'], None)
+            if old and old[1] == digest:
+                rows = order[bounds[old[0]]:bounds[old[0] + 1]]
+                # Rows of one document keep their passage order
+                rows = rows[np.lexsort((arrays['passage_span'][rows, 0], arrays['passage_field'][rows]))]
+                passages = [(PASSAGE_FIELDS[arrays['passage_field'][row]], *map(int, arrays['passage_span'][row]))
+                            for row in rows]
+                ready[number] = (passages, old_vectors[rows])
+        stats['reused'] = len(ready)
+        stats['removed'] = len(old_items)
+    else:
+        passages = [split_passages(document) for document in documents]
+        fitted = embedder.fit_embed([passage_text(document, *passage)
+                                     for document, spans in zip(documents, passages) for passage in spans])
+        ends = np.cumsum([len(spans) for spans in passages])
+        ready = {number: (spans, fitted[end - len(spans):end]) for number, (spans, end) in enumerate(zip(passages, ends))}
+        stats['embedded'] = len(ready)
+
+    passage_item, passage_field, passage_span, parts = [], [], [], []
+    for number, document in enumerate(documents):
+        if number in ready:
+            passages, vectors = ready[number]
+        else:
+            passages = split_passages(document)
+            vectors = embedder.embed([passage_text(document, *passage) for passage in passages]) if passages else None
+            stats['embedded'] += 1
+        for field, start, end in passages:
+            passage_item.append(number)
+            passage_field.append(PASSAGE_FIELDS.index(field))
+            passage_span.append((start, end))
+        if passages:
+            parts.append(vectors)
+    vectors = normalize_rows(np.concatenate(parts)) if parts else np.zeros((0, embedder.dim), dtype=np.float32)
+
+    if previous and len(vectors):
+        centroids = load_arrays(index_dir)['centroids']
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+    else:
+        n_lists = max(1, min(len(vectors), int(round(np.sqrt(len(vectors))))))
+        centroids, assignment = spherical_kmeans(vectors, n_lists) if len(vectors) else (
+            np.zeros((1, embedder.dim), dtype=np.float32), np.zeros(0, dtype=np.int64))
+
+    # Rows are stored grouped by IVF list, so a list is one contiguous block
+    order = np.argsort(assignment, kind='stable')
+    list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))]).astype(np.int64)
+    quantized, scales = quantize(vectors[order], quantization)
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        'vectors': quantized,
+        'centroids': centroids.astype(np.float32),
+        'list_offsets': list_offsets,
+        'passage_item': np.array(passage_item, dtype=np.int32)[order],
+        'passage_field': np.array(passage_field, dtype=np.int8)[order],
+        'passage_span': np.array(passage_span, dtype=np.int32).reshape(-1, 2)[order],
+    }
+    if scales is not None:
+        arrays['scales'] = scales
+    elif os.path.exists(os.path.join(index_dir, 'scales.npy')):
+        os.remove(os.path.join(index_dir, 'scales.npy'))
+    for name, values in arrays.items():
+        np.save(os.path.join(index_dir, name + '.npy'), values)
+    np.savez(os.path.join(index_dir, 'model.npz'), **embedder.state())
+    manifest = {
+        'version': 1,
+        'embedder': embedder_name,
+        'requested_dim': dim,
+        'dim': embedder.dim,
+        'quantization': quantization,
+        'passage_words': PASSAGE_WORDS,
+        'passage_overlap': PASSAGE_OVERLAP,
+        'passages': len(vectors),
+        'lists': len(centroids),
+        'items': [{'page_url': document['page_url'], 'kind': document['kind'], 'name': document['name'], 'hash': digest}
+                  for document, digest in zip(documents, hashes)],
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return stats
+
+
+class SemanticIndex:
+    """
+    Query API over an index built by build_index.
+
+    The quantized vectors are memory-mapped. search() embeds the question,
+    picks the nprobe closest IVF lists and scores their passages with one
+    matrix product per list block (or every passage with exact=True).
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        with open(os.path.join(index_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.items = self.manifest['items']
+        self.embedder = EMBEDDERS[self.manifest['embedder']](self.manifest['dim'])
+        with np.load(os.path.join(index_dir, 'model.npz')) as state:
+            self.embedder.load_state({name: state[name] for name in state.files})
+        arrays = load_arrays(index_dir, mmap_mode='r')
+        self.vectors = arrays['vectors']
+        self.scales = arrays.get('scales')
+        self.centroids = arrays['centroids']
+        self.list_offsets = arrays['list_offsets']
+        self.passage_item = arrays['passage_item']
+        self.passage_field = arrays['passage_field']
+        self.passage_span = arrays['passage_span']
+
+    def _score_rows(self, start, end, queries):
+        block = np.asarray(self.vectors[start:end], dtype=np.float32)
+        scores = block @ queries.T
+        if self.scales is not None:
+            scores *= self.scales[start:end, None]
+        return scores
+
+    def search_vectors(self, queries, n, nprobe=DEFAULT_NPROBE, exact=False):
+        """
+        Top n passages for each query vector.
+
+        Args:
+            queries (np.ndarray): (q, dim) unit vectors
+            n (int): Passages per query
+            nprobe (int): IVF lists searched per query
+            exact (bool): Score every passage instead
+
+        Returns:
+            list: (rows, scores) arrays per query, best first
+        """
+        results = []
+        if exact or nprobe >= len(self.centroids):
+            scores = self._score_rows(0, len(self.vectors), queries).T
+            for query_scores in scores:
+                results.append(self._top(np.arange(len(query_scores)), query_scores, n))
+            return results
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([np.arange(self.list_offsets[i], self.list_offsets[i + 1]) for i in lists])
+            scores = np.concatenate([self._score_rows(self.list_offsets[i], self.list_offsets[i + 1], query[None])[:, 0]
+                                     for i in lists])
+            results.append(self._top(rows, scores, n))
+        return results
+
+    @staticmethod
+    def _top(rows, scores, n):
+        if len(scores) > n:
+            best = np.argpartition(-scores, n)[:n]
+            rows, scores = rows[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        return rows[order], scores[order]
+
+    def search(self, query, k=10, nprobe=DEFAULT_NPROBE, exact=False, per_item=True):
+        """
+        Args:
+            query (str): Question or keywords
+            k (int): Number of results
+            nprobe (int): IVF lists searched
+            exact (bool): Score every passage
+            per_item (bool): Return only the best passage of each video or post
+
+        Returns:
+            list: dicts with page_url, kind, name, score, field and passage (start, end), best first
+        """
+        vector = self.embedder.embed([query])
+        rows, scores = self.search_vectors(vector, k * 5 if per_item else k, nprobe, exact)[0]
+        results = []
+        seen = set()
+        for row, score in zip(rows, scores):
+            item = int(self.passage_item[row])
+            if per_item and item in seen:
+                continue
+            seen.add(item)
+            results.append({
+                'page_url': self.items[item]['page_url'],
+                'kind': self.items[item]['kind'],
+                'name': self.items[item]['name'],
+                'score': round(float(score), 4),
+                'field': PASSAGE_FIELDS[self.passage_field[row]],
+                'passage': tuple(int(offset) for offset in self.passage_span[row]),
+            })
+            if len(results) == k:
+                break
+        return results
+
+
+def measure_recall(index, documents, queries=200, k=10, nprobes=(1, 2, 4, 8, 16), seed=0):
+    """
+    Recall@k of the IVF search against exact search, and the latency of
+    both, on questions made from random passage fragments.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for row in rng.sample(range(len(index.passage_item)), min(queries, len(index.passage_item))):
+        document = documents[index.passage_item[row]]
+        start, end = index.passage_span[row]
+        words = document[PASSAGE_FIELDS[index.passage_field[row]]][start:end].split()
+        first = rng.randrange(max(len(words) - 12, 1))
+        texts.append(' '.join(words[first:first + 12]))
+    vectors = index.embedder.embed(texts)
+
+    def timed(function):
+        latencies = []
+        results = []
+        for vector in vectors:
+            start_time = time.perf_counter()
+            results.append(function(vector[None])[0][0])
+            latencies.append(time.perf_counter() - start_time)
+        return results, sorted(latencies)[len(latencies) // 2] * 1000
+
+    exact, exact_p50 = timed(lambda vector: index.search_vectors(vector, k, exact=True))
+    print(f"{Fore.GREEN}[INFO] exact search over {len(index.vectors)} passages: p50 {exact_p50:.3f} ms{Style.RESET_ALL}")
+    for nprobe in nprobes:
+        if nprobe > len(index.centroids):
+            break
+        approximate, p50 = timed(lambda vector: index.search_vectors(vector, k, nprobe))
+        recall = np.mean([len(set(a.tolist()) & set(b.tolist())) / max(len(b), 1) for a, b in zip(approximate, exact)])
+        print(f"{Fore.GREEN}[INFO] IVF nprobe={nprobe:<3} of {len(index.centroids)} lists: recall@{k} {recall:.3f}, "
+              f"p50 {p50:.3f} ms{Style.RESET_ALL}")
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Build and query the semantic passage index of the videos and blog posts')
+    parser.add_argument('action', choices=['build', 'query', 'recall'],
+                        help='build (or update) the index, run a query, or measure IVF recall and latency')
+    parser.add_argument('query', nargs='?', help='Question for the query action')
+    parser.add_argument('--index-dir', type=str, default=DEFAULT_INDEX_DIR,
+                        help=f'Index directory (default: {DEFAULT_INDEX_DIR})')
+    parser.add_argument('--video-data', type=str, default='video-data-updated.json',
+                        help='Video items (default: video-data-updated.json)')
+    parser.add_argument('--blog-data', type=str, default='blog-data.json',
+                        help='Blog items (default: blog-data.json)')
+    parser.add_argument('--db', type=str, help='Read both datasets from this SQLite dataset store')
+    parser.add_argument('--dim', type=int, default=DEFAULT_DIM, help=f'Embedding dimensions (default: {DEFAULT_DIM})')
+    parser.add_argument('--quantization', choices=QUANTIZATIONS, default=DEFAULT_QUANTIZATION,
+                        help=f'Storage type of the vectors (default: {DEFAULT_QUANTIZATION})')
+    parser.add_argument('--embedder', choices=list(EMBEDDERS), default=HashedTfidfSvdEmbedder.name,
+                        help=f'Passage embedder (default: {HashedTfidfSvdEmbedder.name})')
+    parser.add_argument('--refit', action='store_true',
+                        help='Retrain the embedder and IVF lists on everything instead of updating changed items')
+    parser.add_argument('--nprobe', type=int, default=DEFAULT_NPROBE,
+                        help=f'IVF lists searched per query (default: {DEFAULT_NPROBE})')
+    parser.add_argument('--exact', action='store_true', help='Score every passage')
+    parser.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+    args = parser.parse_args()
+
+    if args.action in ('build', 'recall'):
+        store = DatasetStore(args.db) if args.db else None
+        documents = load_documents(args.video_data, args.blog_data, store)
+        if store:
+            store.close()
+    if args.action == 'build':
+        start_time = time.perf_counter()
+        stats = build_index(documents, args.index_dir, args.dim, args.quantization, args.embedder, args.refit)
+        index = SemanticIndex(args.index_dir)
+        print(f"{Fore.GREEN}[INFO] Indexed {len(index.vectors)} passages of {len(documents)} documents in "
+              f"{time.perf_counter() - start_time:.1f}s ({stats['embedded']} embedded, {stats['reused']} unchanged, "
+              f"{stats['removed']} removed): {index.vectors.nbytes / 1024 / 1024:.2f} MB of "
+              f"{index.manifest['quantization']} vectors, {len(index.centroids)} IVF lists{Style.RESET_ALL}")
+        return
+
+    index = SemanticIndex(args.index_dir)
+    if args.action == 'recall':
+        measure_recall(index, documents, k=args.k)
+    elif not args.query:
+        print(f"{Fore.RED}[ERROR] A question is required{Style.RESET_ALL}")
+    else:
+        for result in index.search(args.query, args.k, args.nprobe, args.exact):
+            print(f"{Fore.CYAN}{result['score']:7.3f}{Style.RESET_ALL} [{result['kind']}] {result['name']} "
+                  f"({result['page_url']}) {result['field']} {result['passage'][0]}-{result['passage'][1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+from colorama import init, Fore, Style
+
+# Default location of the cache, next to the downloaded audio
+DEFAULT_CACHE_PATH = 'transcription-cache.sqlite'
+
+# Hashes of files already read in this run: (path, size, mtime) -> hex digest
+_file_hashes = {}
+
+
+def hash_audio_file(path, block_size=1024 * 1024):
+    """
+    SHA-256 of an audio file's bytes, so renamed or re-listed copies of the
+    same download share one cache entry.
+
+    Args:
+        path (str): Audio file
+        block_size (int): Bytes read at a time
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+
+def make_cache_key(audio_hash, options):
+    """
+    Build the cache key for one transcription request.
+
+    Args:
+        audio_hash (str): hash_audio_file digest (or any id of the exact audio sent)
+        options (dict): Deepgram options (model, diarize, smart_format, ...)
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([audio_hash, options], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Persistent SQLite cache of raw Deepgram responses keyed by make_cache_key.
+
+    The whole response is kept (compressed), so transcripts can be rendered
+    again, in any format, without paying for another API call. Hit/miss
+    counters cover the current run.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcriptions (
+                key TEXT PRIMARY KEY,
+                audio_hash TEXT NOT NULL,
+                options TEXT NOT NULL,
+                response BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_transcriptions_audio_hash ON transcriptions (audio_hash)")
+        self.connection.commit()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            dict: The cached Deepgram response, or None on a miss
+        """
+        row = self.connection.execute("SELECT response FROM transcriptions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, audio_hash, options, response):
+        """
+        Store a Deepgram response.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            audio_hash (str): Audio the response is for (kept for inspection)
+            options (dict): Options it was requested with (kept for inspection)
+            response (dict): The raw response
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO transcriptions (key, audio_hash, options, response, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, audio_hash, json.dumps(options, sort_keys=True),
+             zlib.compress(json.dumps(response).encode('utf-8')), time.time())
+        )
+        self.connection.commit()
+        self.stores += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/store counters, number of entries and size on disk
+        """
+        lookups = self.hits + self.misses
+        entries, total_bytes = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM transcriptions"
+        ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'entries': entries,
+            'total_bytes': total_bytes,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    init()
+    parser = argparse.ArgumentParser(description='Show what the transcription cache holds')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Transcription cache (default: {DEFAULT_CACHE_PATH})')
+    args = parser.parse_args()
+
+    cache = TranscriptionCache(args.cache_path)
+    stats = cache.stats()
+    print(f"{Fore.GREEN}[INFO] {stats['entries']} cached transcriptions, "
+          f"{stats['total_bytes'] / 1024 / 1024:.1f} MB compressed in {args.cache_path}{Style.RESET_ALL}")
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
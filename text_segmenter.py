@@ -0,0 +1,227 @@
+import re
+import json
+import time
+import argparse
+from functools import lru_cache
+from colorama import init, Fore, Style
+
+# Boundaries tried in order, from the most to the least natural place to cut.
+# Each separator stays attached to the text before it, so "".join(segments)
+# always gives back the original text.
+BOUNDARIES = [
+    ("paragraph", re.compile(r"\n[ \t]*\n\s*")),
+    ("line", re.compile(r"\n\s*")),  # "Speaker N:" turns are one per line
+    ("speaker", re.compile(r"\s+(?=Speaker \d+:)")),
+    ("sentence", re.compile(r"[.!?]+[\"'”’)\]]*\s+|[。！？]+\s*")),
+    ("clause", re.compile(r"[,;:]\s+")),
+    ("word", re.compile(r"\s+")),
+]
+
+# gpt-3.5-turbo context window (prompt + completion)
+DEFAULT_CONTEXT_WINDOW = 16385
+
+# Tokens used by the system prompt and instructions around the text
+DEFAULT_PROMPT_OVERHEAD = 100
+
+# Translated text can take more tokens than the source (up to ~2x for
+# non-Latin scripts), and all of it has to fit in max_tokens
+DEFAULT_OUTPUT_RATIO = 2.0
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing or its encoding files unavailable offline
+        return None
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """
+    Count tokens locally, using tiktoken when it is available.
+
+    Falls back to an estimate of about 4 characters per token.
+
+    Args:
+        text (str): Text to measure
+        model (str): OpenAI model whose tokenizer should be used
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode_ordinary(text))
+
+
+def token_budget(max_output_tokens, context_window=DEFAULT_CONTEXT_WINDOW,
+                 prompt_overhead=DEFAULT_PROMPT_OVERHEAD, output_ratio=DEFAULT_OUTPUT_RATIO):
+    """
+    Largest number of source tokens that can go into one translation request.
+
+    The segment must fit in the context window next to max_output_tokens, and
+    its translation must fit in max_output_tokens so it is never truncated.
+
+    Args:
+        max_output_tokens (int): max_tokens sent with the request
+        context_window (int): Model context window
+        prompt_overhead (int): Tokens used by the prompt around the text
+        output_ratio (float): Expected translated/source token ratio
+
+    Returns:
+        int: Token budget per segment
+    """
+    fits_context = context_window - max_output_tokens - prompt_overhead
+    fits_output = int(max_output_tokens / output_ratio)
+    return max(1, min(fits_context, fits_output))
+
+
+def _split_keep_separators(text, pattern):
+    pieces = []
+    start = 0
+    for match in pattern.finditer(text):
+        end = match.end()
+        if start < end < len(text):
+            pieces.append(text[start:end])
+            start = end
+    pieces.append(text[start:])
+    return pieces
+
+
+def _hard_split(text, max_tokens, count):
+    # Last resort for text without any boundary: cut on characters
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = len(text)
+        while count(text[start:end]) > max_tokens and end - start > 1:
+            end = start + max(1, (end - start) // 2)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+def _segment(text, max_tokens, count, level):
+    if level == len(BOUNDARIES):
+        return _hard_split(text, max_tokens, count)
+
+    parts = _split_keep_separators(text, BOUNDARIES[level][1])
+    if len(parts) == 1:
+        return _segment(text, max_tokens, count, level + 1)
+
+    segments = []
+    current = ""
+    current_tokens = 0
+    for part in parts:
+        part_tokens = count(part)
+        if current_tokens + part_tokens <= max_tokens:
+            current += part
+            current_tokens += part_tokens
+            continue
+
+        if current:
+            segments.append(current)
+        if part_tokens <= max_tokens:
+            current, current_tokens = part, part_tokens
+        else:
+            # The part alone is too big: cut it at the next, finer boundary
+            # and keep filling the last piece with the parts that follow
+            sub_segments = _segment(part, max_tokens, count, level + 1)
+            segments.extend(sub_segments[:-1])
+            current = sub_segments[-1]
+            current_tokens = count(current)
+
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_text(text, max_tokens, model="gpt-3.5-turbo"):
+    """
+    Split text into segments of at most max_tokens tokens.
+
+    Segments are packed greedily and cut at the most natural boundary
+    available: paragraphs, then lines and "Speaker N:" turns, then
+    sentences, clauses and words. The separators are kept, so
+    "".join(segments) == text.
+
+    Args:
+        text (str): Text to split
+        max_tokens (int): Token budget per segment (see token_budget)
+        model (str): OpenAI model whose tokenizer should be used
+
+    Returns:
+        list: The segments, in order
+    """
+    if not text:
+        return []
+
+    def count(piece):
+        return count_tokens(piece, model)
+
+    if count(text) <= max_tokens:
+        return [text]
+    return _segment(text, max_tokens, count, 0)
+
+
+def run_benchmark(data_path, max_tokens, fixed_chunk_size=4000):
+    """
+    Benchmark segment_text on the real video transcripts against the old
+    fixed-size character slicing.
+
+    Args:
+        data_path (str): Path to video-data-updated.json
+        max_tokens (int): Token budget per segment
+        fixed_chunk_size (int): Chunk size of the old slicing, in characters
+    """
+    with open(data_path, 'r', encoding='utf-8') as f:
+        video_data = json.load(f)
+    transcripts = [item['mp3_content'] for item in video_data if item.get('mp3_content')]
+    total_chars = sum(len(text) for text in transcripts)
+    print(f"{Fore.CYAN}[INFO] {len(transcripts)} transcripts, {total_chars} chars, "
+          f"max {max(len(text) for text in transcripts)} chars{Style.RESET_ALL}")
+
+    # Warm up the tokenizer so loading it is not part of the timing
+    count_tokens("warm up")
+
+    start_time = time.perf_counter()
+    segmented = [segment_text(text, max_tokens) for text in transcripts]
+    elapsed = time.perf_counter() - start_time
+
+    lossless = all("".join(segments) == text for segments, text in zip(segmented, transcripts))
+    segment_tokens = [count_tokens(segment) for segments in segmented for segment in segments]
+    mid_word_cuts = sum(
+        1 for segments in segmented for segment in segments[:-1]
+        if not segment[-1].isspace()
+    )
+
+    fixed_chunks = [text[i:i + fixed_chunk_size] for text in transcripts for i in range(0, len(text), fixed_chunk_size)]
+    fixed_mid_word_cuts = sum(
+        1 for text in transcripts for i in range(fixed_chunk_size, len(text), fixed_chunk_size)
+        if not text[i - 1].isspace() and not text[i].isspace()
+    )
+
+    print(f"{Fore.GREEN}[INFO] segment_text: {len(segment_tokens)} requests, "
+          f"avg {sum(segment_tokens) / len(segment_tokens):.0f} / max {max(segment_tokens)} tokens "
+          f"(budget {max_tokens}), {mid_word_cuts} mid-word cuts, lossless={lossless}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] segment_text: {elapsed * 1000:.1f} ms total, "
+          f"{total_chars / elapsed / 1024 / 1024:.2f} MB/s{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}[INFO] fixed {fixed_chunk_size}-char slices: {len(fixed_chunks)} requests, "
+          f"{fixed_mid_word_cuts} mid-word cuts{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    init()
+    parser = argparse.ArgumentParser(description='Benchmark the transcript segmenter on real data')
+    parser.add_argument('--data', type=str, default='data/video-data-updated.json',
+                        help='Video data JSON with mp3_content transcripts')
+    parser.add_argument('--max-output-tokens', type=int, default=4096,
+                        help='max_tokens used for translation requests (default: 4096)')
+    args = parser.parse_args()
+    run_benchmark(args.data, token_budget(args.max_output_tokens))
@@ -1,11 +1,27 @@
 import json
 import os
-import time
+import sys
+import hashlib
 import asyncio
 import argparse
+from functools import lru_cache
 from colorama import init, Fore, Style
-import openai
 from dotenv import load_dotenv
+from translation_engine import (
+    TranslationEngine,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    PACK_MAX_TEXT_TOKENS,
+    TRANSLATION_ERROR_MARKERS,
+)
+from translation_cache import TranslationCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_MAX_BYTES
+from text_segmenter import count_tokens, segment_text
+from translation_journal import CheckpointJournal, write_json_atomic
+
+# The dataset store lives next to the pipeline scripts in data/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+from dataset_store import DatasetStore
 
 # Initialize colorama for colored output
 init()
@@ -19,8 +35,11 @@ if not OPENAI_API_KEY:
     print(f"{Fore.RED}[ERROR] OPENAI_API_KEY not found. Please set it first.{Style.RESET_ALL}")
     exit(1)
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
+# Initialize the async translation engine (reconfigured from the command line in main)
+engine = TranslationEngine(api_key=OPENAI_API_KEY)
+
+# Maximum number of items translated at the same time
+MAX_CONCURRENT_ITEMS = 8
 
 # Supported languages - you can add more here
 SUPPORTED_LANGUAGES = {
@@ -40,14 +59,30 @@ SUPPORTED_LANGUAGES = {
 # Default language for translation
 DEFAULT_LANGUAGE = "turkish"
 
-async def translate_text(text, target_language, chunk_size=4000, retry_count=3):
+# Fields that are translated (and tracked in the source manifest) per item type
+VIDEO_TRANSLATED_FIELDS = ['name_video', 'description_video', 'mp3_content']
+BLOG_TRANSLATED_FIELDS = ['name_blog', 'description_blog', 'table_of_contents', 'whole_content']
+# Source fields tied to the English text (utterance offsets into mp3_content), left out of translations
+SOURCE_ONLY_FIELDS = ['mp3_utterances']
+
+@lru_cache(maxsize=4096)
+def get_segments(text, max_segment_tokens, model):
+    """
+    Segment a text once and reuse the result for every target language.
+    
+    Returns:
+        tuple: The segments from segment_text
+    """
+    return tuple(segment_text(text, max_segment_tokens, model))
+
+async def translate_text(text, target_language, max_segment_tokens=None, retry_count=3):
     """
-    Translate text using OpenAI's API.
+    Translate text using OpenAI's API, serving repeated requests from the translation cache.
     
     Args:
         text (str): Text to translate
         target_language (str): Target language
-        chunk_size (int): Maximum characters per chunk
+        max_segment_tokens (int): Maximum source tokens per request (defaults to the engine budget)
         retry_count (int): Number of retries if API call fails
         
     Returns:
@@ -56,57 +91,57 @@ async def translate_text(text, target_language, chunk_size=4000, retry_count=3):
     if not text or len(text.strip()) == 0:
         return ""
     
-    # For very large texts, split them into chunks
-    if len(text) > chunk_size:
-        print(f"{Fore.YELLOW}[DEBUG] Text is too large ({len(text)} chars). Splitting into chunks.{Style.RESET_ALL}")
-        chunks = []
-        for i in range(0, len(text), chunk_size):
-            chunks.append(text[i:i + chunk_size])
+    if max_segment_tokens is None:
+        max_segment_tokens = engine.max_segment_tokens
+    
+    # Short strings (titles, descriptions, TOC entries) are packed with others into one request
+    if count_tokens(text, engine.model) <= PACK_MAX_TEXT_TOKENS:
+        return await engine.translate_packed(text, target_language, retry_count)
+    
+    # For very large texts, split them into segments at paragraph, speaker and sentence boundaries
+    segments = get_segments(text, max_segment_tokens, engine.model)
+    if len(segments) > 1:
+        print(f"{Fore.YELLOW}[DEBUG] Text is too large ({len(text)} chars). Translating {len(segments)} segments concurrently.{Style.RESET_ALL}")
         
-        # Translate each chunk
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            print(f"{Fore.YELLOW}[DEBUG] Translating chunk {i+1}/{len(chunks)} ({len(chunk)} chars){Style.RESET_ALL}")
-            translated_chunk = await translate_text(chunk, target_language)
-            translated_chunks.append(translated_chunk)
+        # gather keeps the translated segments in order
+        translated_segments = await asyncio.gather(
+            *(translate_segment(segment, target_language, retry_count) for segment in segments)
+        )
         
-        return "".join(translated_chunks)
+        return "".join(translated_segments)
     
-    # Perform the translation with retries
-    for attempt in range(retry_count):
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": f"You are a professional translator. Translate the text into {target_language} while preserving formatting, such as line breaks, paragraph structure, and any markdown formatting."},
-                    {"role": "user", "content": f"Translate the following text to {target_language}:\n\n{text}"}
-                ],
-                temperature=0.3,
-                max_tokens=4096
-            )
-            
-            translated_text = response.choices[0].message.content
-            return translated_text
+    # Check the cache, then perform the translation with retries
+    return await engine.translate(text, target_language, retry_count)
+
+async def translate_segment(segment, target_language, retry_count=3):
+    """
+    Translate one segment of a longer text, keeping the whitespace around it
+    so the translated segments join back with the original separators.
+    
+    Args:
+        segment (str): Segment produced by segment_text
+        target_language (str): Target language
+        retry_count (int): Number of retries if API call fails
         
-        except Exception as e:
-            print(f"{Fore.RED}[ERROR] Translation failed (attempt {attempt+1}/{retry_count}): {str(e)}{Style.RESET_ALL}")
-            if attempt < retry_count - 1:
-                wait_time = 2 * (attempt + 1)  # Exponential backoff
-                print(f"{Fore.YELLOW}[DEBUG] Retrying in {wait_time} seconds...{Style.RESET_ALL}")
-                time.sleep(wait_time)
-            else:
-                return f"[TRANSLATION ERROR] {text[:100]}..."
+    Returns:
+        str: The translated segment
+    """
+    body = segment.strip()
+    if not body:
+        return segment
     
-    # If all retries fail, return this message
-    return f"[TRANSLATION FAILED] {text[:100]}..."
+    start = segment.index(body)
+    translated_body = await engine.translate(body, target_language, retry_count)
+    return segment[:start] + translated_body + segment[start + len(body):]
 
-async def translate_video_data(video_data, target_language):
+async def translate_video_data(video_data, target_language, fields=None):
     """
     Translate relevant fields in video data.
     
     Args:
         video_data (dict): Video data item
         target_language (str): Target language
+        fields (set): Only translate these fields (default: all of VIDEO_TRANSLATED_FIELDS)
         
     Returns:
         dict: Translated video data
@@ -114,7 +149,7 @@ async def translate_video_data(video_data, target_language):
     print(f"{Fore.CYAN}[INFO] Translating video: {video_data.get('name_video', 'Unnamed')}{Style.RESET_ALL}")
     
     # Create a deep copy to avoid modifying original data
-    translated_item = video_data.copy()
+    translated_item = {key: value for key, value in video_data.items() if key not in SOURCE_ONLY_FIELDS}
     
     # List of fields to translate
     fields_to_translate = [
@@ -126,21 +161,30 @@ async def translate_video_data(video_data, target_language):
     if 'mp3_content' in video_data and video_data['mp3_content']:
         fields_to_translate.append(('mp3_content', 'mp3_content'))
     
-    # Translate each field
+    # Translate all fields concurrently
+    target_fields = []
+    translations = []
     for original_field, target_field in fields_to_translate:
+        if fields is not None and original_field not in fields:
+            continue
         if original_field in video_data and video_data[original_field]:
             print(f"{Fore.YELLOW}[DEBUG] Translating field: {original_field} ({len(str(video_data[original_field]))} chars){Style.RESET_ALL}")
-            translated_item[target_field] = await translate_text(str(video_data[original_field]), target_language)
-    
+            target_fields.append(target_field)
+            translations.append(translate_text(str(video_data[original_field]), target_language))
+
+    for target_field, translated_text in zip(target_fields, await asyncio.gather(*translations)):
+        translated_item[target_field] = translated_text
+
     return translated_item
 
-async def translate_blog_data(blog_data, target_language):
+async def translate_blog_data(blog_data, target_language, fields=None):
     """
     Translate relevant fields in blog data.
     
     Args:
         blog_data (dict): Blog data item
         target_language (str): Target language
+        fields (set): Only translate these fields (default: all of BLOG_TRANSLATED_FIELDS)
         
     Returns:
         dict: Translated blog data
@@ -156,41 +200,247 @@ async def translate_blog_data(blog_data, target_language):
         ('description_blog', 'description_blog')
     ]
     
-    # Translate each field
+    # Schedule each field; everything is awaited together below
+    target_fields = []
+    field_translations = []
     for original_field, target_field in fields_to_translate:
+        if fields is not None and original_field not in fields:
+            continue
         if original_field in blog_data and blog_data[original_field]:
             print(f"{Fore.YELLOW}[DEBUG] Translating field: {original_field} ({len(str(blog_data[original_field]))} chars){Style.RESET_ALL}")
-            translated_item[target_field] = await translate_text(str(blog_data[original_field]), target_language)
-    
+            target_fields.append(target_field)
+            field_translations.append(translate_text(str(blog_data[original_field]), target_language))
+
     # Translate blog content if it exists
-    if 'content' in blog_data and 'whole_content' in blog_data['content'] and blog_data['content']['whole_content']:
-        print(f"{Fore.YELLOW}[DEBUG] Translating blog content ({len(blog_data['content']['whole_content'])} chars){Style.RESET_ALL}")
-        
+    has_content = 'content' in blog_data and 'whole_content' in blog_data['content'] and blog_data['content']['whole_content']
+    translate_toc = has_content and 'table_of_contents' in blog_data['content'] and (fields is None or 'table_of_contents' in fields)
+    translate_whole = has_content and (fields is None or 'whole_content' in fields)
+    toc_translations = []
+    whole_translations = []
+    if has_content:
         # Create a copy of the content structure
         translated_item['content'] = blog_data['content'].copy()
+
+    # Translate table of contents if it exists
+    if translate_toc:
+        for toc_item in blog_data['content']['table_of_contents']:
+            toc_translations.append(translate_text(toc_item, target_language))
+
+    # Translate the whole content
+    if translate_whole:
+        print(f"{Fore.YELLOW}[DEBUG] Translating blog content ({len(blog_data['content']['whole_content'])} chars){Style.RESET_ALL}")
+        whole_translations.append(translate_text(blog_data['content']['whole_content'], target_language))
+
+    # Translate fields, TOC entries and content concurrently
+    translated_fields, translated_toc, translated_whole = await asyncio.gather(
+        asyncio.gather(*field_translations),
+        asyncio.gather(*toc_translations),
+        asyncio.gather(*whole_translations)
+    )
+
+    for target_field, translated_text in zip(target_fields, translated_fields):
+        translated_item[target_field] = translated_text
+
+    if translate_toc:
+        translated_item['content']['table_of_contents'] = list(translated_toc)
+    if translate_whole:
+        translated_item['content']['whole_content'] = translated_whole[0]
+
+    return translated_item
+
+def get_translated_fields(item, label):
+    """
+    Get the values of the fields that are translated for an item.
+    
+    Args:
+        item (dict): Source or translated video/blog item
+        label (str): "video" or "blog"
         
-        # Translate table of contents if it exists
-        if 'table_of_contents' in blog_data['content']:
-            translated_toc = []
-            for toc_item in blog_data['content']['table_of_contents']:
-                translated_toc_item = await translate_text(toc_item, target_language)
-                translated_toc.append(translated_toc_item)
-            translated_item['content']['table_of_contents'] = translated_toc
-        
-        # Translate the whole content
-        translated_item['content']['whole_content'] = await translate_text(
-            blog_data['content']['whole_content'], 
-            target_language
-        )
+    Returns:
+        dict: Field name -> value (TOC entries as a list)
+    """
+    if label == "video":
+        return {field: item.get(field) for field in VIDEO_TRANSLATED_FIELDS}
+    content = item.get('content') or {}
+    return {
+        field: content.get(field) if field in ('table_of_contents', 'whole_content') else item.get(field)
+        for field in BLOG_TRANSLATED_FIELDS
+    }
+
+def hash_source_fields(item, label):
+    """
+    Hash every translated field of a source item for the manifest.
     
-    return translated_item
+    Returns:
+        dict: Field name -> short SHA-256 of the field value
+    """
+    return {
+        field: hashlib.sha256(json.dumps(value, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+        for field, value in get_translated_fields(item, label).items()
+    }
 
-async def process_data_async(target_language):
+def copy_translated_fields(target_item, translated_item, fields, label):
     """
-    Process and translate both video and blog data.
+    Copy already translated field values into a freshly translated item.
+    
+    Args:
+        target_item (dict): Item to update in place
+        translated_item (dict): Item from a previous translation run
+        fields (iterable): Field names to copy
+        label (str): "video" or "blog"
+    """
+    for field in fields:
+        if field in ('table_of_contents', 'whole_content'):
+            previous_content = translated_item.get('content') or {}
+            if field in previous_content and target_item.get('content') is not None:
+                target_item['content'] = dict(target_item['content'])
+                target_item['content'][field] = previous_content[field]
+        elif field in translated_item:
+            target_item[field] = translated_item[field]
+
+def has_translation_error(value):
+    """
+    Check whether a translated value contains a failed translation marker.
+    """
+    values = value if isinstance(value, list) else [value]
+    return any(isinstance(text, str) and any(marker in text for marker in TRANSLATION_ERROR_MARKERS) for text in values)
+
+async def translate_items(items, translate_item, target_language, output_path, label, item_semaphore, resume=False, delta=False):
+    """
+    Translate a list of items concurrently, journaling each finished item.
+    
+    Finished items are appended to a JSONL journal next to the output file.
+    With resume=True the journal is replayed first and completed items are
+    skipped. With delta=True only new or changed fields (according to the
+    source manifest) are translated, matching items by page_url, and the
+    rest is taken from the existing output. The pretty JSON output and the
+    manifest are written once, atomically, at the end.
+
+    Args:
+        items (list): Items to translate
+        translate_item (callable): translate_video_data or translate_blog_data
+        target_language (str): Target language
+        output_path (str): JSON file to write the translated items to
+        label (str): Item label used in log messages ("video" or "blog")
+        item_semaphore (asyncio.Semaphore): Worker pool shared by all languages
+        resume (bool): Reuse items already recorded in the journal
+        delta (bool): Only translate fields that changed since the last run
+
+    Returns:
+        list: Translated items in the same order as `items`
+    """
+    base_path = os.path.splitext(output_path)[0]
+    journal = CheckpointJournal(base_path + ".journal.jsonl")
+    manifest_path = base_path + ".manifest.json"
+    translated_items = [None] * len(items)
+    source_hashes = [hash_source_fields(item, label) for item in items]
+    
+    # Replay the journal, accepting only records that still match the source item
+    # (same page_url and source fields) and hold no failed translations
+    if resume:
+        for record in journal.replay():
+            index = record.get('index')
+            if not (isinstance(index, int) and 0 <= index < len(items)):
+                continue
+            if items[index].get('page_url') != record.get('page_url') or record.get('source_hash') != source_hashes[index]:
+                continue
+            if any(has_translation_error(value) for value in get_translated_fields(record['item'], label).values()):
+                continue
+            translated_items[index] = record['item']
+        resumed = sum(1 for item in translated_items if item is not None)
+        print(f"{Fore.GREEN}[INFO] Resuming {target_language} {label} data: {resumed}/{len(items)} items already translated{Style.RESET_ALL}")
+    
+    # Work out which fields of which items need translating; None means the whole item
+    fields_by_index = {i: None for i in range(len(items)) if translated_items[i] is None}
+    previous_by_url = {}
+    if delta:
+        previous_items = []
+        if os.path.exists(output_path):
+            previous_items = load_items(output_path, f"existing {target_language} {label}") or []
+        previous_by_url = {item.get('page_url'): item for item in previous_items}
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        for i in list(fields_by_index):
+            page_url = items[i].get('page_url')
+            if page_url not in previous_by_url or page_url not in manifest:
+                continue
+            changed = {field for field, field_hash in source_hashes[i].items() if manifest[page_url].get(field) != field_hash}
+            if changed:
+                fields_by_index[i] = changed
+            else:
+                # Nothing changed: refresh untranslated fields from the source, keep the translations
+                translated_items[i] = {key: value for key, value in items[i].items() if key not in SOURCE_ONLY_FIELDS}
+                copy_translated_fields(translated_items[i], previous_by_url[page_url], source_hashes[i], label)
+                del fields_by_index[i]
+        removed = len(set(previous_by_url) - {item.get('page_url') for item in items})
+        changed_items = sum(1 for fields in fields_by_index.values() if fields is not None)
+        new_items = len(fields_by_index) - changed_items
+        print(f"{Fore.GREEN}[INFO] Delta {target_language} {label}: {new_items} new, {changed_items} changed, "
+              f"{len(items) - len(fields_by_index)} unchanged, {removed} removed{Style.RESET_ALL}")
+    journal.open(resume=resume)
     
+    async def translate_with_semaphore(i, item, fields):
+        async with item_semaphore:
+            print(f"{Fore.CYAN}[INFO] Processing {target_language} {label} item {i+1}/{len(items)}{Style.RESET_ALL}")
+            translated_item = await translate_item(item, target_language, fields)
+            if fields is not None:
+                # Keep the previous translations of the fields that did not change
+                unchanged = set(source_hashes[i]) - fields
+                copy_translated_fields(translated_item, previous_by_url[item.get('page_url')], unchanged, label)
+            return i, translated_item
+
+    tasks = [
+        asyncio.create_task(translate_with_semaphore(i, items[i], fields))
+        for i, fields in fields_by_index.items()
+    ]
+    
+    done_count = len(items) - len(tasks)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, translated_item = await next_done
+            translated_items[i] = translated_item
+            # Items with failed fields are not journaled, so --resume translates them again
+            if not any(has_translation_error(value) for value in get_translated_fields(translated_item, label).values()):
+                journal.append({'index': i, 'page_url': items[i].get('page_url'), 'source_hash': source_hashes[i],
+                                'item': translated_item})
+            done_count += 1
+            print(f"{Fore.GREEN}[INFO] Progress: {target_language} {done_count}/{len(items)} {label} items translated{Style.RESET_ALL}")
+    finally:
+        # Do not leave orphaned translations running if something failed
+        for task in tasks:
+            task.cancel()
+        journal.close()
+    
+    # Record the source hash of every successfully translated field for the next delta run
+    manifest = {}
+    for item, translated_item, field_hashes in zip(items, translated_items, source_hashes):
+        translated_values = get_translated_fields(translated_item, label)
+        manifest[item.get('page_url')] = {
+            field: field_hash for field, field_hash in field_hashes.items()
+            if not has_translation_error(translated_values[field])
+        }
+    
+    # Write the final output once, then drop the journal it was built from
+    write_json_atomic(output_path, translated_items)
+    write_json_atomic(manifest_path, manifest)
+    journal.remove()
+    print(f"{Fore.GREEN}[INFO] Saved {len(translated_items)} {label} items to {output_path}{Style.RESET_ALL}")
+
+    return translated_items
+
+async def translate_language(video_data, blog_data, target_language, item_semaphore, resume=False, delta=False):
+    """
+    Translate the already loaded video and blog data into one language.
+
     Args:
+        video_data (list): Video items, or None if they could not be loaded
+        blog_data (list): Blog items, or None if they could not be loaded
         target_language (str): Target language for translation
+        item_semaphore (asyncio.Semaphore): Worker pool shared by all languages
+        resume (bool): Skip items already recorded in the checkpoint journals
+        delta (bool): Only translate new or changed fields
     """
     print(f"{Fore.CYAN}[INFO] Starting translation process to {target_language}{Style.RESET_ALL}")
     
@@ -199,60 +449,80 @@ async def process_data_async(target_language):
     os.makedirs(translation_dir, exist_ok=True)
     
     # Process video data
-    try:
-        # Load video data
-        with open('video-data-updated.json', 'r', encoding='utf-8') as f:
-            video_data = json.load(f)
-        print(f"{Fore.GREEN}[INFO] Loaded video data with {len(video_data)} items{Style.RESET_ALL}")
-        
-        # Translate video data
-        translated_video_data = []
-        for i, item in enumerate(video_data):
-            print(f"{Fore.CYAN}[INFO] Processing video item {i+1}/{len(video_data)}{Style.RESET_ALL}")
-            translated_item = await translate_video_data(item, target_language)
-            translated_video_data.append(translated_item)
+    if video_data is not None:
+        try:
+            video_output_path = os.path.join(translation_dir, "video-data.json")
+            await translate_items(video_data, translate_video_data, target_language, video_output_path, "video", item_semaphore, resume, delta)
+            print(f"{Fore.GREEN}[INFO] Completed translation of video data to {target_language}{Style.RESET_ALL}")
             
-            # Save progress periodically (every 5 items)
-            if (i+1) % 5 == 0 or i == len(video_data) - 1:
-                video_output_path = os.path.join(translation_dir, "video-data.json")
-                with open(video_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(translated_video_data, f, indent=2, ensure_ascii=False)
-                print(f"{Fore.GREEN}[INFO] Saved progress: {i+1}/{len(video_data)} video items translated{Style.RESET_ALL}")
-        
-        print(f"{Fore.GREEN}[INFO] Completed translation of video data to {target_language}{Style.RESET_ALL}")
-        
-    except Exception as e:
-        print(f"{Fore.RED}[ERROR] Failed to process video data: {str(e)}{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}[ERROR] Failed to process {target_language} video data: {str(e)}{Style.RESET_ALL}")
     
     # Process blog data
-    try:
-        # Load blog data
-        with open('blog-data.json', 'r', encoding='utf-8') as f:
-            blog_data = json.load(f)
-        print(f"{Fore.GREEN}[INFO] Loaded blog data with {len(blog_data)} items{Style.RESET_ALL}")
-        
-        # Translate blog data
-        translated_blog_data = []
-        for i, item in enumerate(blog_data):
-            print(f"{Fore.CYAN}[INFO] Processing blog item {i+1}/{len(blog_data)}{Style.RESET_ALL}")
-            translated_item = await translate_blog_data(item, target_language)
-            translated_blog_data.append(translated_item)
+    if blog_data is not None:
+        try:
+            blog_output_path = os.path.join(translation_dir, "blog-data.json")
+            await translate_items(blog_data, translate_blog_data, target_language, blog_output_path, "blog", item_semaphore, resume, delta)
+            print(f"{Fore.GREEN}[INFO] Completed translation of blog data to {target_language}{Style.RESET_ALL}")
             
-            # Save progress periodically (every 5 items)
-            if (i+1) % 5 == 0 or i == len(blog_data) - 1:
-                blog_output_path = os.path.join(translation_dir, "blog-data.json")
-                with open(blog_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(translated_blog_data, f, indent=2, ensure_ascii=False)
-                print(f"{Fore.GREEN}[INFO] Saved progress: {i+1}/{len(blog_data)} blog items translated{Style.RESET_ALL}")
-        
-        print(f"{Fore.GREEN}[INFO] Completed translation of blog data to {target_language}{Style.RESET_ALL}")
-        
+        except Exception as e:
+            print(f"{Fore.RED}[ERROR] Failed to process {target_language} blog data: {str(e)}{Style.RESET_ALL}")
+    
+    print(f"{Fore.GREEN}[INFO] === {target_language.upper()} COMPLETED === Results saved to translation/{target_language.lower()}/{Style.RESET_ALL}")
+
+def load_items(path, label):
+    """
+    Load a JSON list of items, returning None (and logging) if it fails.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        print(f"{Fore.GREEN}[INFO] Loaded {label} data with {len(items)} items{Style.RESET_ALL}")
+        return items
     except Exception as e:
-        print(f"{Fore.RED}[ERROR] Failed to process blog data: {str(e)}{Style.RESET_ALL}")
+        print(f"{Fore.RED}[ERROR] Failed to process {label} data: {str(e)}{Style.RESET_ALL}")
+        return None
+
+async def process_data_async(target_languages, resume=False, delta=False, store=None):
+    """
+    Process and translate both video and blog data.
+    
+    The source files are loaded once and every language is translated
+    concurrently on one shared worker pool, engine and rate limiter.
+    
+    Args:
+        target_languages (list): Target languages for translation (or a single language)
+        resume (bool): Continue from the checkpoint journals of an interrupted run
+        delta (bool): Only translate fields that changed since the last run
+        store (DatasetStore): Read the source items from this store instead of the JSON files
+    """
+    if isinstance(target_languages, str):
+        target_languages = [target_languages]
+    
+    # Load the source data once for all languages
+    if store:
+        video_data = list(store.iter_items('video'))
+        blog_data = list(store.iter_items('blog'))
+        print(f"{Fore.GREEN}[INFO] Loaded {len(video_data)} video and {len(blog_data)} blog items from {store.path}{Style.RESET_ALL}")
+    else:
+        video_data = load_items('video-data-updated.json', "video")
+        blog_data = load_items('blog-data.json', "blog")
+    
+    item_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ITEMS)
+    await asyncio.gather(
+        *(translate_language(video_data, blog_data, target_language, item_semaphore, resume, delta) for target_language in target_languages)
+    )
     
     print(f"\n{Fore.GREEN}[INFO] === TRANSLATION COMPLETED ===={Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[INFO] All data has been translated to {target_language}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[INFO] Results saved to translation/{target_language.lower()}/{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[INFO] All data has been translated to {', '.join(target_languages)}{Style.RESET_ALL}")
+    for target_language in target_languages:
+        print(f"{Fore.GREEN}[INFO] Results saved to translation/{target_language.lower()}/{Style.RESET_ALL}")
+    
+    # Report how much work the translation cache saved
+    if engine.cache is not None:
+        stats = engine.cache.stats()
+        print(f"{Fore.GREEN}[INFO] Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+              f"{stats['stores']} stored, {stats['evictions']} evicted, {stats['total_bytes'] / 1024 / 1024:.1f} MB on disk{Style.RESET_ALL}")
 
 def main():
     """
@@ -262,8 +532,30 @@ def main():
     parser = argparse.ArgumentParser(description='Translate video and blog data to different languages')
     parser.add_argument('--language', type=str, default=DEFAULT_LANGUAGE,
                         help=f'Target language for translation (default: {DEFAULT_LANGUAGE})')
+    parser.add_argument('--languages', type=str, nargs='+',
+                        help='Translate into several languages in one pass, e.g. "--languages turkish french" or "--languages all"')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its checkpoint journals')
+    parser.add_argument('--delta', action='store_true',
+                        help='Only translate new or changed fields and merge them into the existing translations')
+    parser.add_argument('--db', type=str,
+                        help='Read the source items from this SQLite dataset store instead of the JSON files')
     parser.add_argument('--list-languages', action='store_true',
                         help='List all supported languages')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f'Maximum number of API requests in flight (default: {DEFAULT_MAX_CONCURRENCY})')
+    parser.add_argument('--rpm', type=int, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help=f'Requests-per-minute limit (default: {DEFAULT_REQUESTS_PER_MINUTE})')
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TOKENS_PER_MINUTE,
+                        help=f'Tokens-per-minute limit (default: {DEFAULT_TOKENS_PER_MINUTE})')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'SQLite translation cache shared across runs and languages (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help=f'Maximum cache size in MB before old entries are evicted (default: {DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the API, ignoring the translation cache')
+    parser.add_argument('--base-url', type=str, default=os.getenv('OPENAI_BASE_URL'),
+                        help='OpenAI-compatible API base URL, e.g. a local fake server (default: $OPENAI_BASE_URL or api.openai.com)')
     args = parser.parse_args()
     
     # List all supported languages if requested
@@ -273,15 +565,45 @@ def main():
             print(f"  - {lang_code} ({lang_name})")
         return
     
-    # Check if the specified language is supported
-    target_language = args.language.lower()
-    if target_language not in SUPPORTED_LANGUAGES:
-        print(f"{Fore.RED}[ERROR] Unsupported language: {target_language}{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[INFO] Use --list-languages to see all supported languages{Style.RESET_ALL}")
-        return
+    # Check if the specified languages are supported
+    if args.languages:
+        requested = [language.strip().lower() for value in args.languages for language in value.split(',') if language.strip()]
+        if 'all' in requested:
+            requested = list(SUPPORTED_LANGUAGES)
+    else:
+        requested = [args.language.lower()]
+    for target_language in requested:
+        if target_language not in SUPPORTED_LANGUAGES:
+            print(f"{Fore.RED}[ERROR] Unsupported language: {target_language}{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}[INFO] Use --list-languages to see all supported languages{Style.RESET_ALL}")
+            return
+    target_languages = [SUPPORTED_LANGUAGES[target_language] for target_language in dict.fromkeys(requested)]
+    
+    # Open the translation cache unless disabled
+    cache = None
+    if not args.no_cache:
+        cache = TranslationCache(args.cache_path, max_bytes=args.cache_max_mb * 1024 * 1024)
+    
+    # Configure the translation engine with the requested limits
+    global engine
+    engine = TranslationEngine(
+        api_key=OPENAI_API_KEY,
+        max_concurrency=args.max_concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        cache=cache,
+        base_url=args.base_url
+    )
     
     # Start the translation process
-    asyncio.run(process_data_async(SUPPORTED_LANGUAGES[target_language]))
+    store = DatasetStore(args.db) if args.db else None
+    try:
+        asyncio.run(process_data_async(target_languages, resume=args.resume, delta=args.delta, store=store))
+    finally:
+        if cache is not None:
+            cache.close()
+        if store:
+            store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# Default location of the cache, shared by every language
+DEFAULT_CACHE_PATH = os.path.join("translation", "translation-cache.sqlite")
+
+# Default maximum size of the cached translations (source + translated text)
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def make_cache_key(model, messages):
+    """
+    Build a content-addressed cache key for a chat request.
+
+    The messages hold the prompt, the target language and the source text,
+    so any change to one of them (or to the model) gives a different key.
+
+    Args:
+        model (str): OpenAI model name
+        messages (list): Chat messages that would be sent
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Persistent SQLite cache of translations keyed by make_cache_key.
+
+    Entries are evicted least-recently-used first once the stored text
+    exceeds max_bytes. Hit/miss counters cover the current run.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                target_language TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+
+    def get(self, key):
+        """
+        Look up a cached translation and mark it as recently used.
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            str: The cached translation, or None on a miss
+        """
+        row = self.connection.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute("UPDATE translations SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        return row[0]
+
+    def set(self, key, target_language, source_text, translation):
+        """
+        Store a translation, evicting old entries if the cache is too large.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            target_language (str): Target language (kept for inspection)
+            source_text (str): Source text, counted towards the entry size
+            translation (str): Translated text
+        """
+        size = len(source_text.encode("utf-8")) + len(translation.encode("utf-8"))
+        previous = self.connection.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO translations (key, target_language, translation, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, target_language, translation, size, time.time())
+        )
+        self.total_bytes += size - (previous[0] if previous else 0)
+        self.stores += 1
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+        self.connection.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is at 90% of its budget
+        target_bytes = int(self.max_bytes * 0.9)
+        cursor = self.connection.execute("SELECT key, size FROM translations ORDER BY last_used")
+        evicted = []
+        for key, size in cursor:
+            if self.total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self.total_bytes -= size
+        cursor.close()
+        self.connection.executemany("DELETE FROM translations WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/store/eviction counters and the current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "total_bytes": self.total_bytes,
+        }
+
+    def close(self):
+        self.connection.close()
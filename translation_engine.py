@@ -0,0 +1,327 @@
+import re
+import json
+import time
+import asyncio
+from colorama import Fore, Style
+import openai
+from translation_cache import make_cache_key
+from text_segmenter import count_tokens, token_budget
+
+# Default OpenAI settings used by translate-data.py
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_MAX_TOKENS = 4096
+DEFAULT_TEMPERATURE = 0.3
+
+# Default throughput limits - tune these to your OpenAI account tier
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+
+# Prefixes of the placeholders returned when a translation fails
+TRANSLATION_ERROR_MARKERS = ("[TRANSLATION ERROR]", "[TRANSLATION FAILED]")
+
+# Request packing for short strings (titles, descriptions, TOC entries)
+PACK_MAX_TEXT_TOKENS = 200  # texts up to this size are packed with others
+PACK_MAX_ITEMS = 40  # maximum strings per packed request
+PACK_DELAY = 0.05  # seconds to wait for more strings before sending a pack
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter that enforces both requests-per-minute and
+    tokens-per-minute. Each bucket refills continuously, so short bursts
+    up to the per-minute budget are allowed.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = float(requests_per_minute)
+        self.available_tokens = float(tokens_per_minute)
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.available_requests = min(
+            self.requests_per_minute,
+            self.available_requests + elapsed * self.requests_per_minute / 60
+        )
+        self.available_tokens = min(
+            self.tokens_per_minute,
+            self.available_tokens + elapsed * self.tokens_per_minute / 60
+        )
+
+    async def acquire(self, tokens):
+        """
+        Wait until one request and `tokens` tokens are available, then take them.
+
+        Args:
+            tokens (int): Number of tokens the request is expected to use
+        """
+        # A single request can never need more than a full minute of tokens
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                missing_requests = max(0.0, 1 - self.available_requests)
+                missing_tokens = max(0.0, tokens - self.available_tokens)
+                wait_time = max(
+                    missing_requests * 60 / self.requests_per_minute,
+                    missing_tokens * 60 / self.tokens_per_minute
+                )
+                await asyncio.sleep(wait_time)
+
+
+class TranslationEngine:
+    """
+    Asynchronous translation engine around the OpenAI chat API.
+
+    All requests share one semaphore (bounded concurrency) and one rate
+    limiter, so items, fields and chunks can be scheduled freely with
+    asyncio.gather without overrunning the API limits. With a
+    TranslationCache attached, cached translations never reach the
+    network, and identical requests in flight at the same time are sent
+    only once. Short strings sent through translate_packed are combined
+    into JSON-array requests per target language.
+    """
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+                 max_tokens=DEFAULT_MAX_TOKENS, temperature=DEFAULT_TEMPERATURE, cache=None,
+                 base_url=None, client=None):
+        # base_url points the engine at any OpenAI-compatible endpoint (e.g. a local fake);
+        # client replaces the AsyncOpenAI client altogether
+        self.client = client or openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        # Largest source segment whose translation still fits in max_tokens
+        self.max_segment_tokens = token_budget(max_tokens)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.cache = cache
+        self.pending = {}
+        # target_language -> list of (text, key, future) waiting to be packed
+        self.packs = {}
+        self.pack_token_counts = {}
+        self.pack_timers = {}
+        self.pack_tasks = set()
+
+    def build_messages(self, text, target_language):
+        return [
+            {"role": "system", "content": f"You are a professional translator. Translate the text into {target_language} while preserving formatting, such as line breaks, paragraph structure, and any markdown formatting."},
+            {"role": "user", "content": f"Translate the following text to {target_language}:\n\n{text}"}
+        ]
+
+    def build_packed_messages(self, texts, target_language):
+        return [
+            {"role": "system", "content": f"You are a professional translator. You receive a JSON array of strings. Translate every string into {target_language} while preserving formatting, such as line breaks and any markdown formatting. Reply with only a JSON array of the translated strings, with the same number of elements in the same order."},
+            {"role": "user", "content": json.dumps(texts, ensure_ascii=False)}
+        ]
+
+    async def complete(self, messages):
+        """
+        Send one chat completion request through the semaphore and rate limiter.
+
+        Args:
+            messages (list): Chat messages to send
+
+        Returns:
+            str: The content of the first choice
+        """
+        prompt_tokens = sum(count_tokens(message["content"], self.model) for message in messages)
+        async with self.semaphore:
+            # The API counts max_tokens against the TPM budget up front
+            await self.rate_limiter.acquire(prompt_tokens + self.max_tokens)
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+        return response.choices[0].message.content
+
+    async def translate(self, text, target_language, retry_count=3):
+        """
+        Translate a single piece of text, retrying with backoff on failure.
+
+        Args:
+            text (str): Text to translate (must fit in one request)
+            target_language (str): Target language
+            retry_count (int): Number of retries if API call fails
+
+        Returns:
+            str: The translated text
+        """
+        messages = self.build_messages(text, target_language)
+        key = make_cache_key(self.model, messages)
+
+        # Check the persistent cache before any network call
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Share the result of an identical request that is already running
+        if key in self.pending:
+            return await self.pending[key]
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            translated_text = await self._translate_with_retries(messages, key, text, target_language, retry_count)
+            future.set_result(translated_text)
+            return translated_text
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self.pending[key]
+
+    async def _translate_with_retries(self, messages, key, text, target_language, retry_count):
+        for attempt in range(retry_count):
+            try:
+                translated_text = await self.complete(messages)
+                if self.cache is not None:
+                    self.cache.set(key, target_language, text, translated_text)
+                return translated_text
+
+            except Exception as e:
+                print(f"{Fore.RED}[ERROR] Translation failed (attempt {attempt+1}/{retry_count}): {str(e)}{Style.RESET_ALL}")
+                if attempt < retry_count - 1:
+                    wait_time = 2 * (attempt + 1)  # Exponential backoff
+                    print(f"{Fore.YELLOW}[DEBUG] Retrying in {wait_time} seconds...{Style.RESET_ALL}")
+                    await asyncio.sleep(wait_time)
+                else:
+                    return f"[TRANSLATION ERROR] {text[:100]}..."
+
+        # If all retries fail, return this message
+        return f"[TRANSLATION FAILED] {text[:100]}..."
+
+    async def translate_packed(self, text, target_language, retry_count=3):
+        """
+        Translate a short string together with other short strings.
+
+        The string waits up to PACK_DELAY seconds for others in the same
+        language and is then sent in one JSON-array request. Results are
+        cached per string exactly like translate().
+
+        Args:
+            text (str): Short text to translate
+            target_language (str): Target language
+            retry_count (int): Number of retries if a fallback call fails
+
+        Returns:
+            str: The translated text
+        """
+        key = make_cache_key(self.model, self.build_messages(text, target_language))
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if key in self.pending:
+            return await self.pending[key]
+
+        # Keep the whole pack inside the same token budget as a single segment
+        tokens = count_tokens(text, self.model)
+        pack = self.packs.get(target_language, [])
+        if pack and self.pack_token_counts[target_language] + tokens > self.max_segment_tokens:
+            self._flush_pack(target_language, retry_count)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        pack = self.packs.setdefault(target_language, [])
+        pack.append((text, key, future))
+        self.pack_token_counts[target_language] = self.pack_token_counts.get(target_language, 0) + tokens
+
+        if len(pack) >= PACK_MAX_ITEMS:
+            self._flush_pack(target_language, retry_count)
+        elif target_language not in self.pack_timers:
+            self.pack_timers[target_language] = asyncio.get_running_loop().call_later(
+                PACK_DELAY, self._flush_pack, target_language, retry_count
+            )
+
+        return await future
+
+    def _flush_pack(self, target_language, retry_count):
+        timer = self.pack_timers.pop(target_language, None)
+        if timer is not None:
+            timer.cancel()
+        pack = self.packs.pop(target_language, [])
+        self.pack_token_counts.pop(target_language, None)
+        if pack:
+            task = asyncio.ensure_future(self._send_pack(pack, target_language, retry_count))
+            # Keep a reference so the task is not garbage collected while running
+            self.pack_tasks.add(task)
+            task.add_done_callback(self.pack_tasks.discard)
+
+    async def _send_pack(self, pack, target_language, retry_count):
+        texts = [text for text, _, _ in pack]
+        try:
+            translations = None
+            if len(texts) > 1:
+                try:
+                    content = await self.complete(self.build_packed_messages(texts, target_language))
+                    translations = parse_packed_response(content, len(texts))
+                    if translations is None:
+                        print(f"{Fore.YELLOW}[DEBUG] Malformed packed response for {len(texts)} strings, falling back to single requests{Style.RESET_ALL}")
+                except Exception as e:
+                    print(f"{Fore.RED}[ERROR] Packed translation of {len(texts)} strings failed: {str(e)}{Style.RESET_ALL}")
+
+            if translations is None:
+                # Fall back to one request per string
+                translations = await asyncio.gather(
+                    *(self._translate_with_retries(self.build_messages(text, target_language), key, text, target_language, retry_count)
+                      for text, key, _ in pack)
+                )
+            elif self.cache is not None:
+                for (text, key, _), translated_text in zip(pack, translations):
+                    self.cache.set(key, target_language, text, translated_text)
+
+            for (_, _, future), translated_text in zip(pack, translations):
+                if not future.done():
+                    future.set_result(translated_text)
+        except BaseException as e:
+            for _, _, future in pack:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            for _, key, _ in pack:
+                self.pending.pop(key, None)
+
+
+def parse_packed_response(content, expected_count):
+    """
+    Unpack the JSON array returned for a packed request.
+
+    Args:
+        content (str): Model reply
+        expected_count (int): Number of strings that were sent
+
+    Returns:
+        list: The translated strings, or None if the reply is malformed or
+        the counts do not line up
+    """
+    if not content:
+        return None
+    # Models sometimes wrap the array in a ```json code fence
+    content = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", content)
+    try:
+        translations = json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(translations, list) or len(translations) != expected_count:
+        return None
+    if not all(isinstance(translation, str) for translation in translations):
+        return None
+    return translations
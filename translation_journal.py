@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import tempfile
+
+# Flush the journal to disk after this many records or seconds, whichever comes first
+DEFAULT_FSYNC_EVERY = 20
+DEFAULT_FSYNC_INTERVAL = 2.0
+
+
+def write_json_atomic(path, data):
+    """
+    Write pretty-printed JSON so readers never see a half-written file.
+
+    The data goes to a temporary file in the same directory, which is
+    fsynced and then renamed over the destination.
+
+    Args:
+        path (str): Destination JSON file
+        data: JSON-serialisable data
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of finished work.
+
+    Each record is one line, so appending costs the same however much
+    work is already done, and a crash loses at most the records written
+    since the last fsync. A torn last line is ignored on replay.
+    """
+
+    def __init__(self, path, fsync_every=DEFAULT_FSYNC_EVERY, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.valid_size = 0
+
+    def replay(self):
+        """
+        Read back every complete record in the journal.
+
+        Returns:
+            list: The records, in the order they were written
+        """
+        records = []
+        self.valid_size = 0
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crash
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                self.valid_size += len(line)
+        return records
+
+    def open(self, resume=False):
+        """
+        Open the journal for appending.
+
+        Args:
+            resume (bool): Keep existing records; otherwise start a new journal
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(self.path):
+            # Cut off a torn tail so new records start on a fresh line
+            self.replay()
+            os.truncate(self.path, self.valid_size)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self.file = open(self.path, 'w', encoding='utf-8')
+
+    def append(self, record):
+        """
+        Append one record, syncing to disk in batches.
+
+        Args:
+            record (dict): JSON-serialisable record
+        """
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """
+        Close and delete the journal once its work has been written out.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)